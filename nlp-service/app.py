@@ -1,10 +1,15 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.utils import secure_filename
 import os
+import json
+import shutil
+import tempfile
 from dotenv import load_dotenv
 import logging
 
-from services.cv_parser import CVParser
+from services.cv_parser import CVParser, MAX_CV_BYTES
 from services.cv_matcher import CVMatcher
 from services.cv_optimizer import CVOptimizer
 
@@ -62,6 +67,95 @@ if LINKEDIN_SCRAPER_AVAILABLE:
         linkedin_scraper = None
 
 
+# Types MIME acceptés pour un CV envoyé en corps brut
+CV_CONTENT_TYPES = {
+    'application/pdf': '.pdf',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document': '.docx',
+    'application/msword': '.doc',
+}
+# Marge pour les en-têtes et champs texte d'une requête multipart
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+def read_cv_upload():
+    """
+    CV envoyé directement dans la requête, sans système de fichiers partagé:
+    fichier multipart 'file', ou corps brut (Content-Type PDF/DOCX ou octet-stream,
+    nom via ?filename= ou l'en-tête X-Filename)
+
+    Returns:
+        (contenu, nom de fichier) ou None si la requête est en JSON (chemin de fichier)
+    """
+    if request.is_json:
+        return None
+
+    if request.content_length and request.content_length > MAX_CV_BYTES + MULTIPART_OVERHEAD_BYTES:
+        raise RequestEntityTooLarge(f'CV upload too large (max {MAX_CV_BYTES} bytes)')
+
+    upload = request.files.get('file')
+    if upload:
+        file_bytes = upload.read(MAX_CV_BYTES + 1)
+        file_name = upload.filename
+    elif request.mimetype in CV_CONTENT_TYPES or request.mimetype == 'application/octet-stream':
+        file_bytes = request.get_data(cache=False)
+        file_name = request.args.get('filename') or request.headers.get('X-Filename') \
+            or f'cv{CV_CONTENT_TYPES.get(request.mimetype, "")}'
+    else:
+        return None
+
+    if len(file_bytes) > MAX_CV_BYTES:
+        raise RequestEntityTooLarge(f'CV upload too large (max {MAX_CV_BYTES} bytes)')
+    return file_bytes, secure_filename(file_name or '') or 'cv'
+
+
+def request_fields() -> dict:
+    """Champs de la requête: JSON, ou formulaire multipart / paramètres d'URL avec un upload"""
+    if request.is_json:
+        return request.json or {}
+    return {**request.args.to_dict(), **request.form.to_dict()}
+
+
+def as_bool(value, default: bool) -> bool:
+    """Booléen JSON ou texte de formulaire ('true', '1', ...)"""
+    if value is None:
+        return default
+    if isinstance(value, str):
+        return value.lower() in ('true', '1', 'yes')
+    return bool(value)
+
+
+def stream_events(events):
+    """
+    Réponse streamée: server-sent events si le client accepte text/event-stream,
+    NDJSON sinon (une ligne JSON par événement). Une erreur en cours de génération
+    est envoyée comme dernier événement ('error')
+    """
+    use_sse = request.accept_mimetypes.best == 'text/event-stream'
+
+    def format_event(event: dict) -> str:
+        payload = json.dumps(event, ensure_ascii=False)
+        if use_sse:
+            return f'event: {event["event"]}\ndata: {payload}\n\n'
+        return payload + '\n'
+
+    def generate():
+        try:
+            for event in events:
+                yield format_event(event)
+        except Exception as e:
+            logger.error(f'Error while streaming: {str(e)}', exc_info=True)
+            yield format_event({'event': 'error', 'error': str(e)})
+
+    response = Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream' if use_sse else 'application/x-ndjson'
+    )
+    # Pas de mise en tampon par un proxy (nginx) pour que les morceaux arrivent au fil de l'eau
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @app.route('/health', methods=['GET'])
 def health():
     return jsonify({'status': 'ok'})
@@ -71,23 +165,51 @@ def health():
 def parse_cv():
     """
     Parse un CV et extrait les informations structurées
+    Le CV est désigné par `file_path` (JSON) ou envoyé directement (multipart / corps brut)
     """
     try:
-        data = request.json
+        upload = read_cv_upload()
+        data = request_fields()
         file_path = data.get('file_path')
 
-        if not file_path:
-            return jsonify({'error': 'file_path is required'}), 400
+        if not file_path and not upload:
+            return jsonify({'error': 'file_path or a CV upload is required'}), 400
 
-        logger.info(f'Attempting to parse CV: {file_path}')
+        logger.info(f'Attempting to parse CV: {upload[1] if upload else file_path}')
+        
+        # Mode deux temps: résultat Spacy/Regex immédiat, enrichissement OpenAI en arrière-plan
+        async_enrichment = as_bool(
+            data.get('async_enrichment'),
+            os.getenv('CV_PARSE_ASYNC_ENRICHMENT', 'false').lower() == 'true'
+        )
+        
+        if async_enrichment:
+            if upload:
+                parsed_data, job_id = cv_parser.parse_fast(file_bytes=upload[0], file_name=upload[1])
+            else:
+                parsed_data, job_id = cv_parser.parse_fast(file_path)
+            response = {'success': True, 'parsed_data': parsed_data}
+            if job_id:
+                response['enrichment'] = {
+                    'job_id': job_id,
+                    'status': cv_parser.enrichment_jobs.get(job_id)['status'],
+                    'status_url': f'/parse-cv/jobs/{job_id}'
+                }
+            return jsonify(response)
         
-        # Le parser gère maintenant les chemins relatifs/absolus
-        parsed_data = cv_parser.parse(file_path)
+        if upload:
+            parsed_data = cv_parser.parse_bytes(*upload)
+        else:
+            # Le parser gère maintenant les chemins relatifs/absolus
+            parsed_data = cv_parser.parse(file_path)
 
         return jsonify({
             'success': True,
             'parsed_data': parsed_data
         })
+    except RequestEntityTooLarge as e:
+        logger.error(f'CV upload rejected: {e.description}')
+        return jsonify({'error': e.description}), 413
     except FileNotFoundError as e:
         logger.error(f'CV file not found: {str(e)}')
         return jsonify({'error': f'CV file not found: {str(e)}'}), 404
@@ -99,6 +221,84 @@ def parse_cv():
         return jsonify({'error': f'Failed to parse CV: {str(e)}'}), 500
 
 
+@app.route('/parse-cv/jobs/<job_id>', methods=['GET'])
+def parse_cv_job(job_id):
+    """
+    État d'un enrichissement OpenAI lancé par /parse-cv avec async_enrichment
+    """
+    job = cv_parser.enrichment_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired parse job'}), 404
+    return jsonify({'success': True, **job})
+
+
+@app.route('/parse-cv/batch', methods=['POST'])
+def parse_cv_batch():
+    """
+    Parse plusieurs CVs en une requête (chemins en JSON ou fichiers multipart 'files')
+    Les résultats sont streamés en NDJSON, une ligne par CV dès qu'il est prêt
+    """
+    max_files = int(os.getenv('CV_BATCH_MAX_FILES', '100'))
+    upload_dir = None
+    labels = {}
+
+    uploads = request.files.getlist('files')
+    if uploads:
+        if len(uploads) > max_files:
+            return jsonify({'error': f'Too many files (max {max_files})'}), 400
+        upload_dir = tempfile.mkdtemp(prefix='cv_batch_')
+        file_paths = []
+        try:
+            for i, upload in enumerate(uploads):
+                path = os.path.join(upload_dir, f'{i}_{secure_filename(upload.filename or "") or "cv"}')
+                upload.save(path)
+                file_paths.append(path)
+                labels[path] = upload.filename
+        except Exception:
+            shutil.rmtree(upload_dir, ignore_errors=True)
+            raise
+    else:
+        data = request.get_json(silent=True)
+        file_paths = (data.get('file_paths') if isinstance(data, dict) else None) or []
+        if not isinstance(file_paths, list):
+            return jsonify({'error': 'file_paths must be a list'}), 400
+        if len(file_paths) > max_files:
+            return jsonify({'error': f'Too many files (max {max_files})'}), 400
+
+    if not file_paths:
+        return jsonify({'error': 'file_paths or files are required'}), 400
+
+    logger.info(f'Batch parsing {len(file_paths)} CVs')
+
+    def generate():
+        try:
+            for result in cv_parser.parse_many(file_paths):
+                result['file_path'] = labels.get(result['file_path'], result['file_path'])
+                yield json.dumps(result, ensure_ascii=False) + '\n'
+        except Exception as e:
+            logger.error(f'Error in batch parsing: {str(e)}', exc_info=True)
+            yield json.dumps({'success': False, 'error': f'Batch parsing aborted: {str(e)}'}) + '\n'
+
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    if upload_dir:
+        # À la fermeture de la réponse, même si le flux n'a jamais été lu (client déconnecté)
+        response.call_on_close(lambda: shutil.rmtree(upload_dir, ignore_errors=True))
+    return response
+
+
+@app.route('/parse-cv/stats', methods=['GET'])
+def parse_cv_stats():
+    """
+    Statistiques d'extraction PDF: niveau ayant servi chaque page (PyPDF2 / pdfplumber)
+    et raisons d'escalade, pour ajuster les seuils PDF_FAST_*
+    """
+    from services.pdf_extractor import get_tier_stats
+    return jsonify({
+        'success': True,
+        'pdf_extraction': get_tier_stats()
+    })
+
+
 @app.route('/match', methods=['POST'])
 def match_cv_jobs():
     """
@@ -171,14 +371,23 @@ def estimate_match_cost():
     Estime le coût d'utilisation d'OpenAI pour le matching
     """
     try:
-        from services.openai_matcher import OpenAIMatcher
-        matcher = OpenAIMatcher()
+        if hybrid_matcher and hybrid_matcher.openai_matcher:
+            matcher = hybrid_matcher.openai_matcher
+        else:
+            from services.openai_matcher import OpenAIMatcher
+            matcher = OpenAIMatcher()
         
         data = request.json
         num_jobs = data.get('num_jobs', 10)
         avg_text_length = data.get('avg_text_length', 1000)
+        cv_text = data.get('cv_text')  # Optionnel: textes réels pour un comptage exact
+        jobs = data.get('jobs')
+
+        texts = None
+        if cv_text or jobs:
+            texts = ([cv_text] if cv_text else []) + [matcher.prepare_job_text(job) for job in jobs or []]
 
-        cost_estimate = matcher.estimate_cost(num_jobs, avg_text_length)
+        cost_estimate = matcher.estimate_cost(len(texts) if texts else num_jobs, avg_text_length, texts=texts)
 
         return jsonify({
             'success': True,
@@ -196,53 +405,158 @@ def customize_cv():
     Utilise OpenAI si disponible, sinon le pipeline local
     """
     try:
-        data = request.json
+        upload = read_cv_upload()  # CV envoyé directement (multipart / corps brut)
+        data = request_fields()
         cv_path = data.get('cv_path')
         cv_text = data.get('cv_text')  # Texte du CV (alternative au fichier)
         job_description = data.get('job_description', '')
         job_requirements = data.get('job_requirements', '')
         job_title = data.get('job_title', '')
-        use_openai = data.get('use_openai', True)  # Utiliser OpenAI par défaut si disponible
+        use_openai = as_bool(data.get('use_openai'), True)  # Utiliser OpenAI par défaut si disponible
+        write_output = as_bool(data.get('write_output'), True)  # Pipeline local: écrire le DOCX optimisé
+        stream = as_bool(data.get('stream'), False)  # OpenAI: streamer le CV optimisé (NDJSON / SSE)
+        force_refresh = as_bool(data.get('force_refresh'), False)  # OpenAI: ignorer le cache des résultats
+        optimization_mode = data.get('optimization_mode')  # OpenAI: 'full' (CV réécrit) ou 'diff' (modifications)
+        if optimization_mode and optimization_mode not in ('full', 'diff'):
+            return jsonify({'error': 'optimization_mode must be "full" or "diff"'}), 400
+
+        if upload and not cv_text and openai_cv_optimizer and use_openai:
+            cv_text = cv_parser.extract_text_from_bytes(*upload)
 
         # Si on a le texte du CV et OpenAI est disponible, utiliser OpenAI
+        # Le streaming transmet le CV réécrit au fil de l'eau: mode 'full' uniquement
+        if cv_text and openai_cv_optimizer and use_openai and stream and optimization_mode != 'diff':
+            return stream_events(openai_cv_optimizer.optimize_cv_stream(
+                cv_text,
+                job_title,
+                job_description,
+                job_requirements,
+                force_refresh=force_refresh
+            ))
+
         if cv_text and openai_cv_optimizer and use_openai:
             result = openai_cv_optimizer.optimize_cv(
                 cv_text,
                 job_title,
                 job_description,
-                job_requirements
+                job_requirements,
+                force_refresh=force_refresh,
+                mode=optimization_mode
             )
             return jsonify({
                 'success': True,
                 'optimized_text': result.get('optimized_text'),
                 'changes': result.get('changes', []),
                 'improvements': result.get('improvements', {}),
+                'cached': result.get('cached', False),
+                'optimization_mode': result.get('optimization_mode'),
                 'method': 'openai'
             })
         
-        # Sinon, utiliser le pipeline local (nécessite un fichier)
-        if not cv_path or not os.path.exists(cv_path):
+        # Sinon, utiliser le pipeline local (nécessite un fichier ou son contenu)
+        if upload:
+            result = cv_optimizer.optimize(
+                upload[1],
+                job_description,
+                job_requirements,
+                job_title,
+                cv_bytes=upload[0],
+                write_output=write_output
+            )
+        elif not cv_path or not os.path.exists(cv_path):
             return jsonify({'error': 'CV file not found or cv_text not provided'}), 404
-
-        result = cv_optimizer.optimize(
-            cv_path,
-            job_description,
-            job_requirements,
-            job_title
-        )
+        else:
+            result = cv_optimizer.optimize(
+                cv_path,
+                job_description,
+                job_requirements,
+                job_title,
+                write_output=write_output
+            )
 
         return jsonify({
             'success': True,
             'customized_path': result['customized_path'],
+            'optimized_text': result['optimized_text'],
             'changes': result['changes'],
             'match_improvements': result.get('match_improvements', {}),
+            'cached': result.get('cached', False),
             'method': 'local'
         })
+    except RequestEntityTooLarge as e:
+        logger.error(f'CV upload rejected: {e.description}')
+        return jsonify({'error': e.description}), 413
     except Exception as e:
         logger.error(f'Error customizing CV: {str(e)}')
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/customize-cv/batch', methods=['POST'])
+def customize_cv_batch():
+    """
+    Personnalise un même CV pour plusieurs offres en une requête
+    Le CV est lu une seule fois; les offres sont traitées en parallèle
+    (pool de threads en local, appels OpenAI concurrents sinon)
+    """
+    try:
+        upload = read_cv_upload()  # CV envoyé directement (multipart / corps brut)
+        data = request_fields()
+        cv_path = data.get('cv_path')
+        cv_text = data.get('cv_text')
+        jobs = data.get('jobs') or []
+        if isinstance(jobs, str):  # Champ de formulaire multipart
+            jobs = json.loads(jobs)
+        use_openai = as_bool(data.get('use_openai'), True)
+        write_output = as_bool(data.get('write_output'), True)
+        force_refresh = as_bool(data.get('force_refresh'), False)
+        optimization_mode = data.get('optimization_mode')
+        if optimization_mode and optimization_mode not in ('full', 'diff'):
+            return jsonify({'error': 'optimization_mode must be "full" or "diff"'}), 400
+
+        max_jobs = int(os.getenv('CV_CUSTOMIZE_BATCH_MAX_JOBS', '50'))
+        if not isinstance(jobs, list) or not jobs:
+            return jsonify({'error': 'jobs (non-empty list) is required'}), 400
+        if len(jobs) > max_jobs:
+            return jsonify({'error': f'Too many jobs (max {max_jobs})'}), 400
+
+        logger.info(f'Batch customizing CV for {len(jobs)} jobs')
+
+        if upload and not cv_text and openai_cv_optimizer and use_openai:
+            cv_text = cv_parser.extract_text_from_bytes(*upload)
+
+        if cv_text and openai_cv_optimizer and use_openai:
+            results = openai_cv_optimizer.optimize_many(
+                cv_text, jobs, force_refresh=force_refresh, mode=optimization_mode
+            )
+            method = 'openai'
+        elif upload:
+            results = cv_optimizer.optimize_many(
+                upload[1], jobs, cv_bytes=upload[0], write_output=write_output
+            )
+            method = 'local'
+        elif not cv_path or not os.path.exists(cv_path):
+            return jsonify({'error': 'CV file not found or cv_text not provided'}), 404
+        else:
+            results = cv_optimizer.optimize_many(cv_path, jobs, write_output=write_output)
+            method = 'local'
+
+        return jsonify({
+            'success': True,
+            'results': results,
+            'succeeded': sum(1 for r in results if r['success']),
+            'failed': sum(1 for r in results if not r['success']),
+            'method': method
+        })
+    except RequestEntityTooLarge as e:
+        logger.error(f'CV upload rejected: {e.description}')
+        return jsonify({'error': e.description}), 413
+    except json.JSONDecodeError as e:
+        return jsonify({'error': f'Invalid jobs field: {str(e)}'}), 400
+    except Exception as e:
+        logger.error(f'Error batch customizing CV: {str(e)}')
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/customize-cv/estimate-cost', methods=['POST'])
 def estimate_customize_cost():
     """
@@ -255,8 +569,16 @@ def estimate_customize_cost():
         data = request.json
         cv_length = data.get('cv_length', 2000)
         job_description_length = data.get('job_description_length', 1000)
-
-        cost_estimate = openai_cv_optimizer.estimate_cost(cv_length, job_description_length)
+        cv_text = data.get('cv_text')  # Optionnel: texte réel pour un comptage exact
+
+        cost_estimate = openai_cv_optimizer.estimate_cost(
+            cv_length,
+            job_description_length,
+            cv_text=cv_text,
+            job_title=data.get('job_title', ''),
+            job_description=data.get('job_description', ''),
+            job_requirements=data.get('job_requirements', '')
+        )
 
         return jsonify({
             'success': True,
@@ -272,6 +594,7 @@ def scrape_jobs():
     """
     Scrape les offres d'emploi depuis LinkedIn ou Indeed
     """
+    from services.seen_jobs import INCREMENTAL_DEFAULT
     try:
         if not linkedin_scraper:
             return jsonify({
@@ -283,6 +606,8 @@ def scrape_jobs():
         location = data.get('location', '')
         limit = data.get('limit', 25)
         platform = data.get('platform', 'linkedin')  # 'linkedin' ou 'indeed'
+        # Arrêter la pagination sur une page d'offres déjà vues (SCRAPER_INCREMENTAL par défaut)
+        incremental = as_bool(data.get('incremental'), INCREMENTAL_DEFAULT)
         
         if not keywords:
             return jsonify({'error': 'keywords is required'}), 400
@@ -293,7 +618,8 @@ def scrape_jobs():
             keywords=keywords,
             location=location,
             limit=limit,
-            site_name=platform
+            site_name=platform,
+            incremental=incremental
         )
         
         # S'assurer que toutes les offres ont des URLs valides pour la candidature
@@ -322,6 +648,21 @@ def scrape_jobs():
         return jsonify({'error': f'Failed to scrape jobs: {str(e)}'}), 500
 
 
+@app.route('/scrape-jobs/stats', methods=['GET'])
+def scrape_jobs_stats():
+    """
+    Réutilisation des connexions HTTP du scraping (requêtes vs connexions ouvertes par hôte)
+    et efficacité du cache HTTP (pages fraîches, revalidées, téléchargées)
+    """
+    from services.http_cache import get_cache_stats
+    from services.http_session import get_connection_stats
+    return jsonify({
+        'success': True,
+        'connections': get_connection_stats(),
+        'cache': get_cache_stats()
+    })
+
+
 @app.route('/apply-jobs', methods=['POST'])
 def apply_jobs():
     """
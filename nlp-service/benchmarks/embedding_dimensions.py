@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark: embeddings OpenAI raccourcis (float16) vs embeddings complets (float32)
+
+Mesure l'accord de classement des offres (Spearman, recouvrement du top-k)
+et le gain mémoire pour plusieurs valeurs du paramètre `dimensions`.
+
+Les embeddings complets sont générés une seule fois; les versions raccourcies
+sont obtenues en tronquant puis renormalisant les vecteurs, ce qui correspond
+au comportement du paramètre `dimensions` des modèles text-embedding-3.
+Utiliser --api pour demander réellement les vecteurs raccourcis à l'API.
+
+Usage:
+    python benchmarks/embedding_dimensions.py [--corpus corpus.json] [--dims 256 512 1024] [--top-k 5] [--api]
+
+Le corpus est un JSON {"cv_text": "...", "jobs": [{"title", "description", "requirements"}]}
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.openai_matcher import OpenAIMatcher
+
+load_dotenv()
+
+SAMPLE_CV = """Développeur Full Stack - 5 ans d'expérience
+Compétences: Python, JavaScript, React, Node.js, PostgreSQL, MongoDB, Docker, AWS
+Expérience: Développeur Full Stack chez TechCorp (2020-2023), applications web React/Node.js.
+Développeur Junior chez StartupXYZ (2018-2020), maintenance et API REST en Python/Django.
+Formation: Master Informatique - Université Paris-Saclay"""
+
+SAMPLE_JOBS = [
+    {"title": "Développeur Full Stack React/Node.js", "description": "Applications web SaaS", "requirements": "React, Node.js, PostgreSQL"},
+    {"title": "Développeur Python Backend", "description": "API et microservices", "requirements": "Python, Django, PostgreSQL"},
+    {"title": "Data Scientist", "description": "Modèles de machine learning", "requirements": "Python, scikit-learn, SQL"},
+    {"title": "Ingénieur DevOps", "description": "Infrastructure cloud", "requirements": "AWS, Docker, Kubernetes, Terraform"},
+    {"title": "Développeur Mobile iOS", "description": "Applications iPhone", "requirements": "Swift, SwiftUI"},
+    {"title": "Chef de projet digital", "description": "Pilotage de projets web", "requirements": "Agile, Scrum, Jira"},
+    {"title": "Développeur Frontend Angular", "description": "Interfaces métier", "requirements": "Angular, TypeScript, RxJS"},
+    {"title": "Comptable", "description": "Tenue de la comptabilité", "requirements": "Sage, fiscalité, bilan"},
+    {"title": "Développeur Java Spring", "description": "Applications bancaires", "requirements": "Java, Spring Boot, Oracle"},
+    {"title": "Ingénieur Cloud AWS", "description": "Migration vers le cloud", "requirements": "AWS, Python, CI/CD"},
+]
+
+
+def rank(values: np.ndarray) -> np.ndarray:
+    """Rangs (0 = plus grande valeur)"""
+    order = np.argsort(-values, kind='stable')
+    ranks = np.empty_like(order)
+    ranks[order] = np.arange(len(values))
+    return ranks
+
+
+def spearman(a: np.ndarray, b: np.ndarray) -> float:
+    """Corrélation de Spearman entre deux vecteurs de scores"""
+    if len(a) < 2:
+        return 1.0
+    ra, rb = rank(a).astype(np.float64), rank(b).astype(np.float64)
+    return float(np.corrcoef(ra, rb)[0, 1])
+
+
+def top_k_overlap(a: np.ndarray, b: np.ndarray, k: int) -> float:
+    """Proportion d'offres communes dans les top-k des deux classements"""
+    k = min(k, len(a))
+    return len(set(np.argsort(-a)[:k]) & set(np.argsort(-b)[:k])) / k
+
+
+def shorten(matrix: np.ndarray, dims: int, dtype) -> np.ndarray:
+    """Tronque puis renormalise (équivalent au paramètre `dimensions`)"""
+    short = matrix[:, :dims].astype(np.float32)
+    short /= np.linalg.norm(short, axis=1, keepdims=True)
+    return short.astype(dtype)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', help='Fichier JSON avec cv_text et jobs')
+    parser.add_argument('--dims', type=int, nargs='+', default=[256, 512, 1024])
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--api', action='store_true', help="Demander les vecteurs raccourcis à l'API")
+    args = parser.parse_args()
+
+    if args.corpus:
+        with open(args.corpus, encoding='utf-8') as f:
+            corpus = json.load(f)
+        cv_text, jobs = corpus['cv_text'], corpus['jobs']
+    else:
+        cv_text, jobs = SAMPLE_CV, SAMPLE_JOBS
+
+    matcher = OpenAIMatcher()
+    texts = [cv_text] + [matcher.prepare_job_text(job) for job in jobs]
+
+    # Référence: vecteurs complets en float32
+    matcher.embedding_dtype = np.dtype(np.float32)
+    matcher.embedding_dimensions = None
+    full = matcher.generate_embeddings_batch(texts)
+    reference = matcher.calculate_similarities(full[0], full[1:])
+
+    print(f'Modèle: {matcher.embedding_model} | offres: {len(jobs)} | dimension complète: {full.shape[1]}')
+    print(f'{"dims":>6} {"dtype":>8} {"octets/vecteur":>15} {"gain mémoire":>13} {"spearman":>9} {"top-k":>6} {"µs/sim":>8}')
+
+    def report(dims, matrix):
+        start = time.perf_counter()
+        for _ in range(100):
+            scores = matcher.calculate_similarities(matrix[0], matrix[1:])
+        elapsed_us = (time.perf_counter() - start) / 100 / max(len(jobs), 1) * 1e6
+        bytes_per_vector = matrix.shape[1] * matrix.dtype.itemsize
+        print(
+            f'{dims:>6} {str(matrix.dtype):>8} {bytes_per_vector:>15} '
+            f'{full.shape[1] * 4 / bytes_per_vector:>12.1f}x '
+            f'{spearman(reference, scores):>9.4f} {top_k_overlap(reference, scores, args.top_k):>6.2f} {elapsed_us:>8.3f}'
+        )
+
+    report(full.shape[1], full)
+    for dims in sorted(d for d in args.dims if d < full.shape[1]):
+        if args.api:
+            matcher.embedding_dtype = np.dtype(np.float16)
+            short = matcher.generate_embeddings_batch(texts, dimensions=dims)
+        else:
+            short = shorten(full, dims, np.float16)
+        report(dims, short)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Benchmark: extraction des cartes d'offres (pages de résultats LinkedIn / Indeed)
+
+Compare l'ancienne méthode (page entière avec html.parser, cascade de find_all puis un
+`find` par sélecteur et par carte) à la nouvelle (lxml si disponible + SoupStrainer
+limité aux cartes, champs relevés en un seul parcours par carte).
+
+Les pages de test sont générées (structure des pages publiques: en-tête, scripts,
+navigation, puis les cartes) ou lues depuis un dossier de pages enregistrées
+(`--fixtures`, fichiers *.html dont le nom contient "linkedin" ou "indeed").
+Le script vérifie aussi que les deux méthodes extraient exactement les mêmes champs.
+
+Usage:
+    python benchmarks/job_cards.py [--runs 5] [--fixtures dossier_pages/]
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from services.job_cards import (
+    HTML_PARSER,
+    INDEED_CARD_FIELDS,
+    INDEED_CARD_SELECTORS,
+    INDEED_FIELD_INDEX,
+    LINKEDIN_CARD_FIELDS,
+    LINKEDIN_CARD_SELECTORS,
+    LINKEDIN_FIELD_INDEX,
+    extract_card_fields,
+    parse_job_cards,
+)
+
+PAGE_CHROME = """<!DOCTYPE html><html><head><title>Offres</title>
+{styles}
+<script>{script}</script></head><body>
+<header><nav>{nav}</nav></header>
+<main><section class="filters">{filters}</section>
+{results}
+</main><footer>{footer}</footer></body></html>"""
+
+LINKEDIN_CARD = """<li><div class="base-card job-search-card" data-entity-urn="urn:li:jobPosting:{i}">
+<a class="base-card__full-link" href="https://www.linkedin.com/jobs/view/{i}?refId=abc"><span class="sr-only">Développeur Python {i}</span></a>
+<div class="base-search-card__info"><h3 class="base-search-card__title">Développeur Python {i}</h3>
+<h4 class="base-search-card__subtitle"><a class="hidden-nested-link" href="/company/{i}">Entreprise {i}</a></h4>
+<div class="base-search-card__metadata"><span class="job-search-card__location">Paris, Île-de-France</span>
+<time class="job-search-card__listdate" datetime="2024-01-01">il y a 1 jour</time></div>
+<p class="job-search-card__snippet">CDI, télétravail partiel, 45 000 € - 55 000 €. Python, Django, AWS.</p></div>
+<img class="artdeco-entity-image" data-delayed-url="https://media.licdn.com/{i}.png" alt="logo"/></div></li>"""
+
+INDEED_CARD = """<li><div class="cardOutline"><div class="job_seen_beacon"><table><tbody><tr><td class="resultContent">
+<h2 class="jobTitle"><a data-jk="jk{i}" href="/rc/clk?jk=jk{i}&amp;from=serp"><span>Data Engineer {i}</span></a></h2>
+<div class="company_location"><span class="companyName">Société {i}</span>
+<div class="companyLocation">Lyon (69)</div></div>
+<div class="salary-snippet-container"><span class="salary-snippet">40 000 € - 50 000 € par an</span></div>
+</td></tr></tbody></table>
+<div class="job-snippet"><ul><li>Spark, Airflow et SQL.</li><li>Télétravail 2 jours par semaine.</li></ul></div>
+</div></div></li>"""
+
+
+def build_page(card_template: str, cards: int = 25) -> str:
+    """Page de résultats synthétique: beaucoup de contenu hors cartes, comme les vraies pages"""
+    return PAGE_CHROME.format(
+        styles='\n'.join(f'<link rel="stylesheet" href="/static/{i}.css"/>' for i in range(30)),
+        script='var config = {};' * 2000,
+        nav=''.join(f'<a class="nav-link" href="/n/{i}">Lien {i}</a>' for i in range(200)),
+        filters=''.join(
+            f'<div class="filter"><label>Filtre {i}</label><ul>'
+            + ''.join(f'<li><input type="checkbox" id="f{i}_{j}"/>Option {j}</li>' for j in range(15))
+            + '</ul></div>'
+            for i in range(20)
+        ),
+        results='<ul class="jobs-search__results-list">'
+                + ''.join(card_template.format(i=i) for i in range(cards)) + '</ul>',
+        footer=''.join(f'<p>Mentions {i}</p>' for i in range(100)),
+    )
+
+
+def legacy_cards(html: str, selectors):
+    """Ancienne méthode: page entière avec html.parser puis cascade de find_all"""
+    soup = BeautifulSoup(html, 'html.parser')
+    for tag, selector in selectors:
+        if selector.startswith('@'):
+            cards = soup.find_all(tag, {selector[1:]: True})
+        else:
+            cards = soup.find_all(tag, class_=selector)
+        if cards:
+            return cards
+    return []
+
+
+def legacy_fields(card, fields):
+    """Ancienne méthode: un `find` par sélecteur, dans l'ordre de préférence"""
+    found = {}
+    for field, selectors in fields.items():
+        for tag, selector in selectors:
+            if selector is None:
+                elem = card.find(tag)
+            elif selector.startswith('@'):
+                elem = card.find(tag, {selector[1:]: True})
+            else:
+                elem = card.find(tag, class_=selector)
+            if elem:
+                found[field] = elem
+                break
+    return found
+
+
+def as_text(fields):
+    return {field: elem.get_text(strip=True) for field, elem in fields.items()}
+
+
+def run(html: str, card_selectors, card_fields, field_index, runs: int):
+    """Retourne (cartes, cartes/s ancienne méthode, cartes/s nouvelle méthode)"""
+    legacy = [as_text(legacy_fields(card, card_fields)) for card in legacy_cards(html, card_selectors)]
+    new = [as_text(extract_card_fields(card, field_index)) for card in parse_job_cards(html, card_selectors)]
+    if legacy != new:
+        raise AssertionError('Legacy and new extraction differ')
+
+    def best_time(fn):
+        best = float('inf')
+        for _ in range(runs):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    legacy_time = best_time(
+        lambda: [legacy_fields(card, card_fields) for card in legacy_cards(html, card_selectors)]
+    )
+    new_time = best_time(
+        lambda: [extract_card_fields(card, field_index) for card in parse_job_cards(html, card_selectors)]
+    )
+    return len(new), len(new) / legacy_time, len(new) / new_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--fixtures', help='Dossier de pages de résultats enregistrées (*.html)')
+    args = parser.parse_args()
+
+    platforms = {
+        'linkedin': (LINKEDIN_CARD_SELECTORS, LINKEDIN_CARD_FIELDS, LINKEDIN_FIELD_INDEX),
+        'indeed': (INDEED_CARD_SELECTORS, INDEED_CARD_FIELDS, INDEED_FIELD_INDEX),
+    }
+
+    pages = []
+    if args.fixtures:
+        for path in sorted(glob.glob(os.path.join(args.fixtures, '*.html'))):
+            platform = 'indeed' if 'indeed' in os.path.basename(path).lower() else 'linkedin'
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                pages.append((os.path.basename(path), platform, f.read()))
+    else:
+        pages = [
+            ('linkedin_synthetic', 'linkedin', build_page(LINKEDIN_CARD)),
+            ('indeed_synthetic', 'indeed', build_page(INDEED_CARD)),
+        ]
+
+    print(f'Parseur: {HTML_PARSER}')
+    print(f'{"page":<28} {"Ko":>6} {"cartes":>7} {"avant c/s":>10} {"après c/s":>10} {"gain":>6}')
+    for name, platform, html in pages:
+        selectors, fields, index = platforms[platform]
+        cards, legacy_rate, new_rate = run(html, selectors, fields, index, args.runs)
+        size_kb = len(html.encode('utf-8')) / 1024
+        gain = new_rate / legacy_rate if legacy_rate else float('nan')
+        print(f'{name:<28} {size_kb:>6.0f} {cards:>7} {legacy_rate:>10.0f} {new_rate:>10.0f} {gain:>5.1f}x')
+
+
+if __name__ == '__main__':
+    main()
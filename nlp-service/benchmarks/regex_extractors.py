@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark: temps des extracteurs Regex du parser sur un corpus de CV adverses
+
+Le corpus synthétique cible les cas qui faisaient exploser les anciens patterns
+(retour arrière quadratique ou pire): longues lignes avec beaucoup de majuscules et
+de tirets mais sans dates, parenthèses jamais fermées, adresses e-mail tronquées,
+titres suivis de longues suites d'espaces, etc.
+
+Chaque extracteur est chronométré sur chaque document; le script échoue (code 1)
+si l'un d'eux dépasse le budget en millisecondes par Ko de texte.
+
+Usage:
+    python benchmarks/regex_extractors.py [--size-kb 64] [--budget-ms-per-kb 1] [--runs 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('CV_PARSE_CACHE_ENABLED', 'false')
+
+from services.cv_parser import CVParser
+from services.cv_sections import segment_cv
+
+REALISTIC_CV = """Jean Dupont
+jean.dupont@example.com - 06 12 34 56 78
+
+PROFIL
+Développeur Python avec 8 ans d'expérience en API et data.
+
+COMPÉTENCES TECHNIQUES
+Langages: Python, Java, TypeScript
+Outils: Docker, Kubernetes, Git
+
+EXPÉRIENCE PROFESSIONNELLE
+Développeur Senior - Capgemini (2019 - 2023)
+Développeur - Sopra Steria (2015 - 2019)
+
+FORMATION
+Master Informatique - Université de Lyon (2013 - 2015)
+
+Langues: Français, Anglais
+Certifications
+AWS Certified Solutions Architect
+Projets
+- JobFlow
+"""
+
+
+def adversarial_corpus(size: int) -> dict:
+    """Documents synthétiques d'environ `size` caractères"""
+    def fill(unit: str) -> str:
+        return (unit * (size // len(unit) + 1))[:size]
+
+    return {
+        'realistic': fill(REALISTIC_CV),
+        # Poste - Entreprise sans jamais de parenthèse de dates
+        'dashes_no_dates': fill('Ab - Cd – '),
+        # Dates jamais fermées
+        'unclosed_paren': 'Poste - Entreprise (' + fill('2019 - 2020 Ab - Cd '),
+        'open_parens': 'Poste - Entreprise ' + fill('(Ab - '),
+        # Une seule ligne géante avec majuscules, tirets et parenthèses vides
+        'single_line_mixed': fill('A-B (x) C-D ( '),
+        # E-mails sans domaine valide
+        'email_no_tld': fill('a.b.c@d-e-f.'),
+        'email_no_at': fill('a.b_c%d+e-'),
+        # Titres suivis de longues suites d'espaces
+        'heading_whitespace': 'Compétences' + ' ' * size + 'x y z w v',
+        'many_keywords': fill('certification expérience formation projets '),
+        'phone_digits': fill('0' + '1' * 7 + ' '),
+        'bullets': fill('• Ab - Cd (2020 •'),
+        # Lignes de continuation à recoller (parenthèse en début, tiret en fin de ligne)
+        'paren_continuations': fill('(x\n'),
+        'dash_continuations': fill('Ab -\n'),
+        'en_dash_continuations': fill('Ab –\n'),
+    }
+
+
+def extractors(parser: CVParser):
+    """Extracteurs chronométrés: (nom, fonction(texte, sections))"""
+    return [
+        ('segment_cv', lambda text, sections: segment_cv(text)),
+        ('personal_info', lambda text, sections: parser._extract_personal_info(text)),
+        ('skills', lambda text, sections: parser._extract_skills(text, sections)),
+        ('experience', lambda text, sections: parser._extract_experience(text)),
+        ('education', lambda text, sections: parser._extract_education(text, sections.get('education'))),
+        ('education_no_section', lambda text, sections: parser._extract_education(text)),
+        ('languages', lambda text, sections: parser._extract_languages(text)),
+        ('certifications', lambda text, sections: parser._extract_certifications(text)),
+        ('projects', lambda text, sections: parser._extract_projects(sections.get('projects'))),
+        ('summary', lambda text, sections: parser._extract_summary(sections.get('profile'))),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size-kb', type=int, default=64)
+    parser.add_argument('--budget-ms-per-kb', type=float, default=1.0)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    cv_parser = CVParser()
+    corpus = adversarial_corpus(args.size_kb * 1024)
+    failures = []
+
+    print(f'{"document":<20} {"extracteur":<22} {"ms":>9} {"ms/Ko":>8}')
+    for doc_name, text in corpus.items():
+        size_kb = len(text.encode('utf-8')) / 1024
+        sections = segment_cv(text)
+        for name, extract in extractors(cv_parser):
+            best = float('inf')
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                extract(text, sections)
+                best = min(best, time.perf_counter() - start)
+
+            ms = best * 1000
+            per_kb = ms / size_kb
+            flag = '' if per_kb <= args.budget_ms_per_kb else '  <-- hors budget'
+            print(f'{doc_name:<20} {name:<22} {ms:>9.2f} {per_kb:>8.3f}{flag}')
+            if flag:
+                failures.append((doc_name, name, per_kb))
+
+    if failures:
+        print(f'\n{len(failures)} extracteur(s) au-delà de {args.budget_ms_per_kb} ms/Ko')
+        sys.exit(1)
+    print(f'\nTous les extracteurs sous {args.budget_ms_per_kb} ms/Ko')
+
+
+if __name__ == '__main__':
+    main()
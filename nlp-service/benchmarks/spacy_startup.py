@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark: temps de démarrage et mémoire (RSS) des pipelines Spacy
+
+Compare l'ancien chargement (fr + en complets au démarrage) avec le chargement
+paresseux d'une seule langue, limité aux composants utiles au NER.
+Chaque scénario est mesuré dans un processus Python neuf.
+
+Usage:
+    python benchmarks/spacy_startup.py [--runs 3]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SAMPLE_TEXT = (
+    "Jean Dupont - Développeur Python à Paris. Expérience: Ingénieur logiciel chez "
+    "Capgemini (2019-2023), développement d'API avec Django et PostgreSQL. "
+    "Formation: Master Informatique, Université de Lyon. Langues: français, anglais."
+) * 20
+
+SCENARIOS = {
+    'eager_full': 'Ancien comportement: fr + en, tous les composants',
+    'lazy_pruned': 'Nouveau: une langue à la première utilisation, NER seul',
+}
+
+
+def run_child(scenario: str) -> dict:
+    """Exécuté dans le sous-processus: charge les modèles et mesure"""
+    import resource
+    from services.cv_parser import SPACY_MODELS, SPACY_EXCLUDED_COMPONENTS
+
+    start = time.perf_counter()
+    import spacy
+
+    import_time = time.perf_counter() - start
+
+    if scenario == 'eager_full':
+        models = [spacy.load(name) for name in SPACY_MODELS.values()]
+    else:
+        models = [spacy.load(SPACY_MODELS['fr'], exclude=SPACY_EXCLUDED_COMPONENTS)]
+    load_time = time.perf_counter() - start - import_time
+
+    doc_start = time.perf_counter()
+    doc = models[0](SAMPLE_TEXT)
+    doc_time = time.perf_counter() - doc_start
+
+    return {
+        'import_s': import_time,
+        'load_s': load_time,
+        'first_doc_s': doc_time,
+        # ru_maxrss est en Ko sous Linux, en octets sous macOS
+        'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024),
+        'entities': len(doc.ents),
+        'pipelines': [model.pipe_names for model in models],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--child', choices=SCENARIOS.keys(), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child)))
+        return
+
+    print(f'{"scénario":<12} {"import (s)":>10} {"chargement (s)":>15} {"1er doc (s)":>12} {"RSS max (Mo)":>13}  pipelines')
+    for scenario, description in SCENARIOS.items():
+        results = []
+        for _ in range(args.runs):
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--child', scenario],
+                capture_output=True, text=True, check=True
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+        best = min(results, key=lambda r: r['import_s'] + r['load_s'])
+        print(
+            f'{scenario:<12} {best["import_s"]:>10.2f} {best["load_s"]:>15.2f} '
+            f'{best["first_doc_s"]:>12.3f} {max(r["max_rss_mb"] for r in results):>13.0f}  {best["pipelines"]}'
+        )
+        print(f'{"":<12} {description}')
+
+
+if __name__ == '__main__':
+    main()
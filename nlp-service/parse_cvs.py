@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Parse en masse des CVs (migrations, imports)
+
+Écrit un résultat JSON par ligne (NDJSON) au fur et à mesure que les CVs sont traités.
+
+Usage:
+    python parse_cvs.py cv1.pdf cv2.docx dossier_cvs/ [--output resultats.ndjson] [--workers 4]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+# Add the current directory to sys.path to make imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from services.cv_parser import CVParser, SUPPORTED_EXTENSIONS
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+def collect_paths(inputs):
+    """Développe les dossiers en liste de fichiers CV supportés"""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                for name in sorted(files):
+                    if os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS:
+                        paths.append(os.path.join(root, name))
+        else:
+            paths.append(item)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('inputs', nargs='+', help='Fichiers CV ou dossiers')
+    parser.add_argument('--output', help='Fichier NDJSON de sortie (stdout par défaut)')
+    parser.add_argument('--workers', type=int, help="Nombre de processus d'extraction (CV_PARSE_WORKERS)")
+    parser.add_argument('--batch-size', type=int, default=16, help='Taille des batchs Spacy (nlp.pipe)')
+    args = parser.parse_args()
+
+    if args.workers:
+        os.environ['CV_PARSE_WORKERS'] = str(args.workers)
+
+    paths = collect_paths(args.inputs)
+    if not paths:
+        print('Aucun CV trouvé', file=sys.stderr)
+        return 1
+
+    cv_parser = CVParser()
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    start = time.perf_counter()
+    failures = 0
+
+    try:
+        for count, result in enumerate(cv_parser.parse_many(paths, batch_size=args.batch_size), start=1):
+            failures += 0 if result['success'] else 1
+            output.write(json.dumps(result, ensure_ascii=False) + '\n')
+            output.flush()
+            print(f'[{count}/{len(paths)}] {"OK " if result["success"] else "ERR"} {result["file_path"]}', file=sys.stderr)
+    finally:
+        if args.output:
+            output.close()
+
+    elapsed = time.perf_counter() - start
+    print(f'{len(paths)} CVs traités en {elapsed:.1f}s ({failures} échecs)', file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,13 +1,23 @@
+import io
 import os
 import shutil
 import re
-from typing import Dict, List
+from typing import Dict, List, Optional
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from docx import Document
 import PyPDF2
 
+from services.docx_reader import iter_docx_paragraphs
+from services.output_store import OptimizedCVStore
+
 logger = logging.getLogger(__name__)
 
+# Incrémenter quand la logique d'optimisation change (invalide les sorties stockées)
+OPTIMIZER_MODE = 'local'
+OPTIMIZER_VERSION = '2'
+
 
 class CVOptimizer:
     """
@@ -15,103 +25,232 @@ class CVOptimizer:
     """
     
     def __init__(self):
-        self.output_dir = os.getenv('CV_OUTPUT_DIR', './optimized_cvs')
-        os.makedirs(self.output_dir, exist_ok=True)
+        # Sorties adressées par contenu (CV + offre): une demande répétée est une lecture de fichier
+        self.store = OptimizedCVStore()
+        self.output_dir = self.store.output_dir
+        self.max_workers = int(os.getenv('CV_CUSTOMIZE_WORKERS', '4'))
     
     def optimize(self, cv_path: str, job_description: str, 
-                 job_requirements: str, job_title: str) -> Dict:
+                 job_requirements: str, job_title: str, cv_bytes: Optional[bytes] = None,
+                 write_output: bool = True) -> Dict:
         """
         Optimise un CV pour une offre d'emploi
+        Si `cv_bytes` est fourni (upload), le CV est lu en mémoire et `cv_path`
+        n'est que son nom de fichier
+        
+        Le texte original extrait et le texte optimisé restent en mémoire: les changements
+        sont calculés dessus, sans relire les fichiers. Le DOCX optimisé n'est écrit que
+        si `write_output` (sinon `customized_path` vaut None)
+        
+        Le résultat est stocké sous une clé (CV, offre, version de l'optimiseur): la même
+        demande renvoie le DOCX déjà produit (`cached` vaut True) sans rien recalculer
         """
         try:
-            # Lire le CV original
-            file_ext = os.path.splitext(cv_path)[1].lower()
+            cv = self._load_cv(cv_path, cv_bytes)
+            return self._tailor(cv, job_description, job_requirements, write_output)
+        except Exception as e:
+            logger.error(f'Error optimizing CV: {str(e)}')
+            raise
+    
+    def optimize_many(self, cv_path: str, jobs: List[Dict], cv_bytes: Optional[bytes] = None,
+                      write_output: bool = True, max_workers: Optional[int] = None) -> List[Dict]:
+        """
+        Personnalise un même CV pour plusieurs offres
+        
+        Le CV est lu, haché et découpé une seule fois; chaque offre ne coûte que l'extraction
+        de ses mots-clés, le diff en mémoire et l'écriture de son DOCX (dans un pool de threads).
+        Chaque offre a sa propre sortie (clé CV + offre), réutilisée si elle existe déjà.
+        
+        Args:
+            jobs: [{'id', 'title', 'description', 'requirements'}, ...]
+        
+        Returns:
+            Un résultat par offre, dans l'ordre de `jobs`:
+            {'job_id', 'success', 'customized_path', 'optimized_text', 'changes', 'match_improvements'}
+            ou {'job_id', 'success': False, 'error'}
+        """
+        cv = self._load_cv(cv_path, cv_bytes)
+        max_workers = max_workers or self.max_workers
+        
+        def tailor(index: int, job: Dict) -> Dict:
+            job_id = job.get('id', index)
+            try:
+                result = self._tailor(
+                    cv,
+                    job.get('description', ''),
+                    job.get('requirements', ''),
+                    write_output
+                )
+                return {'job_id': job_id, 'success': True, **result}
+            except Exception as e:
+                logger.warning(f'Error tailoring CV for job {job_id}: {str(e)}')
+                return {'job_id': job_id, 'success': False, 'error': str(e)}
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs)))) as executor:
+            return list(executor.map(tailor, range(len(jobs)), jobs))
+    
+    def _load_cv(self, cv_path: str, cv_bytes: Optional[bytes] = None) -> Dict:
+        """
+        Lit le CV une fois (contenu brut et empreinte)
+        Le texte n'est extrait qu'au premier besoin (`_ensure_text`): inutile si toutes
+        les sorties demandées sont déjà stockées
+        """
+        file_ext = os.path.splitext(cv_path)[1].lower()
+        if file_ext not in ['.pdf', '.doc', '.docx']:
+            raise ValueError(f'Unsupported file format: {file_ext}')
+        
+        if cv_bytes is None:
+            with open(cv_path, 'rb') as f:
+                cv_bytes = f.read()
+        
+        return {
+            'path': cv_path,
+            'file_ext': file_ext,
+            'bytes': cv_bytes,
+            'digest': self.store.digest(cv_bytes),
+            'paragraphs': None,
+            'original_text': None,
+            'lock': threading.Lock(),
+        }
+    
+    def _ensure_text(self, cv: Dict) -> None:
+        """
+        Extrait le texte original (et les paragraphes pour un DOCX), une seule fois par CV
+        """
+        with cv['lock']:
+            if cv['original_text'] is not None:
+                return
+            if cv['file_ext'] == '.pdf':
+                cv['original_text'] = self._extract_from_pdf(self._source(cv['path'], cv['bytes']))
+            else:
+                cv['paragraphs'] = list(iter_docx_paragraphs(self._source(cv['path'], cv['bytes'])))
+                cv['original_text'] = '\n'.join(cv['paragraphs'])
+    
+    def _tailor(self, cv: Dict, job_description: str, job_requirements: str,
+                write_output: bool = True) -> Dict:
+        """
+        Personnalise un CV déjà chargé (`_load_cv`) pour une offre
+        """
+        key = self.store.make_key(
+            cv['digest'], job_description + '\n' + job_requirements, OPTIMIZER_MODE, OPTIMIZER_VERSION
+        )
+        
+        with self.store.lock(key):
+            stored = self.store.get(key)
+            if stored is not None:
+                stored['customized_path'] = self._publish(cv, key) if write_output else None
+                return {**stored, 'cached': True}
+            
+            # Extraire les mots-clés de l'offre (une seule fois)
+            job_keywords = self._extract_keywords(job_description + ' ' + job_requirements)
+            required_skills = self._extract_skills(job_requirements)
             
-            if file_ext == '.pdf':
-                # Pour les PDFs, on crée une version Word optimisée
-                text = self._extract_from_pdf(cv_path)
-                optimized_path = self._optimize_text_cv(cv_path, text, job_description, job_requirements, job_title)
-            elif file_ext in ['.doc', '.docx']:
-                optimized_path = self._optimize_docx_cv(cv_path, job_description, job_requirements, job_title)
+            self._ensure_text(cv)
+            original_text = cv['original_text']
+            optimized_paragraphs = None
+            if cv['paragraphs'] is None:
+                optimized_text = self._add_keywords_to_text(original_text, job_keywords, required_skills)
             else:
-                raise ValueError(f'Unsupported file format: {file_ext}')
+                # Une seule source pour le texte renvoyé et le DOCX écrit
+                optimized_paragraphs = [
+                    self._add_keywords_to_text(text, job_keywords, required_skills) if text else text
+                    for text in cv['paragraphs']
+                ]
+                optimized_text = '\n'.join(optimized_paragraphs)
             
             # Analyser les changements
-            changes = self._analyze_changes(cv_path, optimized_path, job_description, job_requirements)
+            changes = self._analyze_changes(original_text, optimized_text, job_keywords, required_skills)
             
-            return {
-                'customized_path': optimized_path,
+            result = {
+                'customized_path': None,
+                'optimized_text': optimized_text,
                 'changes': changes,
                 'match_improvements': self._calculate_improvements(changes)
             }
-        except Exception as e:
-            logger.error(f'Error optimizing CV: {str(e)}')
-            raise
+            
+            if write_output:
+                if cv['paragraphs'] is None:
+                    # Pour les PDFs, on crée une version Word optimisée
+                    def write_docx(output_path: str):
+                        self._optimize_text_cv(output_path, optimized_text)
+                else:
+                    def write_docx(output_path: str):
+                        self._optimize_docx_cv(
+                            cv['path'], output_path, cv['paragraphs'], optimized_paragraphs, cv['bytes']
+                        )
+                self.store.put(key, write_docx, result)
+                result['customized_path'] = self._publish(cv, key)
+            
+            return {**result, 'cached': False}
+    
+    def _publish(self, cv: Dict, key: str) -> str:
+        """Fichier livré au nom du CV d'origine (conservé hors éviction, voir OptimizedCVStore.publish)"""
+        return self.store.publish(key, os.path.splitext(os.path.basename(cv['path']))[0])
     
-    def _extract_from_pdf(self, file_path: str) -> str:
-        """Extrait le texte d'un PDF"""
+    @staticmethod
+    def _source(file_path: str, file_bytes: Optional[bytes] = None):
+        """Chemin du fichier, ou flux mémoire neuf si le contenu a été reçu directement"""
+        return io.BytesIO(file_bytes) if file_bytes is not None else file_path
+    
+    def _extract_from_pdf(self, source) -> str:
+        """Extrait le texte d'un PDF (chemin ou flux)"""
         text = ''
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + '\n'
+            pdf_reader = PyPDF2.PdfReader(source)
+            for page in pdf_reader.pages:
+                text += page.extract_text() + '\n'
         except Exception as e:
             logger.error(f'Error extracting PDF text: {str(e)}')
             raise
         return text
     
-    def _optimize_text_cv(self, original_path: str, text: str, 
-                          job_description: str, job_requirements: str, job_title: str) -> str:
+    def _optimize_text_cv(self, output_path: str, optimized_text: str) -> str:
         """
-        Optimise un CV texte (pour les PDFs)
+        Écrit le CV texte optimisé (pour les PDFs) dans un nouveau document Word (`output_path`)
         """
-        # Créer un nouveau document Word optimisé
         doc = Document()
         
-        # Extraire les mots-clés de l'offre
-        job_keywords = self._extract_keywords(job_description + ' ' + job_requirements)
-        required_skills = self._extract_skills(job_requirements)
-        
-        # Optimiser le texte
-        optimized_text = self._add_keywords_to_text(text, job_keywords, required_skills)
-        
         # Ajouter au document
         for paragraph in optimized_text.split('\n'):
             if paragraph.strip():
                 doc.add_paragraph(paragraph)
         
         # Sauvegarder
-        base_name = os.path.splitext(os.path.basename(original_path))[0]
-        output_path = os.path.join(self.output_dir, f'{base_name}_optimized.docx')
         doc.save(output_path)
         
         return output_path
     
-    def _optimize_docx_cv(self, cv_path: str, job_description: str, 
-                         job_requirements: str, job_title: str) -> str:
+    def _optimize_docx_cv(self, cv_path: str, output_path: str, original_paragraphs: List[str],
+                          optimized_paragraphs: List[str], cv_bytes: Optional[bytes] = None) -> str:
         """
-        Optimise un CV Word
+        Écrit le CV Word optimisé dans `output_path`
+        Les paragraphes du corps reçoivent les textes déjà calculés (`optimized_paragraphs`,
+        un par élément de `doc.paragraphs`); seuls ceux qui changent sont réécrits.
+        Si aucun paragraphe ne change, le fichier est copié sans charger le DOM python-docx
         """
-        doc = Document(cv_path)
+        if optimized_paragraphs == original_paragraphs:
+            if cv_bytes is not None:
+                with open(output_path, 'wb') as f:
+                    f.write(cv_bytes)
+            else:
+                shutil.copyfile(cv_path, output_path)
+            return output_path
         
-        # Extraire les mots-clés
-        job_keywords = self._extract_keywords(job_description + ' ' + job_requirements)
-        required_skills = self._extract_skills(job_requirements)
+        doc = Document(self._source(cv_path, cv_bytes))
         
-        # Optimiser chaque paragraphe
-        for paragraph in doc.paragraphs:
-            if paragraph.text:
-                optimized_text = self._add_keywords_to_text(
-                    paragraph.text, 
-                    job_keywords, 
-                    required_skills
-                )
-                paragraph.text = optimized_text
+        paragraphs = doc.paragraphs
+        if len(paragraphs) != len(optimized_paragraphs):
+            raise ValueError(
+                f'DOCX paragraph count mismatch ({len(paragraphs)} in document, '
+                f'{len(optimized_paragraphs)} extracted)'
+            )
+        
+        # Réécrire les paragraphes modifiés
+        for paragraph, original, optimized in zip(paragraphs, original_paragraphs, optimized_paragraphs):
+            if optimized != original:
+                paragraph.text = optimized
         
         # Sauvegarder
-        base_name = os.path.splitext(os.path.basename(cv_path))[0]
-        output_path = os.path.join(self.output_dir, f'{base_name}_optimized.docx')
         doc.save(output_path)
         
         return output_path
@@ -165,20 +304,13 @@ class CVOptimizer:
     
         return optimized
     
-    def _analyze_changes(self, original_path: str, optimized_path: str, 
-                        job_description: str, job_requirements: str) -> List[Dict]:
+    def _analyze_changes(self, original_text: str, optimized_text: str,
+                        job_keywords: List[str], required_skills: List[str]) -> List[Dict]:
         """
-        Analyse les changements apportés au CV
+        Analyse les changements apportés au CV (sur les textes en mémoire)
         """
         changes = []
         
-        # Lire les deux fichiers
-        original_text = self._read_file(original_path)
-        optimized_text = self._read_file(optimized_path)
-        
-        # Extraire les mots-clés de l'offre
-        job_keywords = self._extract_keywords(job_description + ' ' + job_requirements)
-        
         # Identifier les mots-clés ajoutés
         original_lower = original_text.lower()
         optimized_lower = optimized_text.lower()
@@ -196,7 +328,6 @@ class CVOptimizer:
             })
         
         # Identifier les compétences ajoutées
-        required_skills = self._extract_skills(job_requirements)
         added_skills = [s for s in required_skills if s not in original_lower and s in optimized_lower]
         
         if added_skills:
@@ -208,21 +339,6 @@ class CVOptimizer:
         
         return changes
     
-    def _read_file(self, file_path: str) -> str:
-        """
-        Lit le contenu d'un fichier
-        """
-        file_ext = os.path.splitext(file_path)[1].lower()
-        
-        if file_ext == '.pdf':
-            return self._extract_from_pdf(file_path)
-        elif file_ext in ['.doc', '.docx']:
-            doc = Document(file_path)
-            return '\n'.join([p.text for p in doc.paragraphs])
-        else:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
-    
     def _calculate_improvements(self, changes: List[Dict]) -> Dict:
         """
         Calcule l'amélioration du score de matching
@@ -1,13 +1,62 @@
+import io
 import os
 import re
 import json
-from typing import Dict, List, Optional
+import threading
+import importlib.util
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
-from docx import Document
 import logging
 
+from services.parse_cache import ParseCache
+from services.parse_jobs import ParseJobStore
+from services.cv_sections import HEADER, segment_cv
+from services.docx_reader import extract_docx_text
+from services.pdf_extractor import extract_pdf_text, process_pool_context, record_tier_stats
+
 logger = logging.getLogger(__name__)
 
+# À incrémenter à chaque changement de l'extraction ou du format de sortie (invalide le cache)
+PARSER_VERSION = '9'
+
+SUPPORTED_EXTENSIONS = ['.pdf', '.doc', '.docx']
+
+# Taille maximale d'un CV reçu en mémoire (upload)
+MAX_CV_BYTES = int(float(os.getenv('CV_MAX_FILE_MB', '10')) * 1024 * 1024)
+
+# Patterns des extracteurs Regex (compilés une fois)
+# Tous les quantificateurs sont bornés ou sans ambiguïté: temps linéaire en la taille du texte,
+# y compris sur des lignes très longues sans correspondance (voir benchmarks/regex_extractors.py)
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]{1,64}@[A-Za-z0-9.-]{1,253}\.[A-Za-z]{2,24}\b')
+PHONE_PATTERN = re.compile(r'(?:\+33|0)[1-9](?:\d{2}){4}')
+CERTIFICATION_PATTERN = re.compile(
+    r'(?:certification|certificat|certified|certificate)[\s:]{0,20}([A-Z][^•\n]*)', re.IGNORECASE
+)
+# Briques du scanner "Poste - Entreprise (Dates)" (voir find_role_dates)
+UPPERCASE_PATTERN = re.compile(r'[A-Z]')
+DASH_PATTERN = re.compile(r'[-–]\s*(?=[A-Z])')
+PARENTHESES_PATTERN = re.compile(r'\(([^()]+)\)')
+EDUCATION_KEYWORDS_PATTERN = re.compile(
+    r'diplôme|formation|éducation|education|degree|university|école|school', re.IGNORECASE
+)
+SKILL_LABEL_PATTERN = re.compile(r'^[^:,;\n]{1,30}:')
+SKILL_SEPARATOR_PATTERN = re.compile(r'[,;•\-]')
+PROJECT_SEPARATOR_PATTERN = re.compile(r'[\n•-]')
+BULLET_PATTERN = re.compile(r'^[\s•*\-–]+')
+
+# Limite de taille du texte passé à Spacy
+SPACY_MAX_CHARS = 100000
+
+SPACY_MODELS = {
+    'fr': 'fr_core_news_sm',
+    'en': 'en_core_web_sm',
+}
+
+# Composants inutiles pour le NER (non chargés en mémoire)
+SPACY_EXCLUDED_COMPONENTS = ['parser', 'lemmatizer', 'tagger', 'morphologizer', 'attribute_ruler', 'senter']
+
 # Import OpenAI parser si disponible
 try:
     from services.openai_cv_parser import OpenAICVParser
@@ -26,6 +75,8 @@ class CVParser:
     def __init__(self):
         self.skills_keywords = self._load_skills_keywords()
         self.openai_parser = None
+        self.cache = ParseCache()
+        self.enrichment_jobs = ParseJobStore()
         
         # Initialiser OpenAI parser si disponible
         if OPENAI_AVAILABLE:
@@ -36,31 +87,262 @@ class CVParser:
                 logger.warning(f'OpenAI parser initialization failed: {str(e)}. Using fallback parser.')
                 self.openai_parser = None
         
-        # Initialiser Spacy
-        try:
-            import spacy
+        # Spacy: modèles chargés à la demande, une langue à la fois (voir _get_nlp)
+        self.spacy_available = importlib.util.find_spec('spacy') is not None
+        if not self.spacy_available:
+            logger.warning('Spacy not installed. Using regex extraction only.')
+        self._nlp_models: Dict[str, object] = {}
+        self._nlp_lock = threading.Lock()
+        
+        self._extraction_pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        
+        for lang in filter(None, os.getenv('SPACY_PRELOAD', '').split(',')):
+            self._get_nlp(lang.strip())
+
+    def _get_nlp(self, lang: str):
+        """
+        Charge (une seule fois) le pipeline Spacy d'une langue
+        Seul le NER est conservé: _extract_with_spacy ne lit que doc.ents
+        """
+        if not self.spacy_available or lang not in SPACY_MODELS:
+            return None
+        
+        if lang in self._nlp_models:
+            return self._nlp_models[lang]
+        
+        with self._nlp_lock:
+            if lang in self._nlp_models:
+                return self._nlp_models[lang]
+            
+            model_name = SPACY_MODELS[lang]
+            nlp = None
             try:
-                self.nlp_fr = spacy.load("fr_core_news_sm")
-                self.nlp_en = spacy.load("en_core_web_sm")
-                self.spacy_available = True
-                logger.info('Spacy models loaded successfully')
-            except OSError:
-                logger.warning('Spacy models not found. Downloading...')
-                from spacy.cli import download
-                download("fr_core_news_sm")
-                download("en_core_web_sm")
-                self.nlp_fr = spacy.load("fr_core_news_sm")
-                self.nlp_en = spacy.load("en_core_web_sm")
-                self.spacy_available = True
-        except Exception as e:
-            logger.warning(f'Spacy initialization failed: {str(e)}')
-            self.spacy_available = False
+                import spacy
+                try:
+                    nlp = spacy.load(model_name, exclude=SPACY_EXCLUDED_COMPONENTS)
+                except OSError:
+                    logger.warning(f'Spacy model {model_name} not found. Downloading...')
+                    from spacy.cli import download
+                    download(model_name)
+                    nlp = spacy.load(model_name, exclude=SPACY_EXCLUDED_COMPONENTS)
+                logger.info(f'Spacy model {model_name} loaded (pipeline: {nlp.pipe_names})')
+            except Exception as e:
+                logger.warning(f'Spacy initialization failed for {model_name}: {str(e)}')
+            
+            # None est mémorisé aussi pour ne pas retenter le chargement à chaque CV
+            self._nlp_models[lang] = nlp
+            return nlp
 
     def parse(self, file_path: str) -> Dict:
         """
         Parse un fichier CV et retourne les données structurées
+        Les résultats sont mis en cache par contenu de fichier (voir ParseCache)
+        """
+        file_path = self._resolve_path(file_path)
+        
+        try:
+            return self._parse_source(*self._load_file(file_path))
+        except Exception as e:
+            logger.error(f'Error parsing CV: {str(e)}', exc_info=True)
+            raise
+    
+    def parse_bytes(self, file_bytes: bytes, file_name: str) -> Dict:
+        """
+        Parse un CV reçu en mémoire (upload multipart ou corps brut), sans passer par le disque
+        `file_name` ne sert qu'à déterminer le format
+        """
+        try:
+            return self._parse_source(*self._load_bytes(file_bytes, file_name))
+        except Exception as e:
+            logger.error(f'Error parsing CV: {str(e)}', exc_info=True)
+            raise
+    
+    def _parse_source(self, source: Union[str, bytes], file_bytes: bytes, file_ext: str, name: str) -> Dict:
+        """Parsing avec cache, à partir d'un chemin ou du contenu en mémoire"""
+        key = self.cache.make_key(file_bytes, PARSER_VERSION, self._preferred_mode())
+        cached = self.cache.get(key)
+        if cached is not None:
+            logger.info(f'CV parse cache hit for {name}')
+            return cached
+        
+        # Un seul parsing à la fois pour un même fichier (ex: retry du backend après timeout)
+        with self.cache.lock(key):
+            cached = self.cache.get(key)
+            if cached is not None:
+                logger.info(f'CV parse cache hit for {name}')
+                return cached
+            
+            text, extraction = self._extract_text(source, file_ext)
+            self._record_extraction(name, extraction)
+            parsed_data, mode = self._parse_text(text)
+            parsed_data['extraction'] = extraction
+            
+            self.cache.set(self.cache.make_key(file_bytes, PARSER_VERSION, mode), parsed_data)
+            return parsed_data
+    
+    def parse_fast(
+        self,
+        file_path: Optional[str] = None,
+        file_bytes: Optional[bytes] = None,
+        file_name: Optional[str] = None
+    ) -> Tuple[Dict, Optional[str]]:
+        """
+        Parsing en deux temps: retourne tout de suite le résultat Spacy/Regex,
+        l'enrichissement OpenAI est lancé en arrière-plan (voir ParseJobStore)
+        Accepte un chemin, ou le contenu en mémoire avec son nom de fichier
+        
+        Returns:
+            (données parsées, id de la tâche d'enrichissement ou None si rien à enrichir)
+        """
+        try:
+            if file_bytes is not None:
+                source, file_bytes, file_ext, name = self._load_bytes(file_bytes, file_name)
+            else:
+                source, file_bytes, file_ext, name = self._load_file(self._resolve_path(file_path))
+            
+            # Résultat final déjà connu: pas besoin d'enrichissement
+            openai_key = self.cache.make_key(file_bytes, PARSER_VERSION, 'openai')
+            cached = self.cache.get(openai_key) if self.openai_parser else None
+            if cached is not None:
+                logger.info(f'CV parse cache hit for {name}')
+                return cached, None
+            
+            fallback_key = self.cache.make_key(file_bytes, PARSER_VERSION, 'fallback')
+            parsed_data = self.cache.get(fallback_key)
+            if parsed_data is None:
+                text, extraction = self._extract_text(source, file_ext)
+                self._record_extraction(name, extraction)
+                parsed_data, _ = self._parse_text(text, use_openai=False)
+                parsed_data['extraction'] = extraction
+                self.cache.set(fallback_key, parsed_data)
+            
+            if not self.openai_parser:
+                return parsed_data, None
+            
+            def enrich() -> Dict:
+                with self.cache.lock(openai_key):
+                    enriched = self.cache.get(openai_key)
+                    if enriched is None:
+                        enriched = self.openai_parser.parse_from_text(parsed_data['raw_text'])
+                        enriched['extraction'] = parsed_data.get('extraction')
+                        self.cache.set(openai_key, enriched)
+                    return enriched
+            
+            job_id = self.enrichment_jobs.submit(openai_key, enrich, {'file_name': name})
+            return parsed_data, job_id
+        except Exception as e:
+            logger.error(f'Error parsing CV: {str(e)}', exc_info=True)
+            raise
+    
+    def extract_text_from_bytes(self, file_bytes: bytes, file_name: str) -> str:
+        """
+        Texte brut d'un CV en mémoire (sans analyse), ex: pour l'optimisation OpenAI
+        """
+        source, _, file_ext, name = self._load_bytes(file_bytes, file_name)
+        text, extraction = self._extract_text(source, file_ext)
+        self._record_extraction(name, extraction)
+        return text
+    
+    def parse_many(self, file_paths: List[str], batch_size: int = 16) -> Iterator[Dict]:
+        """
+        Parse plusieurs CVs et retourne les résultats au fur et à mesure
+        
+        L'extraction PDF/DOCX (CPU, sous le GIL) est répartie dans un pool de processus.
+        Les textes extraits disponibles en même temps passent par Spacy en batch (nlp.pipe).
+        
+        Yields:
+            {'file_path', 'success', 'parsed_data' | 'error', 'cached'} dans l'ordre de complétion
+        """
+        preferred_mode = self._preferred_mode()
+        pending = {}
+        
+        for file_path in file_paths:
+            try:
+                resolved_path = self._resolve_path(file_path)
+                file_ext = os.path.splitext(resolved_path)[1].lower()
+                if file_ext not in SUPPORTED_EXTENSIONS:
+                    raise ValueError(f'Unsupported file format: {file_ext}')
+                
+                with open(resolved_path, 'rb') as f:
+                    file_bytes = f.read()
+                
+                cached = self.cache.get(self.cache.make_key(file_bytes, PARSER_VERSION, preferred_mode))
+                if cached is not None:
+                    yield {'file_path': file_path, 'success': True, 'parsed_data': cached, 'cached': True}
+                    continue
+                
+                # Le contenu déjà lu (clé de cache) est passé au worker, qui ne relit pas le fichier
+                future = self._get_extraction_pool().submit(_extract_text_job, file_bytes, file_ext)
+                pending[future] = (file_path, file_bytes)
+            except Exception as e:
+                yield self._batch_error(file_path, e)
+        
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            
+            texts = {}
+            for future in done:
+                file_path, file_bytes = pending.pop(future)
+                try:
+                    text, extraction = future.result()
+                    self._record_extraction(os.path.basename(file_path), extraction)
+                    texts[future] = (file_path, file_bytes, text, extraction)
+                except Exception as e:
+                    yield self._batch_error(file_path, e)
+            
+            docs = {}
+            if preferred_mode == 'fallback':
+                docs = self._pipe_spacy({future: entry[2] for future, entry in texts.items()}, batch_size)
+            
+            for future, (file_path, file_bytes, text, extraction) in texts.items():
+                try:
+                    parsed_data, mode = self._parse_text(text, docs.get(future))
+                    parsed_data['extraction'] = extraction
+                    self.cache.set(self.cache.make_key(file_bytes, PARSER_VERSION, mode), parsed_data)
+                    yield {'file_path': file_path, 'success': True, 'parsed_data': parsed_data, 'cached': False}
+                except Exception as e:
+                    yield self._batch_error(file_path, e)
+    
+    def _pipe_spacy(self, texts: Dict, batch_size: int) -> Dict:
+        """
+        Passe les textes dans Spacy par langue avec nlp.pipe
+        Retourne {clé: Doc}
+        """
+        by_language: Dict[str, List] = {}
+        for key, text in texts.items():
+            by_language.setdefault(self._detect_language(text), []).append(key)
+        
+        docs = {}
+        for lang, keys in by_language.items():
+            nlp = self._get_nlp(lang)
+            if not nlp:
+                continue
+            batch = (texts[key][:SPACY_MAX_CHARS] for key in keys)
+            for key, doc in zip(keys, nlp.pipe(batch, batch_size=batch_size)):
+                docs[key] = doc
+        return docs
+    
+    def _get_extraction_pool(self) -> ProcessPoolExecutor:
+        """
+        Pool de processus partagé pour l'extraction de texte (créé à la première utilisation)
+        """
+        with self._pool_lock:
+            if self._extraction_pool is None:
+                max_workers = int(os.getenv('CV_PARSE_WORKERS', '0')) or os.cpu_count() or 1
+                self._extraction_pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=process_pool_context())
+                logger.info(f'CV extraction pool started with {max_workers} workers')
+            return self._extraction_pool
+    
+    @staticmethod
+    def _batch_error(file_path: str, error: Exception) -> Dict:
+        logger.warning(f'Batch parsing failed for {file_path}: {str(error)}')
+        return {'file_path': file_path, 'success': False, 'error': str(error), 'error_type': type(error).__name__}
+    
+    def _resolve_path(self, file_path: str) -> str:
+        """
+        Convertit en chemin absolu et vérifie l'existence du fichier
         """
-        # Convertir en chemin absolu si nécessaire
         if not os.path.isabs(file_path):
             # Si c'est un chemin relatif, essayer depuis le répertoire backend/uploads
             possible_paths = [
@@ -68,75 +350,155 @@ class CVParser:
                 os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'backend', 'uploads', os.path.basename(file_path)),
                 os.path.join(os.getcwd(), file_path),
             ]
-            file_path = None
             for path in possible_paths:
                 if os.path.exists(path):
-                    file_path = os.path.abspath(path)
-                    break
+                    return os.path.abspath(path)
             
-            if not file_path or not os.path.exists(file_path):
-                raise FileNotFoundError(f'CV file not found. Tried: {possible_paths}')
-        else:
-            if not os.path.exists(file_path):
-                raise FileNotFoundError(f'CV file not found: {file_path}')
+            raise FileNotFoundError(f'CV file not found. Tried: {possible_paths}')
         
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f'CV file not found: {file_path}')
+        return file_path
+    
+    @staticmethod
+    def _load_file(file_path: str) -> Tuple[str, bytes, str, str]:
+        """
+        Lit un CV sur disque
+        
+        Returns:
+            (source pour l'extraction, contenu, extension, nom pour les logs)
+        """
         file_ext = os.path.splitext(file_path)[1].lower()
+        if file_ext not in SUPPORTED_EXTENSIONS:
+            raise ValueError(f'Unsupported file format: {file_ext}')
         
-        try:
-            if file_ext == '.pdf':
-                text = self._extract_from_pdf(file_path)
-            elif file_ext in ['.doc', '.docx']:
-                text = self._extract_from_docx(file_path)
-            else:
-                raise ValueError(f'Unsupported file format: {file_ext}')
-            
-            # Vérifier que du texte a été extrait
-            if not text or len(text.strip()) < 10:
-                raise ValueError('No text could be extracted from the CV file. The file might be corrupted or image-based.')
-            
-            # Utiliser OpenAI si disponible
-            if self.openai_parser:
-                try:
-                    logger.info('Using OpenAI to parse CV')
-                    parsed_data = self.openai_parser.parse_from_text(text)
-                    logger.info('CV parsed successfully with OpenAI')
-                    return parsed_data
-                except Exception as e:
-                    logger.warning(f'OpenAI parsing failed: {str(e)}. Falling back to Spacy/Regex.')
-            
-            # Fallback: Spacy + Regex
-            logger.info('Using Spacy/Regex extraction for CV parsing')
-            
-            # Déterminer la langue (simplifié)
-            is_french = 'français' in text.lower() or 'expérience' in text.lower()
-            nlp = self.nlp_fr if self.spacy_available and is_french else (self.nlp_en if self.spacy_available else None)
-            
-            spacy_data = {}
-            if nlp:
-                spacy_data = self._extract_with_spacy(text, nlp)
-            
-            # Combiner Spacy et Regex (Regex remplit les trous)
-            parsed_data = {
-                'raw_text': text,
-                'personal_info': {**self._extract_personal_info(text), **spacy_data.get('personal_info', {})},
-                'skills': list(set(self._extract_skills(text) + spacy_data.get('skills', []))),
-                'experience': spacy_data.get('experience') or self._extract_experience(text),
-                'education': spacy_data.get('education') or self._extract_education(text),
-                'languages': self._extract_languages(text),
-                'certifications': self._extract_certifications(text),
-                'projects': self._extract_projects(text),
-                'summary': self._extract_summary(text),
+        with open(file_path, 'rb') as f:
+            file_bytes = f.read()
+        return file_path, file_bytes, file_ext, os.path.basename(file_path)
+    
+    @staticmethod
+    def _load_bytes(file_bytes: bytes, file_name: Optional[str]) -> Tuple[bytes, bytes, str, str]:
+        """
+        Valide un CV reçu en mémoire (format d'après le nom, taille maximale)
+        
+        Returns:
+            (source pour l'extraction, contenu, extension, nom pour les logs)
+        """
+        file_name = os.path.basename(file_name or '')
+        file_ext = os.path.splitext(file_name)[1].lower()
+        if file_ext not in SUPPORTED_EXTENSIONS:
+            raise ValueError(f'Unsupported file format: {file_ext or file_name or "unknown"}')
+        if not file_bytes:
+            raise ValueError('CV file is empty')
+        if len(file_bytes) > MAX_CV_BYTES:
+            raise ValueError(f'CV file too large: {len(file_bytes)} bytes (max {MAX_CV_BYTES})')
+        return file_bytes, file_bytes, file_ext, file_name
+    
+    def _preferred_mode(self) -> str:
+        """Mode de parsing tenté en premier (fait partie de la clé de cache)"""
+        return 'openai' if self.openai_parser else 'fallback'
+    
+    @staticmethod
+    def _extract_text(source: Union[str, bytes], file_ext: str, parallel: bool = True) -> Tuple[str, Dict]:
+        """
+        Extrait le texte brut du fichier (chemin ou contenu en mémoire) selon son format
+        Sans état: peut s'exécuter dans un processus du pool d'extraction
+        (avec parallel=False: les pages PDF sont alors traitées dans ce processus)
+        
+        Returns:
+            (texte, métadonnées d'extraction)
+        """
+        if file_ext == '.pdf':
+            result = CVParser._extract_from_pdf(source, parallel=parallel)
+            text = result['text']
+            extraction = {
+                'format': 'pdf',
+                'page_count': result['page_count'],
+                'pages': result['pages'],
+                'dropped_pages': result['dropped_pages'],
             }
-            
-            return parsed_data
-        except Exception as e:
-            logger.error(f'Error parsing CV: {str(e)}', exc_info=True)
-            raise
-
-    def _extract_with_spacy(self, text: str, nlp) -> Dict:
-        """Extrait les informations avec Spacy NER"""
-        doc = nlp(text[:100000]) # Limite de taille pour Spacy
+        elif file_ext in ['.doc', '.docx']:
+            text = CVParser._extract_from_docx(source)
+            extraction = {'format': 'docx'}
+        else:
+            raise ValueError(f'Unsupported file format: {file_ext}')
+        
+        # Vérifier que du texte a été extrait
+        if not text or len(text.strip()) < 10:
+            raise ValueError('No text could be extracted from the CV file. The file might be corrupted or image-based.')
+        
+        return text, extraction
+    
+    @staticmethod
+    def _record_extraction(name: str, extraction: Dict) -> None:
+        """Journalise et comptabilise le niveau d'extraction de chaque page"""
+        pages = extraction.get('pages')
+        if not pages:
+            return
+        record_tier_stats(pages)
+        tiers = Counter(page['tier'] for page in pages)
+        logger.info(f'PDF {name} extracted: {dict(tiers)}')
+    
+    def _parse_text(self, text: str, doc=None, use_openai: bool = True) -> Tuple[Dict, str]:
+        """
+        Extrait les informations structurées du texte
+        `doc` permet de fournir un Doc Spacy déjà calculé (ex: via nlp.pipe en batch)
+        `use_openai=False` force l'extraction locale (parsing rapide, voir parse_fast)
+        
+        Returns:
+            (données parsées, mode réellement utilisé: 'openai' ou 'fallback')
+        """
+        # Utiliser OpenAI si disponible
+        if self.openai_parser and use_openai:
+            try:
+                logger.info('Using OpenAI to parse CV')
+                parsed_data = self.openai_parser.parse_from_text(text)
+                logger.info('CV parsed successfully with OpenAI')
+                return parsed_data, 'openai'
+            except Exception as e:
+                logger.warning(f'OpenAI parsing failed: {str(e)}. Falling back to Spacy/Regex.')
+        
+        # Fallback: Spacy + Regex
+        logger.info('Using Spacy/Regex extraction for CV parsing')
+        
+        if doc is None:
+            nlp = self._get_nlp(self._detect_language(text))
+            if nlp:
+                doc = nlp(text[:SPACY_MAX_CHARS])
+        
+        spacy_data = {}
+        if doc is not None:
+            spacy_data = self._extract_with_spacy(doc)
         
+        # Découpage en sections (une passe), chaque extracteur ne lit que sa section
+        sections = segment_cv(text)
+        
+        # Combiner Spacy et Regex (Regex remplit les trous)
+        parsed_data = {
+            'raw_text': text,
+            'personal_info': {**self._extract_personal_info(text), **spacy_data.get('personal_info', {})},
+            'skills': list(set(self._extract_skills(text, sections) + spacy_data.get('skills', []))),
+            'experience': spacy_data.get('experience') or self._extract_experience(
+                self._section_text(sections, text, 'experience')
+            ),
+            'education': spacy_data.get('education') or self._extract_education(text, sections.get('education')),
+            'languages': self._extract_languages(self._section_text(sections, text, 'languages')),
+            'certifications': self._extract_certifications(text, sections.get('certifications')),
+            'projects': self._extract_projects(sections.get('projects')),
+            'summary': self._extract_summary(sections.get('profile')),
+        }
+        
+        return parsed_data, 'fallback'
+    
+    @staticmethod
+    def _detect_language(text: str) -> str:
+        """Détermine la langue (simplifié)"""
+        text_lower = text.lower()
+        is_french = 'français' in text_lower or 'expérience' in text_lower
+        return 'fr' if is_french else 'en'
+
+    def _extract_with_spacy(self, doc) -> Dict:
+        """Extrait les informations d'un Doc Spacy (NER)"""
         data = {
             'personal_info': {},
             'skills': [],
@@ -162,65 +524,35 @@ class CVParser:
         
         return data
     
-    def _extract_from_pdf(self, file_path: str) -> str:
-        """Extrait le texte d'un PDF avec pdfplumber (plus robuste)"""
-        text = ''
+    @staticmethod
+    def _extract_from_pdf(source: Union[str, bytes], parallel: bool = True) -> Dict:
+        """
+        Extrait le texte d'un PDF: couche texte PyPDF2 d'abord, pdfplumber
+        seulement pour les pages vides ou illisibles (voir pdf_extractor)
+        Pages extraites en parallèle avec budget de temps et nombre de pages maximum
+        
+        Returns:
+            {'text', 'page_count', 'pages': [{'page', 'tier', 'reason'}], 'dropped_pages'}
+        """
         try:
-            import pdfplumber
+            result = extract_pdf_text(source, parallel=parallel)
             
-            with pdfplumber.open(file_path) as pdf:
-                # Vérifier que le PDF n'est pas vide
-                if len(pdf.pages) == 0:
-                    raise ValueError('PDF file is empty or corrupted')
-                
-                for page_num, page in enumerate(pdf.pages):
-                    try:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text += page_text + '\n'
-                        else:
-                            # Essayer d'extraire les tableaux si pas de texte brut
-                            tables = page.extract_tables()
-                            for table in tables:
-                                for row in table:
-                                    # Filtrer les None et joindre
-                                    row_text = ' | '.join([str(cell) for cell in row if cell])
-                                    text += row_text + '\n'
-                                    
-                            if not page_text and not tables:
-                                logger.warning(f'No text extracted from page {page_num + 1}')
-                    except Exception as page_error:
-                        logger.warning(f'Error extracting text from page {page_num + 1}: {str(page_error)}')
-                        continue
-                
-                if not text.strip():
-                    raise ValueError('No text could be extracted from PDF. The PDF might be image-based or encrypted.')
-                    
+            if not result['text'].strip():
+                raise ValueError('No text could be extracted from PDF. The PDF might be image-based or encrypted.')
+            
+            return result
         except ImportError:
-            logger.error("pdfplumber not installed. Please run 'pip install pdfplumber'")
             raise
         except Exception as e:
             logger.error(f'Error extracting PDF text: {str(e)}')
             raise ValueError(f'Failed to extract text from PDF: {str(e)}')
-        return text
     
-    def _extract_from_docx(self, file_path: str) -> str:
-        """Extrait le texte d'un document Word"""
+    @staticmethod
+    def _extract_from_docx(source: Union[str, bytes]) -> str:
+        """Extrait le texte d'un document Word (chemin ou contenu en mémoire)"""
         try:
-            doc = Document(file_path)
-            paragraphs = []
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    paragraphs.append(paragraph.text)
-            
-            # Extraire aussi les tableaux
-            for table in doc.tables:
-                for row in table.rows:
-                    row_text = ' | '.join([cell.text.strip() for cell in row.cells if cell.text.strip()])
-                    if row_text:
-                        paragraphs.append(row_text)
-            
-            text = '\n'.join(paragraphs)
+            # Lecture en flux de word/document.xml (paragraphes et tableaux dans l'ordre)
+            text = extract_docx_text(io.BytesIO(source) if isinstance(source, bytes) else source)
             
             if not text.strip():
                 raise ValueError('No text could be extracted from DOCX file')
@@ -230,29 +562,38 @@ class CVParser:
             logger.error(f'Error extracting DOCX text: {str(e)}')
             raise ValueError(f'Failed to extract text from DOCX: {str(e)}')
     
+    @staticmethod
+    def _section_text(sections: Dict[str, str], text: str, *names: str) -> str:
+        """
+        Texte des sections demandées, ou le texte complet si le CV n'a aucun titre reconnu
+        ou si aucune de ces sections n'est présente
+        """
+        found = [sections[name] for name in names if name in sections]
+        if not found or set(sections) == {HEADER}:
+            return text
+        return '\n'.join(found)
+    
     def _extract_personal_info(self, text: str) -> Dict:
         """Extrait les informations personnelles"""
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        phone_pattern = r'(\+33|0)[1-9](\d{2}){4}'
-        
-        emails = re.findall(email_pattern, text)
-        phones = re.findall(phone_pattern, text)
+        email = EMAIL_PATTERN.search(text)
+        phone = PHONE_PATTERN.search(text)
         
         # Tentative d'extraction du nom (très basique: première ligne ou lignes avec mots clés)
         # C'est difficile sans NLP, donc on laisse souvent vide ou on prend le début
         
         return {
             'full_name': None, # Difficile à extraire avec regex fiable
-            'email': emails[0] if emails else None,
-            'phone': phones[0] if phones else None,
+            'email': email.group(0) if email else None,
+            'phone': phone.group(0) if phone else None,
             'location': None,
             'linkedin': None,
             'website': None
         }
     
-    def _extract_skills(self, text: str) -> List[str]:
+    def _extract_skills(self, text: str, sections: Dict[str, str]) -> List[str]:
         """Extrait les compétences techniques"""
-        text_lower = text.lower()
+        # Les technologies citées dans les expériences et projets comptent aussi
+        text_lower = self._section_text(sections, text, 'skills', 'experience', 'projects').lower()
         found_skills = []
         
         # Recherche de compétences communes
@@ -261,14 +602,13 @@ class CVParser:
                 if skill.lower() in text_lower:
                     found_skills.append(skill)
         
-        # Recherche de sections "Compétences" ou "Skills"
-        skills_section_pattern = r'(?:compétences?|skills?|technologies?)[\s:]*\n(.*?)(?:\n\n|\n[A-Z])'
-        match = re.search(skills_section_pattern, text, re.IGNORECASE | re.DOTALL)
-        if match:
-            skills_text = match.group(1)
-            # Extraire les compétences de cette section
-            skills_list = [s.strip() for s in re.split(r'[,;•\-\n]', skills_text) if s.strip()]
-            found_skills.extend(skills_list)
+        # Section "Compétences" / "Skills"
+        skills_text = sections.get('skills')
+        if skills_text:
+            for line in skills_text.split('\n'):
+                # "Langages: Python, Java" -> ne garder que la liste
+                line = SKILL_LABEL_PATTERN.sub('', line)
+                found_skills.extend(s.strip() for s in SKILL_SEPARATOR_PATTERN.split(line) if s.strip())
         
         return list(set(found_skills))  # Supprimer les doublons
     
@@ -276,53 +616,47 @@ class CVParser:
         """Extrait les expériences professionnelles"""
         experiences = []
         
-        # Pattern pour détecter les expériences
         # Format: Poste - Entreprise (Date - Date)
-        exp_pattern = r'([A-Z][^•\n]+?)\s*[-–]\s*([A-Z][^•\n]+?)\s*\(([^)]+)\)'
-        
-        matches = re.finditer(exp_pattern, text)
-        for match in matches:
+        for position, company, dates in find_role_dates(text):
             experiences.append({
-                'position': match.group(1).strip(),
-                'company': match.group(2).strip(),
-                'start_date': match.group(3).split('-')[0].strip() if '-' in match.group(3) else match.group(3).strip(),
-                'end_date': match.group(3).split('-')[1].strip() if '-' in match.group(3) else None,
+                'position': position,
+                'company': company,
+                'start_date': dates.split('-')[0].strip() if '-' in dates else dates.strip(),
+                'end_date': dates.split('-')[1].strip() if '-' in dates else None,
                 'description': None,
                 'location': None
             })
         
         return experiences
     
-    def _extract_education(self, text: str) -> List[Dict]:
-        """Extrait les formations"""
+    def _extract_education(self, text: str, section: Optional[str] = None) -> List[Dict]:
+        """
+        Extrait les formations
+        `section` est le texte de la section Formation; sans section, on cherche à partir
+        de la première ligne contenant un mot-clé de formation
+        """
         education = []
         
-        # Mots-clés pour identifier les sections éducation
-        education_keywords = ['diplôme', 'formation', 'éducation', 'education', 'degree', 'university', 'école', 'school']
-        
-        # Pattern pour détecter les formations
-        edu_pattern = r'([A-Z][^•\n]+?)\s*[-–]\s*([A-Z][^•\n]+?)\s*\(([^)]+)\)'
-        
-        # Rechercher dans les sections pertinentes
-        lines = text.split('\n')
-        in_education_section = False
+        if section is not None:
+            lines = section.split('\n')
+        else:
+            lines = text.split('\n')
+            start = next(
+                (i + 1 for i, line in enumerate(lines) if EDUCATION_KEYWORDS_PATTERN.search(line)),
+                len(lines)
+            )
+            lines = lines[start:]
         
-        for i, line in enumerate(lines):
-            if any(keyword in line.lower() for keyword in education_keywords):
-                in_education_section = True
-                continue
-            
-            if in_education_section:
-                match = re.search(edu_pattern, line)
-                if match:
-                    education.append({
-                        'degree': match.group(1).strip(),
-                        'institution': match.group(2).strip(),
-                        'start_date': match.group(3).split('-')[0].strip() if '-' in match.group(3) else match.group(3).strip(),
-                        'end_date': match.group(3).split('-')[1].strip() if '-' in match.group(3) else None,
-                        'field_of_study': None,
-                        'location': None
-                    })
+        for line in lines:
+            for degree, institution, dates in find_role_dates(line):
+                education.append({
+                    'degree': degree,
+                    'institution': institution,
+                    'start_date': dates.split('-')[0].strip() if '-' in dates else dates.strip(),
+                    'end_date': dates.split('-')[1].strip() if '-' in dates else None,
+                    'field_of_study': None,
+                    'location': None
+                })
         
         return education
     
@@ -342,33 +676,24 @@ class CVParser:
         
         return languages
     
-    def _extract_certifications(self, text: str) -> List[Dict]:
-        """Extrait les certifications"""
-        certifications = []
-        
-        cert_keywords = ['certification', 'certificat', 'certified', 'certificate']
-        cert_pattern = r'(?:certification|certificat|certified|certificate)[\s:]*([A-Z][^•\n]+)'
-        
-        matches = re.finditer(cert_pattern, text, re.IGNORECASE)
-        for match in matches:
-            certifications.append({
-                'name': match.group(1).strip(),
-                'issuer': None,
-                'date': None
-            })
+    def _extract_certifications(self, text: str, section: Optional[str] = None) -> List[Dict]:
+        """Extrait les certifications (une par ligne de la section, sinon par mot-clé)"""
+        if section is not None:
+            names = [BULLET_PATTERN.sub('', line).strip() for line in section.split('\n')]
+        else:
+            names = [match.group(1).strip() for match in CERTIFICATION_PATTERN.finditer(text)]
         
-        return certifications
+        return [
+            {'name': name, 'issuer': None, 'date': None}
+            for name in names if name
+        ]
 
-    def _extract_projects(self, text: str) -> List[Dict]:
-        """Extrait les projets (Regex fallback)"""
+    def _extract_projects(self, section: Optional[str]) -> List[Dict]:
+        """Extrait les projets de la section Projets (Regex fallback)"""
         projects = []
-        # Recherche basique de section Projets
-        project_section_pattern = r'(?:projets?|projects?)[\s:]*\n(.*?)(?:\n\n|\n[A-Z])'
-        match = re.search(project_section_pattern, text, re.IGNORECASE | re.DOTALL)
-        if match:
-            project_text = match.group(1)
+        if section:
             # Essayer de séparer par lignes ou puces
-            items = [p.strip() for p in re.split(r'[\n•-]', project_text) if p.strip()]
+            items = [p.strip() for p in PROJECT_SEPARATOR_PATTERN.split(section) if p.strip()]
             for item in items:
                 projects.append({
                     'name': item,
@@ -378,14 +703,11 @@ class CVParser:
                 })
         return projects
 
-    def _extract_summary(self, text: str) -> Optional[str]:
-        """Extrait le résumé professionnel (Regex fallback)"""
-        # Prend souvent le premier paragraphe significatif ou section "Profil"
-        summary_pattern = r'(?:profil|profile|summary|résumé|objectif)[\s:]*\n(.*?)(?:\n\n|\n[A-Z])'
-        match = re.search(summary_pattern, text, re.IGNORECASE | re.DOTALL)
-        if match:
-            return match.group(1).strip()
-        return None
+    def _extract_summary(self, section: Optional[str]) -> Optional[str]:
+        """Extrait le résumé professionnel: premier paragraphe de la section Profil"""
+        if not section or not section.strip():
+            return None
+        return section.strip().split('\n\n')[0].strip()
     
     def _load_skills_keywords(self) -> Dict[str, List[str]]:
         """Charge les mots-clés de compétences"""
@@ -411,3 +733,68 @@ class CVParser:
             ],
         }
 
+
+def find_role_dates(text: str) -> Iterator[Tuple[str, str, str]]:
+    """
+    Trouve les motifs "Poste - Entreprise (Dates)" en temps linéaire
+
+    Remplace r'([A-Z][^•\\n]+?)\\s*[-–]\\s*([A-Z][^•\\n]+?)\\s*\\(([^)]+)\\)' qui, sur une
+    longue ligne sans correspondance, essayait chaque majuscule x chaque tiret x chaque fin.
+    Ici chaque segment (ligne coupée sur '•') est parcouru une seule fois: on avance de
+    parenthèse en parenthèse en mémorisant la première majuscule et le premier tiret utiles.
+
+    Yields:
+        (poste, entreprise, dates)
+    """
+    for line in _join_wrapped_lines(text):
+        if '(' not in line:
+            continue
+        for segment in line.split('•'):
+            upper = dash = None
+            scanned = 0
+            for paren in PARENTHESES_PATTERN.finditer(segment):
+                end = paren.start()
+                if upper is None:
+                    match = UPPERCASE_PATTERN.search(segment, scanned, end)
+                    upper = match.start() if match else None
+                if upper is not None and dash is None:
+                    # Le poste fait au moins 2 caractères, comme dans l'ancien pattern
+                    dash = DASH_PATTERN.search(segment, max(scanned, upper + 2), end)
+                scanned = end
+                if dash is None:
+                    continue
+                
+                position = segment[upper:dash.start()].strip()
+                company = segment[dash.end():end].strip()
+                if position and company and end - dash.end() >= 2:
+                    yield position, company, paren.group(1)
+                    upper = dash = None
+                    scanned = paren.end()
+
+
+def _join_wrapped_lines(text: str) -> Iterator[str]:
+    """
+    Recolle les lignes coupées autour du tiret ou avant la parenthèse des dates
+    ("Poste -\\nEntreprise", "Entreprise\\n(2019 - 2021)"), que l'ancien pattern
+    acceptait grâce à \\s*
+    """
+    # Morceaux de la ligne en cours, joints une seule fois (pas de recopie par ligne)
+    parts: List[str] = []
+    ends_with_dash = False
+    for line in text.split('\n'):
+        if parts and (line.lstrip().startswith('(') or ends_with_dash):
+            parts.append(line)
+            if line.strip():
+                ends_with_dash = line.rstrip().endswith(('-', '–'))
+            continue
+        if parts:
+            yield ' '.join(parts)
+        parts = [line]
+        ends_with_dash = line.rstrip().endswith(('-', '–'))
+    if parts:
+        yield ' '.join(parts)
+
+
+def _extract_text_job(file_bytes: bytes, file_ext: str) -> Tuple[str, Dict]:
+    """Point d'entrée des processus du pool d'extraction (contenu du fichier en mémoire)"""
+    return CVParser._extract_text(file_bytes, file_ext, parallel=False)
@@ -0,0 +1,191 @@
+"""
+Découpage d'un CV en sections
+
+Une seule passe sur les lignes du texte: chaque ligne est testée contre une
+expression régulière précompilée qui reconnaît les titres de section
+(ex: "Compétences techniques", "EXPÉRIENCE PROFESSIONNELLE", "Langues : ...").
+Une ligne à puce ("- Projet de migration AWS") ou une phrase qui commence par un
+mot-clé ("Formation des nouveaux arrivants") n'est pas un titre.
+Les extracteurs du parser travaillent ensuite uniquement sur leur section.
+
+`split_sections` découpe aussi le texte en blocs réécrits un par un par le mode 'diff'
+de l'optimiseur OpenAI (`apply_section_edits`).
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+from services.prompt_compactor import normalize_line
+
+# Texte situé avant le premier titre (nom, coordonnées...)
+HEADER = 'header'
+
+SECTION_KEYWORDS: Dict[str, List[str]] = {
+    'profile': ['profil', 'profile', 'summary', 'résumé', 'objectif', 'objective', 'à propos', 'about me'],
+    'skills': ['compétences', 'compétence', 'competences', 'skills', 'skill', 'technologies', 'technologie',
+               'outils', 'tools', 'expertise'],
+    'experience': ['expériences', 'expérience', 'experiences', 'experience', 'parcours professionnel',
+                   'work history', 'employment'],
+    'education': ['formations', 'formation', 'éducation', 'education', 'diplômes', 'diplôme', 'études', 'cursus'],
+    'projects': ['projets', 'projet', 'projects', 'project', 'réalisations'],
+    'languages': ['langues', 'langue', 'languages', 'language'],
+    'certifications': ['certifications', 'certification', 'certificats', 'certificat', 'certificates',
+                       'certificate'],
+}
+
+SECTIONS = list(SECTION_KEYWORDS)
+
+# Identifiant de section renvoyé par le modèle: "S2", "[S2]" ou "2"
+SECTION_ID_PATTERN = re.compile(r'^\[?S?(\d+)\]?$', re.IGNORECASE)
+
+# Mots qui peuvent suivre le mot-clé dans un titre en casse normale
+# ("Expérience professionnelle", "Formation et certifications")
+HEADING_QUALIFIERS = {
+    'professionnelle', 'professionnelles', 'professionnel', 'professionnels', 'professional',
+    'technique', 'techniques', 'technical', 'clé', 'clés', 'key', 'principales', 'principaux', 'main',
+    'personnel', 'personnels', 'personnelle', 'personnelles', 'personal', 'académique', 'académiques',
+    'academic', 'linguistiques', 'informatiques', 'complémentaires', 'additional', 'récentes',
+    'pertinentes', 'relevant', 'parlées', 'spoken', 'et', 'and', '&', '/',
+} | {keyword for keywords in SECTION_KEYWORDS.values() for keyword in keywords if ' ' not in keyword}
+
+
+def _build_heading_pattern() -> re.Pattern:
+    """
+    Candidat titre = mot-clé de section en début de ligne + au plus 3 mots,
+    suivi éventuellement de ':' et d'un contenu sur la même ligne
+    (la forme des mots est vérifiée par `match_heading`)
+    """
+    groups = []
+    for name, keywords in SECTION_KEYWORDS.items():
+        # Les mots-clés les plus longs d'abord pour que l'alternance choisisse le plus spécifique
+        alternatives = '|'.join(re.escape(k) for k in sorted(keywords, key=len, reverse=True))
+        groups.append(f'(?P<{name}>{alternatives})')
+    return re.compile(
+        r'^[ \t]*(?P<title>(?:' + '|'.join(groups) + r')\b'
+        r'(?P<words>(?:[ \t]+[^\s:\d()]+){0,3}))[ \t]*'
+        r'(?::[ \t]*(?P<inline>.*))?$',
+        re.IGNORECASE
+    )
+
+
+HEADING_PATTERN = _build_heading_pattern()
+
+
+def match_heading(line: str) -> Optional[Tuple[str, str]]:
+    """
+    Retourne (section, contenu en ligne) si la ligne est un titre de section, sinon None
+
+    Titre: le mot-clé seul, le mot-clé suivi de qualificatifs (HEADING_QUALIFIERS),
+    ou une ligne en majuscules; avec ou sans ':' et contenu en ligne.
+    """
+    match = HEADING_PATTERN.match(line)
+    if not match:
+        return None
+
+    title = match.group('title')
+    words = match.group('words').split()
+    if words and not (title.isupper() or all(word.lower() in HEADING_QUALIFIERS for word in words)):
+        return None
+
+    for name in SECTIONS:
+        if match.group(name):
+            return name, match.group('inline') or ''
+    return None
+
+
+def segment_cv(text: str) -> Dict[str, str]:
+    """
+    Découpe le texte en sections étiquetées en une seule passe
+
+    Returns:
+        {'header': ..., 'skills': ..., ...}: seules les sections trouvées sont présentes.
+        Une section répétée dans le CV est concaténée.
+    """
+    sections: Dict[str, List[str]] = {HEADER: []}
+    current = sections[HEADER]
+
+    for line in text.split('\n'):
+        heading = match_heading(line)
+        if heading:
+            name, inline = heading
+            current = sections.setdefault(name, [])
+            if inline.strip():
+                current.append(inline)
+        else:
+            current.append(line)
+
+    return {name: '\n'.join(lines).strip('\n') for name, lines in sections.items()}
+
+
+def split_sections(text: str) -> List[Tuple[str, str]]:
+    """
+    Découpe le texte en blocs dans l'ordre du document, titre compris
+
+    Contrairement à `segment_cv`, les sections répétées restent des blocs distincts et
+    '\n'.join(blocs) redonne exactement le texte d'origine (utile pour le réécrire bloc par bloc).
+
+    Returns:
+        [(section, texte du bloc), ...], le premier bloc étant 'header' s'il n'est pas vide
+    """
+    blocks: List[Tuple[str, List[str]]] = [(HEADER, [])]
+
+    for line in text.split('\n'):
+        heading = match_heading(line)
+        if heading:
+            blocks.append((heading[0], [line]))
+        else:
+            blocks[-1][1].append(line)
+
+    if len(blocks) > 1 and not blocks[0][1]:
+        blocks.pop(0)
+    return [(name, '\n'.join(lines)) for name, lines in blocks]
+
+
+def apply_section_edits(blocks: List[str], edits: List[Dict]) -> Tuple[str, int, int]:
+    """
+    Applique les modifications du mode 'diff' aux sections du CV (dans l'ordre reçu)
+    Les modifications invalides (section inconnue, ligne introuvable) sont ignorées.
+    `replace_line` remplace la première ligne entière égale à `find` (aux blancs près),
+    jamais une portion de ligne.
+
+    Returns:
+        (texte reconstruit, modifications appliquées, modifications ignorées)
+    """
+    blocks = list(blocks)
+    applied = skipped = 0
+
+    for edit in edits:
+        if not isinstance(edit, dict):
+            skipped += 1
+            continue
+        section = SECTION_ID_PATTERN.match(str(edit.get('section', '')).strip())
+        text = edit.get('text')
+        action = edit.get('action', 'replace_section')
+        if not section or int(section.group(1)) >= len(blocks) or not isinstance(text, str):
+            skipped += 1
+            continue
+
+        index = int(section.group(1))
+        block = blocks[index]
+        if action == 'replace_section':
+            # Garder les lignes vides de fin qui séparent la section de la suivante
+            trailing = block[len(block.rstrip('\n')):]
+            blocks[index] = text.strip('\n') + trailing
+        elif action == 'append':
+            body = block.rstrip('\n')
+            blocks[index] = body + '\n' + text.strip('\n') + block[len(body):]
+        elif action == 'replace_line':
+            find = normalize_line(edit.get('find') or '')
+            lines = block.split('\n')
+            line_index = next((i for i, line in enumerate(lines) if find and normalize_line(line) == find), None)
+            if line_index is None:
+                skipped += 1
+                continue
+            line = lines[line_index]
+            lines[line_index] = line[:len(line) - len(line.lstrip())] + text.strip()
+            blocks[index] = '\n'.join(lines)
+        else:
+            skipped += 1
+            continue
+        applied += 1
+
+    return '\n'.join(blocks), applied, skipped
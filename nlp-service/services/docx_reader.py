@@ -0,0 +1,142 @@
+"""
+Lecture en flux du texte d'un DOCX
+
+Lit `word/document.xml` directement dans l'archive zip avec un parseur XML
+incrémental, sans construire le modèle objet python-docx. Les paragraphes et
+les lignes de tableaux sont produits dans l'ordre du document.
+Le DOM python-docx reste réservé au chemin d'écriture (modification du document).
+"""
+import zipfile
+import logging
+from typing import IO, Iterator, List, Tuple, Union
+from xml.etree.ElementTree import iterparse
+
+logger = logging.getLogger(__name__)
+
+W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+MC_NS = '{http://schemas.openxmlformats.org/markup-compatibility/2006}'
+
+BODY = W_NS + 'body'
+P = W_NS + 'p'
+R = W_NS + 'r'
+T = W_NS + 't'
+TAB = W_NS + 'tab'
+BR = W_NS + 'br'
+CR = W_NS + 'cr'
+TBL = W_NS + 'tbl'
+TR = W_NS + 'tr'
+TC = W_NS + 'tc'
+# Rendu de repli d'un contenu alternatif (zone de texte...): doublon du mc:Choice
+FALLBACK = MC_NS + 'Fallback'
+
+PARAGRAPH = 'paragraph'
+TABLE_ROW = 'table_row'
+
+
+def iter_docx_blocks(source: Union[str, IO[bytes]],
+                     body_paragraphs_only: bool = False) -> Iterator[Tuple[str, Union[str, List[str]]]]:
+    """
+    Parcourt le document et produit les blocs dans l'ordre:
+        ('paragraph', texte) ou ('table_row', [texte de chaque cellule])
+
+    Les tableaux imbriqués sont aplatis dans la cellule qui les contient.
+    Les paragraphes imbriqués (zones de texte) sont produits séparément, sauf avec
+    `body_paragraphs_only` qui ne garde que les paragraphes enfants directs du corps
+    (ceux de `Document.paragraphs` dans python-docx). Le rendu de repli des contenus
+    alternatifs (mc:Fallback) est ignoré pour ne pas produire deux fois une zone de texte.
+    """
+    with zipfile.ZipFile(source) as archive:
+        with archive.open('word/document.xml') as document:
+            paragraphs: List[List[str]] = []
+            cells: List[List[str]] = []
+            rows: List[List[str]] = []
+            # Balises ouvertes (le parent d'un élément est à l'avant-dernière position)
+            stack: List[str] = []
+            in_fallback = 0
+
+            for event, elem in iterparse(document, events=('start', 'end')):
+                tag = elem.tag
+
+                if event == 'start':
+                    stack.append(tag)
+                    if tag == FALLBACK:
+                        in_fallback += 1
+                    if in_fallback:
+                        continue
+                    if tag == P:
+                        paragraphs.append([])
+                    elif tag == TC:
+                        cells.append([])
+                    elif tag == TR:
+                        rows.append([])
+                    continue
+
+                parent = stack[-2] if len(stack) > 1 else None
+                stack.pop()
+                if in_fallback:
+                    if tag == FALLBACK:
+                        in_fallback -= 1
+                    continue
+
+                if tag == T:
+                    if paragraphs and elem.text:
+                        paragraphs[-1].append(elem.text)
+                elif tag == TAB:
+                    # w:tab d'un run = tabulation; sous w:pPr/w:tabs = définition de taquet
+                    if paragraphs and parent == R:
+                        paragraphs[-1].append('\t')
+                elif tag in (BR, CR):
+                    if paragraphs:
+                        paragraphs[-1].append('\n')
+                elif tag == P:
+                    text = ''.join(paragraphs.pop()) if paragraphs else ''
+                    if cells:
+                        cells[-1].append(text)
+                    elif not body_paragraphs_only or parent == BODY:
+                        yield PARAGRAPH, text
+                elif tag == TC:
+                    cell_text = '\n'.join(cells.pop())
+                    if rows:
+                        rows[-1].append(cell_text)
+                elif tag == TR:
+                    row = rows.pop()
+                    if rows and cells:
+                        # Tableau imbriqué: aplatir dans la cellule parente
+                        cells[-1].append(_format_row(row))
+                    else:
+                        yield TABLE_ROW, row
+
+                # Libérer les éléments déjà traités au niveau du corps du document
+                if tag in (P, TBL) and not cells and not paragraphs:
+                    elem.clear()
+
+
+def extract_docx_text(source: Union[str, IO[bytes]]) -> str:
+    """
+    Texte d'un DOCX: un paragraphe non vide par ligne, cellules d'une ligne de tableau
+    jointes par ' | '
+    """
+    lines = []
+    for kind, value in iter_docx_blocks(source):
+        if kind == PARAGRAPH:
+            if value.strip():
+                lines.append(value)
+        else:
+            row_text = _format_row(value)
+            if row_text:
+                lines.append(row_text)
+    return '\n'.join(lines)
+
+
+def iter_docx_paragraphs(source: Union[str, IO[bytes]]) -> Iterator[str]:
+    """
+    Textes des paragraphes du corps, dans l'ordre du document: un par élément de
+    `Document.paragraphs` de python-docx (hors tableaux et zones de texte)
+    """
+    for kind, value in iter_docx_blocks(source, body_paragraphs_only=True):
+        if kind == PARAGRAPH:
+            yield value
+
+
+def _format_row(cells: List[str]) -> str:
+    return ' | '.join(cell.strip() for cell in cells if cell.strip())
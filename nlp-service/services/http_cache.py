@@ -0,0 +1,177 @@
+"""
+Cache HTTP disque des pages de scraping
+
+Adaptateur `requests` monté sur la session partagée (voir http_session): les réponses
+200 des requêtes GET sont gardées sur disque (ParseCache: écriture atomique, éviction
+LRU au-delà de la taille maximale).
+
+- Réponse encore fraîche (durée de vie propre à l'hôte): servie depuis le disque,
+  sans requête réseau ni jeton du limiteur de l'hôte.
+- Réponse périmée: revalidée avec If-None-Match / If-Modified-Since; un 304 rafraîchit
+  l'entrée et renvoie le contenu gardé (pas de corps téléchargé).
+
+La durée de vie est celle configurée ici, indépendamment des en-têtes Cache-Control
+des sites (LinkedIn / Indeed interdisent le cache des pages de résultats).
+Les réponses servies par le cache portent `response.from_cache = True`.
+
+Les murs de connexion et pages de vérification (authwall, checkpoint, captcha) ne
+sont jamais gardés, même servis en 200; une page gardée dans laquelle le scraper ne
+trouve aucune offre est retirée du cache (`forget`).
+
+Configuration:
+    SCRAPER_CACHE_ENABLED     active le cache (true)
+    SCRAPER_CACHE_DIR         dossier du cache (./cache/http)
+    SCRAPER_CACHE_MAX_MB      taille maximale avant éviction LRU (200)
+    SCRAPER_CACHE_TTL         durée de fraîcheur par défaut en secondes (600)
+    SCRAPER_CACHE_HOST_TTLS   "www.linkedin.com=900,fr.indeed.com=300" (0 = toujours revalider)
+"""
+import os
+import re
+import time
+import base64
+import hashlib
+import logging
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from services.parse_cache import ParseCache
+from services.rate_limiter import get_host_limiter, parse_host_values
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = float(os.getenv('SCRAPER_CACHE_TTL', '600'))
+HOST_TTLS = parse_host_values(os.getenv('SCRAPER_CACHE_HOST_TTLS', ''), 'SCRAPER_CACHE_HOST_TTLS')
+
+# Chemins de blocage (mur de connexion, vérification anti-robot): jamais mis en cache
+BLOCKED_PATH_PATTERN = re.compile(r'/(?:authwall|checkpoint|login|signup|captcha|challenge)', re.IGNORECASE)
+
+# En-têtes non rejoués depuis le cache (le corps stocké est déjà décodé)
+_DROPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection', 'set-cookie'}
+
+_stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'stored': 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def get_cache_stats() -> Dict:
+    """
+    Compteurs du cache HTTP: réponses fraîches servies, revalidées (304), téléchargées
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    served = stats['hits'] + stats['revalidated']
+    total = served + stats['misses']
+    stats['hit_ratio'] = round(served / total, 3) if total else None
+    return stats
+
+
+def host_ttl(url: str) -> float:
+    """
+    Durée de fraîcheur (secondes) des réponses de l'hôte de `url`
+    """
+    host = (urlparse(url).hostname or '').lower()
+    return HOST_TTLS.get(host, DEFAULT_TTL)
+
+
+class CachingHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter avec cache disque et revalidation conditionnelle des GET
+    Le limiteur de l'hôte n'est consulté que pour les requêtes qui partent sur le réseau
+    """
+
+    def __init__(self, cache: Optional[ParseCache] = None, **kwargs):
+        super().__init__(**kwargs)
+        if cache is None:
+            cache = ParseCache(
+                cache_dir=os.getenv('SCRAPER_CACHE_DIR', './cache/http'),
+                max_size_mb=float(os.getenv('SCRAPER_CACHE_MAX_MB', '200')),
+                enabled=os.getenv('SCRAPER_CACHE_ENABLED', 'true').lower() == 'true',
+                label='HTTP cache'
+            )
+        self.cache = cache
+
+    def send(self, request, **kwargs):
+        if request.method != 'GET' or not self.cache.enabled:
+            get_host_limiter(request.url).acquire()
+            return super().send(request, **kwargs)
+
+        key = self._key(request.url)
+        entry = self.cache.get(key)
+
+        if entry and time.time() - entry.get('stored_at', 0) < host_ttl(request.url):
+            _count('hits')
+            return self._build_response(request, entry)
+
+        if entry:
+            if entry.get('etag'):
+                request.headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                request.headers['If-Modified-Since'] = entry['last_modified']
+
+        get_host_limiter(request.url).acquire()
+        response = super().send(request, **kwargs)
+
+        if entry and response.status_code == 304:
+            # Libérer la connexion (corps vide) puis rafraîchir l'entrée
+            response.content
+            entry['stored_at'] = time.time()
+            self.cache.set(key, entry)
+            _count('revalidated')
+            return self._build_response(request, entry)
+
+        _count('misses')
+        blocked = BLOCKED_PATH_PATTERN.search(urlparse(request.url).path)
+        if response.status_code == 200 and not kwargs.get('stream') and not blocked:
+            self._store(key, response)
+        return response
+
+    def forget(self, url: str) -> None:
+        """
+        Retire la réponse gardée pour `url` (page servie mais inexploitable: blocage, aucune offre)
+        """
+        self.cache.delete(self._key(url))
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _store(self, key: str, response: requests.Response) -> None:
+        """Enregistre une réponse 200 (corps complet) avec ses validateurs"""
+        headers = {
+            name: value for name, value in response.headers.items()
+            if name.lower() not in _DROPPED_HEADERS
+        }
+        self.cache.set(key, {
+            'status': response.status_code,
+            'url': response.url,
+            'headers': headers,
+            'body': base64.b64encode(response.content).decode('ascii'),
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'stored_at': time.time()
+        })
+        _count('stored')
+
+    @staticmethod
+    def _build_response(request, entry: Dict) -> requests.Response:
+        """Réponse `requests` reconstruite depuis une entrée du cache"""
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response._content = base64.b64decode(entry['body'])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = entry.get('url') or request.url
+        response.request = request
+        response.reason = 'OK'
+        response.from_cache = True
+        return response
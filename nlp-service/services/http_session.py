@@ -0,0 +1,137 @@
+"""
+Session HTTP partagée par le scraping
+
+Une seule `requests.Session` par processus, avec un pool de connexions keep-alive
+dimensionné pour les pages récupérées en parallèle: les synchronisations successives
+réutilisent les connexions TCP/TLS déjà ouvertes (pas de nouvelle résolution DNS ni
+de nouvelle négociation TLS). Les erreurs transitoires (429, 5xx, connexion) sont
+retentées avec un délai exponentiel, en respectant l'en-tête Retry-After; chaque
+nouvelle tentative prend aussi un jeton du limiteur de l'hôte.
+Les GET passent par le cache HTTP disque (voir http_cache) et, quand ils partent sur
+le réseau, par le limiteur de leur hôte (voir rate_limiter).
+
+Configuration:
+    SCRAPER_POOL_CONNECTIONS  nombre d'hôtes gardés en pool (10)
+    SCRAPER_POOL_MAXSIZE      connexions gardées par hôte (10)
+    SCRAPER_RETRIES           tentatives supplémentaires (3)
+    SCRAPER_RETRY_BACKOFF     facteur du délai exponentiel en secondes (0.5)
+"""
+import os
+import logging
+import threading
+from typing import Dict, Optional
+
+import requests
+from urllib3.util.retry import Retry
+
+from services.http_cache import CachingHTTPAdapter
+from services.rate_limiter import get_host_limiter
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+class RateLimitedRetry(Retry):
+    """
+    Retry urllib3 dont chaque nouvelle tentative passe par le limiteur de l'hôte
+    (les tentatives ont lieu dans l'adaptateur, après le jeton de la première requête)
+    """
+
+    limited_url: Optional[str] = None
+
+    def increment(self, *args, **kwargs) -> 'RateLimitedRetry':
+        retry = super().increment(*args, **kwargs)
+        pool = kwargs.get('_pool')
+        if pool is not None:
+            retry.limited_url = f'{pool.scheme}://{pool.host}'
+        return retry
+
+    def sleep(self, response=None) -> None:
+        super().sleep(response)
+        if self.limited_url:
+            get_host_limiter(self.limited_url).acquire()
+
+
+def _build_session() -> requests.Session:
+    retries = RateLimitedRetry(
+        total=int(os.getenv('SCRAPER_RETRIES', '3')),
+        backoff_factor=float(os.getenv('SCRAPER_RETRY_BACKOFF', '0.5')),
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        # Après les tentatives, rendre la dernière réponse: l'appelant gère le code HTTP
+        raise_on_status=False
+    )
+    adapter = CachingHTTPAdapter(
+        pool_connections=int(os.getenv('SCRAPER_POOL_CONNECTIONS', '10')),
+        pool_maxsize=int(os.getenv('SCRAPER_POOL_MAXSIZE', '10')),
+        max_retries=retries
+    )
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        'User-Agent': USER_AGENT,
+        'Connection': 'keep-alive'
+    })
+    return session
+
+
+def get_scraper_session() -> requests.Session:
+    """
+    Session partagée par tous les scrapers du processus (créée au premier appel)
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _build_session()
+            logger.info('Shared scraper HTTP session initialized')
+        return _session
+
+
+def get_connection_stats() -> Dict:
+    """
+    Réutilisation des connexions par hôte: requêtes envoyées vs connexions ouvertes
+    (compteurs des pools urllib3 actuellement gardés par la session)
+
+    Ces compteurs ne sont pas cumulatifs: quand le PoolManager évince le pool d'un hôte
+    (plus de SCRAPER_POOL_CONNECTIONS hôtes), ses compteurs repartent de zéro. Les
+    chiffres décrivent donc les pools en cours, pas toute la vie du processus.
+    """
+    with _session_lock:
+        session = _session
+    if session is None:
+        return {'hosts': {}, 'requests': 0, 'connections_opened': 0, 'connections_reused': 0, 'reuse_ratio': None}
+
+    hosts = {}
+    seen = set()
+    for adapter in session.adapters.values():
+        if id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            hosts[f'{pool.scheme}://{pool.host}'] = {
+                'requests': pool.num_requests,
+                'connections_opened': pool.num_connections,
+            }
+
+    total_requests = sum(host['requests'] for host in hosts.values())
+    total_connections = sum(host['connections_opened'] for host in hosts.values())
+    reused = max(0, total_requests - total_connections)
+    return {
+        'hosts': hosts,
+        'requests': total_requests,
+        'connections_opened': total_connections,
+        'connections_reused': reused,
+        'reuse_ratio': round(reused / total_requests, 3) if total_requests else None
+    }
@@ -0,0 +1,150 @@
+"""
+Extraction des cartes d'offres dans les pages de résultats LinkedIn / Indeed
+
+La page n'est pas construite en entier: un SoupStrainer ne garde que les sous-arbres
+des cartes d'offres (le reste, en-têtes, scripts, navigation, est ignoré pendant le
+parsing). Le parseur lxml est utilisé s'il est installé, html.parser sinon.
+
+Les champs d'une carte (titre, entreprise, lieu...) sont ensuite relevés en un seul
+parcours de ses éléments, au lieu d'un `find` par sélecteur.
+"""
+import re
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+logger = logging.getLogger(__name__)
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+    logger.warning('lxml not available. Job pages will be parsed with html.parser (slower).')
+
+# Sélecteur = (balise, classe CSS) ou (balise, '@attribut') pour "possède l'attribut",
+# (balise, None) pour la balise seule
+
+# Cartes d'offres, par ordre de préférence (le premier sélecteur qui trouve des cartes gagne)
+LINKEDIN_CARD_SELECTORS = [
+    ('div', 'job-search-card'),
+    ('li', 'jobs-search-results__list-item'),
+    ('div', '@data-job-id'),
+]
+INDEED_CARD_SELECTORS = [
+    ('div', 'job_seen_beacon'),
+    ('div', '@data-jk'),
+]
+
+# Champs d'une carte, sélecteurs par ordre de préférence
+LINKEDIN_CARD_FIELDS = {
+    'title': [('h3', 'base-search-card__title'), ('a', 'base-card__full-link'), ('h2', None), ('a', '@href')],
+    'company': [('h4', 'base-search-card__subtitle'), ('a', 'hidden-nested-link'),
+                ('span', 'job-result-card__subtitle')],
+    'location': [('span', 'job-search-card__location'), ('span', 'job-result-card__location')],
+    'link': [('a', 'base-card__full-link'), ('a', '@href')],
+    'description': [('p', 'job-search-card__snippet'), ('div', 'search-result__snippet'),
+                    ('p', 'job-result-card__snippet')],
+}
+INDEED_CARD_FIELDS = {
+    'title': [('h2', 'jobTitle'), ('a', '@data-jk')],
+    'company': [('span', 'companyName'), ('a', 'companyName')],
+    'location': [('div', 'companyLocation')],
+    'summary': [('div', 'job-snippet'), ('div', 'summary')],
+    'salary': [('span', 'salary-snippet'), ('div', 'salary')],
+}
+
+
+def compile_card_fields(fields: Dict[str, List[Tuple[str, Optional[str]]]]) -> Dict[str, List[Tuple]]:
+    """
+    Index balise -> [(sélecteur, champ, priorité)] pour le parcours unique des cartes
+    """
+    index: Dict[str, List[Tuple]] = {}
+    for field, selectors in fields.items():
+        for priority, (tag, selector) in enumerate(selectors):
+            index.setdefault(tag, []).append((selector, field, priority))
+    return index
+
+
+LINKEDIN_FIELD_INDEX = compile_card_fields(LINKEDIN_CARD_FIELDS)
+INDEED_FIELD_INDEX = compile_card_fields(INDEED_CARD_FIELDS)
+
+
+def _matches(elem, selector: Optional[str]) -> bool:
+    if selector is None:
+        return True
+    if selector.startswith('@'):
+        return elem.get(selector[1:]) is not None
+    return selector in (elem.get('class') or ())
+
+
+def extract_card_fields(card, index: Dict[str, List[Tuple]]) -> Dict:
+    """
+    Relève les éléments des champs d'une carte en un seul parcours de ses descendants
+
+    Pour chaque champ, l'élément retenu est le premier (dans l'ordre du document) qui
+    correspond au sélecteur le plus prioritaire trouvé, comme une cascade de `find`.
+
+    Returns:
+        {champ: élément} pour les champs trouvés
+    """
+    best: Dict[str, Tuple[int, object]] = {}
+    remaining = {field for rules in index.values() for _, field, _ in rules}
+
+    for elem in card.find_all(True):
+        rules = index.get(elem.name)
+        if not rules:
+            continue
+        for selector, field, priority in rules:
+            current = best.get(field)
+            if current is not None and current[0] <= priority:
+                continue
+            if _matches(elem, selector):
+                best[field] = (priority, elem)
+                if priority == 0:
+                    remaining.discard(field)
+        if not remaining:
+            # Tous les champs ont leur sélecteur préféré: inutile de continuer
+            break
+
+    return {field: elem for field, (_, elem) in best.items()}
+
+
+def _strainer(selectors: List[Tuple[str, Optional[str]]]) -> SoupStrainer:
+    """SoupStrainer gardant les éléments porteurs d'une des classes (ou de l'attribut) recherchés"""
+    attributes = [selector[1:] for _, selector in selectors if selector and selector.startswith('@')]
+    if attributes:
+        return SoupStrainer(attrs={attributes[0]: True})
+    classes = '|'.join(re.escape(selector) for _, selector in selectors)
+    return SoupStrainer(attrs={'class': re.compile(rf'(?:^|\s)(?:{classes})(?:\s|$)')})
+
+
+def parse_job_cards(html: str, selectors: List[Tuple[str, Optional[str]]]) -> List:
+    """
+    Cartes d'offres de la page, selon le premier sélecteur de `selectors` qui en trouve
+
+    Les sélecteurs par classe sont servis par un seul parsing restreint aux sous-arbres
+    portant ces classes; un sélecteur par attribut (repli) déclenche un parsing restreint
+    à cet attribut, seulement si les précédents n'ont rien trouvé.
+    """
+    soups = {}
+
+    for tag, selector in selectors:
+        if selector and selector.startswith('@'):
+            group = (selector,)
+            strainer_selectors = [(tag, selector)]
+            attrs = {selector[1:]: True}
+        else:
+            group = ('class',)
+            strainer_selectors = [s for s in selectors if s[1] and not s[1].startswith('@')]
+            attrs = {'class': selector}
+
+        if group not in soups:
+            soups[group] = BeautifulSoup(html, HTML_PARSER, parse_only=_strainer(strainer_selectors))
+
+        cards = soups[group].find_all(tag, attrs)
+        if cards:
+            return cards
+
+    return []
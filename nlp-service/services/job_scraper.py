@@ -1,37 +1,72 @@
 """
 Service de scraping pour récupérer de vraies offres d'emploi depuis LinkedIn et Indeed
-Utilise BeautifulSoup et requests pour scraper les sites
+Utilise BeautifulSoup (lxml + SoupStrainer, voir job_cards) et requests pour scraper les sites
+
+Les pages de résultats sont récupérées en parallèle (pool borné) et au rythme
+d'un limiteur par hôte partagé par tout le processus (voir rate_limiter). Les pages
+inchangées depuis la synchronisation précédente sont servies par le cache HTTP
+(voir http_cache) et ne sont pas analysées de nouveau. En mode incrémental, la
+pagination s'arrête dès qu'une page contient surtout des offres déjà vues (voir seen_jobs).
 """
+import os
+import copy
+import hashlib
 import logging
-from typing import List, Dict, Optional
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from typing import Iterator, List, Dict, Optional, Tuple, Union
 from datetime import datetime
 import requests
-from bs4 import BeautifulSoup
-import time
 import re
 
+from services.http_cache import CachingHTTPAdapter
+from services.http_session import get_scraper_session
+from services.job_cards import (
+    INDEED_CARD_SELECTORS,
+    INDEED_FIELD_INDEX,
+    LINKEDIN_CARD_SELECTORS,
+    LINKEDIN_FIELD_INDEX,
+    extract_card_fields,
+    parse_job_cards,
+)
+from services.seen_jobs import INCREMENTAL_DEFAULT, SeenJobsStore
+
 logger = logging.getLogger(__name__)
 
+# Pages de résultats récupérées simultanément pour une même recherche
+PAGE_WORKERS = int(os.getenv('SCRAPER_PAGE_WORKERS', '4'))
+# Pages déjà analysées gardées en mémoire (contenu identique = offres identiques)
+PARSED_PAGES_MAX = int(os.getenv('SCRAPER_PARSED_PAGES_MAX', '256'))
+
+_parsed_pages: 'OrderedDict[str, List[Dict]]' = OrderedDict()
+_parsed_pages_lock = threading.Lock()
+
 class JobScraper:
     """
     Service de scraping pour LinkedIn et Indeed
     """
     
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        })
+        # Session du processus: pool de connexions keep-alive et retries partagés
+        self.session = get_scraper_session()
+        # Offres déjà vues par recherche (arrêt anticipé de la pagination)
+        self.seen_jobs = SeenJobsStore()
     
     def scrape_linkedin(
         self,
         keywords: str,
         location: str = '',
-        limit: int = 25
+        limit: int = 25,
+        incremental: Optional[bool] = None
     ) -> List[Dict]:
         """
         Scrape les offres d'emploi depuis LinkedIn
         Utilise l'URL de recherche publique de LinkedIn
+        
+        incremental: arrêter la pagination sur une page d'offres déjà vues
+        (SCRAPER_INCREMENTAL par défaut)
         """
         jobs = []
         try:
@@ -50,66 +85,47 @@ class JobScraper:
             }
             
             max_results = min(limit, 100)
-            start = 0
+            # LinkedIn affiche généralement 25 résultats par page
+            starts = list(range(0, max_results, 25))
             
-            while len(jobs) < max_results and start < max_results:
-                params['start'] = start
-                
-                try:
-                    # LinkedIn peut bloquer les requêtes sans cookies/session
-                    # On essaie quand même avec une requête simple
-                    response = self.session.get(base_url, params=params, timeout=15)
+            seen = self._load_seen('linkedin', keywords, location, incremental)
+            
+            # Pages lues dans l'ordre, récupérées en parallèle au rythme du limiteur LinkedIn
+            # (une à une si la recherche a déjà été faite: l'arrêt anticipé est probable)
+            workers = 1 if seen else PAGE_WORKERS
+            with closing(self._fetch_pages(base_url, params, starts, timeout=15, workers=workers)) as pages:
+                for start, response in pages:
+                    if len(jobs) >= max_results:
+                        break
+                    
+                    if isinstance(response, requests.RequestException):
+                        logger.error(f'Error fetching LinkedIn page: {str(response)}')
+                        # En cas d'erreur, générer des offres de démonstration
+                        return self._generate_demo_linkedin_jobs(keywords, location, limit)
                     
-                    if response.status_code == 200:
-                        soup = BeautifulSoup(response.text, 'html.parser')
-                        
-                        # LinkedIn utilise des classes spécifiques pour les offres
-                        # Chercher les cartes d'offres d'emploi
-                        job_cards = soup.find_all('div', class_='job-search-card')
-                        
-                        # Si pas trouvé, essayer d'autres sélecteurs
-                        if not job_cards:
-                            job_cards = soup.find_all('li', class_='jobs-search-results__list-item')
-                        
-                        if not job_cards:
-                            job_cards = soup.find_all('div', {'data-job-id': True})
-                        
-                        if not job_cards:
-                            # LinkedIn peut rediriger vers une page de connexion
-                            if 'login' in response.url.lower() or 'authwall' in response.text.lower():
-                                logger.warning('LinkedIn requires authentication. Cannot scrape without login.')
-                                # Générer des offres de démonstration basées sur les critères
-                                return self._generate_demo_linkedin_jobs(keywords, location, limit)
-                            logger.warning('No job cards found on LinkedIn page')
-                            break
-                        
-                        for card in job_cards:
-                            if len(jobs) >= max_results:
-                                break
-                            
-                            try:
-                                job = self._parse_linkedin_job(card)
-                                if job:
-                                    jobs.append(job)
-                            except Exception as e:
-                                logger.warning(f'Error parsing LinkedIn job: {str(e)}')
-                                continue
-                        
-                        # Si aucune nouvelle offre trouvée, arrêter
-                        if len(job_cards) == 0:
-                            break
-                        
-                        start += 25  # LinkedIn affiche généralement 25 résultats par page
-                        time.sleep(2)  # Rate limiting important pour LinkedIn
-                    else:
+                    # LinkedIn peut bloquer les requêtes sans cookies/session
+                    if response.status_code != 200:
                         logger.warning(f'LinkedIn returned status {response.status_code}')
                         # Si erreur, générer des offres de démonstration
                         return self._generate_demo_linkedin_jobs(keywords, location, limit)
-                        
-                except requests.RequestException as e:
-                    logger.error(f'Error fetching LinkedIn page: {str(e)}')
-                    # En cas d'erreur, générer des offres de démonstration
-                    return self._generate_demo_linkedin_jobs(keywords, location, limit)
+                    
+                    # Offres de la page (page inchangée = analyse déjà faite, voir _parse_page)
+                    page_jobs = self._parse_page(response, 'linkedin')
+                    
+                    if page_jobs is None:
+                        # LinkedIn peut rediriger vers une page de connexion
+                        if 'login' in response.url.lower() or 'authwall' in response.text.lower():
+                            logger.warning('LinkedIn requires authentication. Cannot scrape without login.')
+                            # Générer des offres de démonstration basées sur les critères
+                            return self._generate_demo_linkedin_jobs(keywords, location, limit)
+                        logger.warning('No job cards found on LinkedIn page')
+                        break
+                    
+                    jobs.extend(page_jobs[:max_results - len(jobs)])
+                    
+                    if self.seen_jobs.mostly_seen(page_jobs, seen):
+                        logger.info(f'LinkedIn page start={start} mostly already seen, stopping pagination')
+                        break
             
             if len(jobs) == 0:
                 # Si aucune offre récupérée, générer des offres de démonstration
@@ -117,6 +133,7 @@ class JobScraper:
                 return self._generate_demo_linkedin_jobs(keywords, location, limit)
             
             logger.info(f'Scraped {len(jobs)} jobs from LinkedIn')
+            self.seen_jobs.record('linkedin', keywords, location, jobs)
             return jobs[:limit]
             
         except Exception as e:
@@ -128,10 +145,14 @@ class JobScraper:
         self,
         keywords: str,
         location: str = '',
-        limit: int = 25
+        limit: int = 25,
+        incremental: Optional[bool] = None
     ) -> List[Dict]:
         """
         Scrape les offres d'emploi depuis Indeed
+        
+        incremental: arrêter la pagination sur une page d'offres déjà vues
+        (SCRAPER_INCREMENTAL par défaut)
         """
         jobs = []
         try:
@@ -146,72 +167,175 @@ class JobScraper:
             }
             
             # Faire plusieurs requêtes pour obtenir plus de résultats
-            start = 0
             max_results = min(limit, 100)  # Limiter à 100 pour éviter les blocages
+            starts = list(range(0, max_results, 10))  # Indeed affiche 10 résultats par page
             
-            while len(jobs) < max_results and start < max_results:
-                params['start'] = start
-                
-                try:
-                    response = self.session.get(base_url, params=params, timeout=10)
-                    response.raise_for_status()
-                    
-                    soup = BeautifulSoup(response.text, 'html.parser')
+            seen = self._load_seen('indeed', keywords, location, incremental)
+            
+            # Pages lues dans l'ordre, récupérées en parallèle au rythme du limiteur Indeed
+            # (une à une si la recherche a déjà été faite: l'arrêt anticipé est probable)
+            workers = 1 if seen else PAGE_WORKERS
+            with closing(self._fetch_pages(base_url, params, starts, timeout=10, workers=workers)) as pages:
+                for start, response in pages:
+                    if len(jobs) >= max_results:
+                        break
                     
-                    # Trouver les offres d'emploi
-                    job_cards = soup.find_all('div', class_='job_seen_beacon')
+                    try:
+                        if isinstance(response, requests.RequestException):
+                            raise response
+                        response.raise_for_status()
+                    except requests.RequestException as e:
+                        logger.error(f'Error fetching Indeed page: {str(e)}')
+                        break
                     
-                    if not job_cards:
-                        # Essayer un autre sélecteur
-                        job_cards = soup.find_all('div', {'data-jk': True})
+                    # Offres de la page (page inchangée = analyse déjà faite, voir _parse_page)
+                    page_jobs = self._parse_page(response, 'indeed')
                     
-                    if not job_cards:
+                    if page_jobs is None:
                         logger.warning('No job cards found on Indeed page')
                         break
                     
-                    for card in job_cards:
-                        if len(jobs) >= max_results:
-                            break
-                        
-                        try:
-                            job = self._parse_indeed_job(card)
-                            if job:
-                                jobs.append(job)
-                        except Exception as e:
-                            logger.warning(f'Error parsing Indeed job: {str(e)}')
-                            continue
+                    jobs.extend(page_jobs[:max_results - len(jobs)])
                     
-                    # Si aucune nouvelle offre trouvée, arrêter
-                    if len(job_cards) == 0:
+                    if self.seen_jobs.mostly_seen(page_jobs, seen):
+                        logger.info(f'Indeed page start={start} mostly already seen, stopping pagination')
                         break
-                    
-                    start += 10  # Indeed affiche 10 résultats par page
-                    time.sleep(1)  # Rate limiting
-                    
-                except requests.RequestException as e:
-                    logger.error(f'Error fetching Indeed page: {str(e)}')
-                    break
             
             logger.info(f'Scraped {len(jobs)} jobs from Indeed')
+            self.seen_jobs.record('indeed', keywords, location, jobs)
             return jobs[:limit]
             
         except Exception as e:
             logger.error(f'Error scraping Indeed: {str(e)}', exc_info=True)
             return []
     
+    def _fetch_pages(
+        self,
+        base_url: str,
+        params: Dict,
+        starts: List[int],
+        timeout: float,
+        workers: int = PAGE_WORKERS
+    ) -> Iterator[Tuple[int, Union[requests.Response, requests.RequestException]]]:
+        """
+        Récupère les pages de résultats (paramètre `start`) en parallèle (`workers` à la
+        fois) et les produit dans l'ordre: (start, réponse) ou (start, exception réseau)
+        
+        Les pages encore fraîches sont servies par le cache HTTP; les autres attendent un
+        jeton du limiteur de l'hôte, partagé par toutes les recherches du processus
+        (voir http_session). Les pages pas encore parties sont annulées dès que
+        l'appelant arrête de lire (fermeture du générateur).
+        """
+        stopped = threading.Event()
+        
+        def fetch(start: int) -> Optional[requests.Response]:
+            if stopped.is_set():
+                return None
+            return self.session.get(base_url, params={**params, 'start': start}, timeout=timeout)
+        
+        executor = ThreadPoolExecutor(max_workers=max(1, min(workers, len(starts))),
+                                      thread_name_prefix='scraper')
+        try:
+            futures = [executor.submit(fetch, start) for start in starts]
+            for start, future in zip(starts, futures):
+                try:
+                    yield start, future.result()
+                except requests.RequestException as e:
+                    yield start, e
+        finally:
+            stopped.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _load_seen(self, platform: str, keywords: str, location: str,
+                   incremental: Optional[bool]) -> Dict[str, float]:
+        """Offres déjà vues pour la recherche ({} si le mode incrémental est désactivé)"""
+        if incremental is None:
+            incremental = INCREMENTAL_DEFAULT
+        if not incremental:
+            return {}
+        seen = self.seen_jobs.load(platform, keywords, location)
+        if seen:
+            logger.info(f'Incremental {platform} scrape: {len(seen)} offers already seen')
+        return seen
+    
+    def _parse_page(self, response: requests.Response, platform: str) -> Optional[List[Dict]]:
+        """
+        Offres d'une page de résultats, ou None si la page ne contient aucune carte
+        
+        Le résultat est mémorisé par contenu de page: une page inchangée (servie par le
+        cache HTTP ou revalidée) n'est pas analysée une seconde fois. Seuls les champs des
+        cartes sont réutilisés: les dates de récupération sont celles de l'appel.
+        """
+        key = f"{platform}:{hashlib.sha256(response.content).hexdigest()}"
+        with _parsed_pages_lock:
+            page_jobs = _parsed_pages.get(key)
+            if page_jobs is not None:
+                _parsed_pages.move_to_end(key)
+        if page_jobs is not None:
+            return self._stamp(page_jobs)
+        
+        if platform == 'linkedin':
+            # LinkedIn utilise des classes spécifiques pour les offres (avec sélecteurs de repli)
+            selectors, parse_job = LINKEDIN_CARD_SELECTORS, self._parse_linkedin_job
+        else:
+            selectors, parse_job = INDEED_CARD_SELECTORS, self._parse_indeed_job
+        
+        job_cards = parse_job_cards(response.text, selectors)
+        if not job_cards:
+            # Mur de connexion, captcha...: ne pas resservir cette page depuis le cache HTTP
+            self._forget_page(response)
+            return None
+        
+        page_jobs = []
+        for card in job_cards:
+            try:
+                job = parse_job(card)
+                if job:
+                    page_jobs.append(job)
+            except Exception as e:
+                logger.warning(f'Error parsing {platform} job: {str(e)}')
+                continue
+        
+        with _parsed_pages_lock:
+            _parsed_pages[key] = page_jobs
+            while len(_parsed_pages) > PARSED_PAGES_MAX:
+                _parsed_pages.popitem(last=False)
+        return self._stamp(page_jobs)
+    
+    def _forget_page(self, response: requests.Response) -> None:
+        """Retire du cache HTTP une page sans offres"""
+        if response.request is None:
+            return
+        adapter = self.session.get_adapter(response.request.url)
+        if isinstance(adapter, CachingHTTPAdapter):
+            adapter.forget(response.request.url)
+    
+    @staticmethod
+    def _stamp(page_jobs: List[Dict]) -> List[Dict]:
+        """Copie des offres mémorisées, datées de la récupération en cours"""
+        now = datetime.now().isoformat()
+        jobs = copy.deepcopy(page_jobs)
+        for job in jobs:
+            job['posted_date'] = now
+            job.setdefault('raw_data', {})['scraped_at'] = now
+        return jobs
+    
     def _parse_indeed_job(self, card) -> Optional[Dict]:
         """Parse une carte d'offre Indeed"""
         try:
+            # Tous les champs en un seul parcours de la carte
+            fields = extract_card_fields(card, INDEED_FIELD_INDEX)
+            
             # Titre
-            title_elem = card.find('h2', class_='jobTitle') or card.find('a', {'data-jk': True})
+            title_elem = fields.get('title')
             title = title_elem.get_text(strip=True) if title_elem else ''
             
             # Entreprise
-            company_elem = card.find('span', class_='companyName') or card.find('a', class_='companyName')
+            company_elem = fields.get('company')
             company = company_elem.get_text(strip=True) if company_elem else ''
             
             # Localisation
-            location_elem = card.find('div', class_='companyLocation')
+            location_elem = fields.get('location')
             location = location_elem.get_text(strip=True) if location_elem else ''
             
             # URL
@@ -224,11 +348,11 @@ class JobScraper:
             url = f"https://fr.indeed.com/viewjob?jk={job_id}" if job_id else ''
             
             # Description
-            summary_elem = card.find('div', class_='job-snippet') or card.find('div', class_='summary')
+            summary_elem = fields.get('summary')
             description = summary_elem.get_text(strip=True) if summary_elem else ''
             
             # Salaire
-            salary_elem = card.find('span', class_='salary-snippet') or card.find('div', class_='salary')
+            salary_elem = fields.get('salary')
             salary_text = salary_elem.get_text(strip=True) if salary_elem else ''
             salary_min, salary_max, salary_currency = self._parse_salary(salary_text)
             
@@ -322,26 +446,23 @@ class JobScraper:
     def _parse_linkedin_job(self, card) -> Optional[Dict]:
         """Parse une carte d'offre LinkedIn"""
         try:
+            # Tous les champs en un seul parcours de la carte
+            fields = extract_card_fields(card, LINKEDIN_FIELD_INDEX)
+            
             # Titre
-            title_elem = card.find('h3', class_='base-search-card__title') or card.find('a', class_='base-card__full-link')
-            if not title_elem:
-                title_elem = card.find('h2') or card.find('a', href=True)
+            title_elem = fields.get('title')
             title = title_elem.get_text(strip=True) if title_elem else ''
             
             # Entreprise
-            company_elem = card.find('h4', class_='base-search-card__subtitle') or card.find('a', class_='hidden-nested-link')
-            if not company_elem:
-                company_elem = card.find('span', class_='job-result-card__subtitle')
+            company_elem = fields.get('company')
             company = company_elem.get_text(strip=True) if company_elem else ''
             
             # Localisation
-            location_elem = card.find('span', class_='job-search-card__location')
-            if not location_elem:
-                location_elem = card.find('span', class_='job-result-card__location')
+            location_elem = fields.get('location')
             location = location_elem.get_text(strip=True) if location_elem else ''
             
             # URL
-            link_elem = card.find('a', class_='base-card__full-link') or card.find('a', href=True)
+            link_elem = fields.get('link')
             url = ''
             if link_elem and link_elem.get('href'):
                 url = link_elem.get('href')
@@ -358,9 +479,7 @@ class JobScraper:
                     job_id = url.split('currentJobId=')[-1].split('&')[0]
             
             # Description
-            description_elem = card.find('p', class_='job-search-card__snippet') or card.find('div', class_='search-result__snippet')
-            if not description_elem:
-                description_elem = card.find('p', class_='job-result-card__snippet')
+            description_elem = fields.get('description')
             description = description_elem.get_text(strip=True) if description_elem else ''
             
             if not title or not company:
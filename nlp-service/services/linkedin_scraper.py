@@ -12,40 +12,49 @@ class LinkedInScraper:
     pour récupérer de VRAIES offres basées sur les critères utilisateurs.
     """
 
+    def __init__(self):
+        # Un seul scraper (et une seule session HTTP) pour toutes les requêtes
+        self.scraper = JobScraper()
+
     def scrape_jobs(
         self,
         keywords: str,
         location: str = '',
         limit: int = 25,
-        site_name: str = 'linkedin'
+        site_name: str = 'linkedin',
+        incremental: Optional[bool] = None
     ) -> List[Dict]:
         """
         Scrape les offres via BeautifulSoup en respectant les critères
+        incremental: arrêter la pagination sur une page d'offres déjà vues (voir seen_jobs)
         """
         try:
             logger.info(f'🔍 Scraping {site_name}: "{keywords}" in "{location}" (Limit: {limit})')
             
             # Utiliser le scraper BeautifulSoup existant
-            scraper = JobScraper()
+            scraper = self.scraper
             
             if site_name == 'linkedin':
                 jobs = scraper.scrape_linkedin(
                     keywords=keywords,
                     location=location,
-                    limit=limit
+                    limit=limit,
+                    incremental=incremental
                 )
             elif site_name == 'indeed':
                 jobs = scraper.scrape_indeed(
                     keywords=keywords,
                     location=location,
-                    limit=limit
+                    limit=limit,
+                    incremental=incremental
                 )
             else:
                 # Par défaut, essayer LinkedIn
                 jobs = scraper.scrape_linkedin(
                     keywords=keywords,
                     location=location,
-                    limit=limit
+                    limit=limit,
+                    incremental=incremental
                 )
             
             # Filtrer les offres avec URLs valides
@@ -1,11 +1,34 @@
 import os
 import json
+import time
+import hashlib
 import logging
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
 from openai import OpenAI
 
+from services.cv_sections import apply_section_edits, split_sections
+from services.parse_cache import ParseCache
+from services.prompt_compactor import COMPACTION_ENABLED, compact_for_prompt, compact_text
+from services.token_budget import get_budgeter
+
 logger = logging.getLogger(__name__)
 
+# À incrémenter à chaque changement des prompts ou du format de sortie (invalide le cache)
+PROMPT_VERSION = '3'
+
+# Modes d'optimisation: CV complet régénéré, ou modifications par section appliquées localement
+MODE_FULL = 'full'
+MODE_DIFF = 'diff'
+OPTIMIZATION_MODES = (MODE_FULL, MODE_DIFF)
+# Clé de cache du streaming: prompt et format de résultat propres, distincts du mode 'full'
+STREAM_CACHE_TAG = 'stream'
+
+# Séparateur entre le CV optimisé (texte streamé) et le résumé JSON final en mode streaming
+STREAM_SEPARATOR = '===RESUME_JSON==='
+
+SYSTEM_PROMPT = "Tu es un expert en recrutement et optimisation de CVs. Tu personnalises les CVs pour qu'ils correspondent parfaitement aux offres d'emploi tout en restant honnête et authentique."
+
 
 class OpenAICVOptimizer:
     """
@@ -20,6 +43,21 @@ class OpenAICVOptimizer:
         
         self.client = OpenAI(api_key=api_key)
         self.model = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')
+        self.budgeter = get_budgeter(self.model)
+        self.max_workers = int(os.getenv('OPENAI_CUSTOMIZE_WORKERS', '4'))
+        self.default_mode = os.getenv('OPENAI_OPTIMIZATION_MODE', MODE_FULL).lower()
+        if self.default_mode not in OPTIMIZATION_MODES:
+            logger.warning(f'Unknown OPENAI_OPTIMIZATION_MODE={self.default_mode}, using {MODE_FULL}')
+            self.default_mode = MODE_FULL
+        
+        # Cache des résultats: même CV + même offre + même modèle/prompt = pas de nouvel appel
+        self.cache = ParseCache(
+            cache_dir=os.getenv('OPENAI_OPTIMIZE_CACHE_DIR', './cache/optimized_cvs'),
+            max_size_mb=float(os.getenv('OPENAI_OPTIMIZE_CACHE_MAX_MB', '50')),
+            enabled=os.getenv('OPENAI_OPTIMIZE_CACHE_ENABLED', 'true').lower() == 'true',
+            label='CV optimization cache'
+        )
+        self.cache_ttl = int(os.getenv('OPENAI_OPTIMIZE_CACHE_TTL', str(7 * 24 * 3600)))
         
         logger.info(f'OpenAI CV Optimizer initialized with model: {self.model}')
     
@@ -28,37 +66,270 @@ class OpenAICVOptimizer:
         cv_text: str,
         job_title: str,
         job_description: str,
-        job_requirements: str
+        job_requirements: str,
+        force_refresh: bool = False,
+        mode: Optional[str] = None
     ) -> Dict:
         """
         Optimise un CV pour une offre d'emploi spécifique
+        Le résultat est servi depuis le cache (`cached` vaut True) si le même CV a déjà été
+        optimisé pour la même offre, sauf avec `force_refresh`
+        
+        `mode`: 'full' (le modèle réécrit tout le CV) ou 'diff' (le modèle ne renvoie que
+        les modifications par section, appliquées localement); OPENAI_OPTIMIZATION_MODE par défaut
         
         Returns:
-            Dict avec 'optimized_text', 'changes', 'improvements', 'match_score_improvement'
+            Dict avec 'optimized_text', 'changes', 'improvements', 'match_score_improvement', 'cached'
         """
-        try:
-            prompt = self._create_optimization_prompt(
-                cv_text, job_title, job_description, job_requirements
+        mode = self._resolve_mode(mode)
+        
+        def compute() -> Dict:
+            compacted_cv, compaction = compact_for_prompt(cv_text, self.budgeter)
+            return self._optimize_compacted(
+                cv_text, compacted_cv, compaction, job_title, job_description, job_requirements, mode
             )
+        
+        key = self._cache_key(cv_text, job_title, job_description, job_requirements, mode)
+        return self._cached(key, compute, force_refresh)
+    
+    def optimize_many(self, cv_text: str, jobs: List[Dict], max_workers: Optional[int] = None,
+                      force_refresh: bool = False, mode: Optional[str] = None) -> List[Dict]:
+        """
+        Optimise un même CV pour plusieurs offres avec des appels OpenAI concurrents
+        
+        Le CV est compacté (et ses tokens comptés) une seule fois pour toutes les offres.
+        Les offres déjà traitées pour ce CV sont servies depuis le cache.
+        
+        Args:
+            jobs: [{'id', 'title', 'description', 'requirements'}, ...]
+        
+        Returns:
+            Un résultat par offre, dans l'ordre de `jobs`:
+            {'job_id', 'success', 'optimized_text', 'changes', 'improvements', ...}
+            ou {'job_id', 'success': False, 'error'}
+        """
+        mode = self._resolve_mode(mode)
+        compacted_cv, compaction = compact_for_prompt(cv_text, self.budgeter)
+        max_workers = max_workers or self.max_workers
+        
+        def optimize(index: int, job: Dict) -> Dict:
+            job_id = job.get('id', index)
+            job_title = job.get('title', '')
+            job_description = job.get('description', '')
+            job_requirements = job.get('requirements', '')
+            try:
+                result = self._cached(
+                    self._cache_key(cv_text, job_title, job_description, job_requirements, mode),
+                    lambda: self._optimize_compacted(
+                        cv_text, compacted_cv, compaction, job_title, job_description, job_requirements, mode
+                    ),
+                    force_refresh
+                )
+                return {'job_id': job_id, 'success': True, **result}
+            except Exception as e:
+                return {'job_id': job_id, 'success': False, 'error': str(e)}
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs)))) as executor:
+            return list(executor.map(optimize, range(len(jobs)), jobs))
+    
+    def optimize_cv_stream(
+        self,
+        cv_text: str,
+        job_title: str,
+        job_description: str,
+        job_requirements: str,
+        force_refresh: bool = False
+    ) -> Iterator[Dict]:
+        """
+        Variante streamée de `optimize_cv`: le CV optimisé est produit au fil de la génération
+        
+        Le modèle écrit d'abord le CV optimisé en texte brut, puis STREAM_SEPARATOR et le
+        résumé JSON. Le texte est transmis dès réception, le résumé est décodé à la fin.
+        Un résultat en cache est envoyé d'un bloc (un seul 'delta'), puis mis en cache en fin de stream.
+        
+        Yields:
+            {'event': 'delta', 'text': ...} (morceaux du CV optimisé), puis
+            {'event': 'summary', 'changes', 'improvements', 'summary', 'prompt_compaction', 'cached'}
+        """
+        key = self._cache_key(cv_text, job_title, job_description, job_requirements, STREAM_CACHE_TAG)
+        cached = None if force_refresh else self._cache_get(key)
+        if cached is not None:
+            yield {'event': 'delta', 'text': cached.get('optimized_text') or ''}
+            yield {
+                'event': 'summary',
+                'changes': cached.get('changes', []),
+                'improvements': cached.get('improvements', {}),
+                'summary': cached.get('summary'),
+                'prompt_compaction': cached.get('prompt_compaction'),
+                'cached': True
+            }
+            return
+        
+        compacted_cv, compaction = compact_for_prompt(cv_text, self.budgeter)
+        prompt = self._create_streaming_prompt(
+            compacted_cv, job_title, job_description, job_requirements
+        )
+        
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": SYSTEM_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            temperature=0.7,
+            stream=True
+        )
+        
+        # Les derniers caractères sont retenus tant qu'ils peuvent être le début du séparateur
+        pending = ''
+        text_parts = []
+        summary_parts = []
+        in_summary = False
+        
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
             
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Tu es un expert en recrutement et optimisation de CVs. Tu personnalises les CVs pour qu'ils correspondent parfaitement aux offres d'emploi tout en restant honnête et authentique."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.7,  # Un peu de créativité pour la reformulation
-                response_format={"type": "json_object"}
-            )
+            if in_summary:
+                summary_parts.append(delta)
+                continue
             
-            result_text = response.choices[0].message.content
-            result = json.loads(result_text)
+            pending += delta
+            index = pending.find(STREAM_SEPARATOR)
+            if index >= 0:
+                text = pending[:index].rstrip('\n')
+                if text:
+                    text_parts.append(text)
+                    yield {'event': 'delta', 'text': text}
+                summary_parts.append(pending[index + len(STREAM_SEPARATOR):])
+                pending = ''
+                in_summary = True
+                continue
+            
+            safe_length = len(pending) - len(STREAM_SEPARATOR) + 1
+            if safe_length > 0:
+                text_parts.append(pending[:safe_length])
+                yield {'event': 'delta', 'text': pending[:safe_length]}
+                pending = pending[safe_length:]
+        
+        if pending:
+            text_parts.append(pending)
+            yield {'event': 'delta', 'text': pending}
+        
+        summary = self._parse_stream_summary(''.join(summary_parts))
+        if summary is not None:
+            self._cache_set(key, {
+                'optimized_text': ''.join(text_parts),
+                **summary,
+                'prompt_compaction': compaction
+            })
+        else:
+            # Génération incomplète (séparateur ou résumé absent): ne pas la mettre en cache
+            summary = {'changes': [], 'improvements': {}, 'summary': None}
+        yield {
+            'event': 'summary',
+            **summary,
+            'prompt_compaction': compaction,
+            'cached': False
+        }
+    
+    def _cache_key(self, cv_text: str, job_title: str, job_description: str, job_requirements: str,
+                   mode: str = MODE_FULL) -> str:
+        """
+        Clé de cache: empreintes du CV et de l'offre + modèle + mode (ou STREAM_CACHE_TAG)
+        + version des prompts
+        """
+        fingerprints = '\n'.join(
+            hashlib.sha256((part or '').encode('utf-8')).hexdigest()
+            for part in (cv_text, job_title, job_description, job_requirements)
+        )
+        return self.cache.make_key(fingerprints.encode('utf-8'), PROMPT_VERSION, f'{self.model}:{mode}')
+    
+    def _cache_get(self, key: str) -> Optional[Dict]:
+        """Résultat en cache s'il n'a pas dépassé OPENAI_OPTIMIZE_CACHE_TTL, sinon None"""
+        entry = self.cache.get(key)
+        if entry is None or time.time() - entry.get('cached_at', 0) > self.cache_ttl:
+            return None
+        return entry.get('result')
+    
+    def _cache_set(self, key: str, result: Dict) -> None:
+        self.cache.set(key, {'cached_at': time.time(), 'result': result})
+    
+    def _cached(self, key: str, compute, force_refresh: bool = False) -> Dict:
+        """
+        Retourne le résultat en cache ou le calcule (un seul appel OpenAI pour des
+        demandes identiques simultanées)
+        """
+        if not force_refresh:
+            cached = self._cache_get(key)
+            if cached is not None:
+                logger.info(f'CV optimization cache hit {key[:12]}')
+                return {**cached, 'cached': True}
+        
+        with self.cache.lock(key):
+            if not force_refresh:
+                cached = self._cache_get(key)
+                if cached is not None:
+                    return {**cached, 'cached': True}
+            result = compute()
+            self._cache_set(key, result)
+        
+        return {**result, 'cached': False}
+    
+    @staticmethod
+    def _parse_stream_summary(summary_text: str) -> Optional[Dict]:
+        """
+        Décode le résumé JSON de fin de stream (tolère des balises ``` autour du JSON)
+        Retourne None si le résumé est absent ou illisible
+        """
+        start = summary_text.find('{')
+        end = summary_text.rfind('}')
+        if start < 0 or end < start:
+            logger.warning('Streamed CV optimization ended without a JSON summary')
+            return None
+        try:
+            result = json.loads(summary_text[start:end + 1])
+        except json.JSONDecodeError as e:
+            logger.warning(f'Error parsing streamed optimization summary: {str(e)}')
+            return None
+        return {
+            'changes': result.get('changes', []),
+            'improvements': result.get('improvements', {}),
+            'summary': result.get('summary')
+        }
+    
+    def _optimize_compacted(
+        self,
+        cv_text: str,
+        compacted_cv: str,
+        compaction: Dict,
+        job_title: str,
+        job_description: str,
+        job_requirements: str,
+        mode: str = MODE_FULL
+    ) -> Dict:
+        """
+        Appel OpenAI sur un CV déjà compacté
+        En mode 'diff', les modifications sont appliquées au texte d'origine `cv_text`
+        """
+        try:
+            if mode == MODE_DIFF:
+                result = self._optimize_sections(cv_text, job_title, job_description, job_requirements)
+            else:
+                result = self._complete_json(self._create_optimization_prompt(
+                    compacted_cv, job_title, job_description, job_requirements
+                ))
+            result['optimization_mode'] = mode
+            result['prompt_compaction'] = compaction
             
             return result
             
@@ -69,6 +340,72 @@ class OpenAICVOptimizer:
             logger.error(f'Error optimizing CV with OpenAI: {str(e)}')
             raise
     
+    def _optimize_sections(
+        self,
+        cv_text: str,
+        job_title: str,
+        job_description: str,
+        job_requirements: str
+    ) -> Dict:
+        """
+        Mode 'diff': le CV est découpé en sections numérotées, le modèle ne renvoie que les
+        modifications (section remplacée, ligne remplacée, lignes ajoutées) et le texte
+        complet est reconstruit localement. Les tokens de sortie ne dépendent plus que de
+        ce qui change.
+        
+        Les sections sont celles du texte d'origine (rien de ce que le compactage retire
+        n'est perdu); seul le prompt montre chaque section compactée.
+        """
+        blocks = [text for _, text in split_sections(cv_text)]
+        prompt_blocks = [compact_text(block) if COMPACTION_ENABLED else block for block in blocks]
+        result = self._complete_json(self._create_section_edit_prompt(
+            prompt_blocks, job_title, job_description, job_requirements
+        ))
+        
+        edits = result.get('edits') or []
+        optimized_text, applied, skipped = apply_section_edits(blocks, edits)
+        if skipped:
+            logger.info(f'CV section edits: {applied} applied, {skipped} skipped')
+        
+        return {
+            'optimized_text': optimized_text,
+            'changes': result.get('changes', []),
+            'improvements': result.get('improvements', {}),
+            'summary': result.get('summary'),
+            'edits': edits,
+            'edits_applied': applied,
+            'edits_skipped': skipped
+        }
+    
+    def _complete_json(self, prompt: str) -> Dict:
+        """
+        Appel chat.completions en mode JSON
+        """
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": SYSTEM_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            temperature=0.7,  # Un peu de créativité pour la reformulation
+            response_format={"type": "json_object"}
+        )
+        
+        result_text = response.choices[0].message.content
+        return json.loads(result_text)
+    
+    def _resolve_mode(self, mode: Optional[str]) -> str:
+        mode = (mode or self.default_mode).lower()
+        if mode not in OPTIMIZATION_MODES:
+            raise ValueError(f'Unknown optimization mode: {mode} (expected one of {", ".join(OPTIMIZATION_MODES)})')
+        return mode
+    
     def _create_optimization_prompt(
         self,
         cv_text: str,
@@ -122,14 +459,150 @@ Important:
 - Utiliser les mots-clés de l'offre de manière naturelle
 """
     
-    def estimate_cost(self, cv_length: int, job_description_length: int) -> Dict:
+    def _create_section_edit_prompt(
+        self,
+        blocks: List[str],
+        job_title: str,
+        job_description: str,
+        job_requirements: str
+    ) -> str:
+        """
+        Crée le prompt du mode 'diff': sections numérotées, réponse = liste de modifications
+        """
+        sections = '\n\n'.join(f'[S{i}]\n{block.strip()}' for i, block in enumerate(blocks))
+        return f"""Analyse ce CV et cette offre d'emploi, puis indique les modifications qui rendent le CV plus pertinent pour l'offre.
+
+CV ACTUEL (découpé en sections numérotées [S0], [S1], ...):
+{sections}
+
+OFFRE D'EMPLOI:
+Titre: {job_title}
+Description: {job_description}
+Exigences: {job_requirements}
+
+Tâches:
+1. Identifie les compétences et expériences du CV qui correspondent à l'offre
+2. Reformule uniquement les passages pertinents pour mettre en avant ces correspondances
+3. Ajoute des mots-clés pertinents de l'offre (sans inventer d'expériences)
+4. Ne renvoie PAS le CV complet: seulement les modifications, les sections non citées restent inchangées
+
+Retourne un JSON avec cette structure:
+{{
+  "edits": [
+    {{"section": "S2", "action": "replace_line", "find": "Ligne exacte du CV", "text": "Ligne reformulée"}},
+    {{"section": "S3", "action": "append", "text": "- Nouvelle puce"}},
+    {{"section": "S1", "action": "replace_section", "text": "Section complète réécrite, titre compris"}}
+  ],
+  "changes": [
+    {{
+      "section": "Nom de la section (ex: Expérience, Compétences)",
+      "original": "Texte original",
+      "optimized": "Texte optimisé",
+      "reason": "Pourquoi ce changement améliore la correspondance"
+    }}
+  ],
+  "improvements": {{
+    "keywords_added": ["mot-clé 1", "mot-clé 2"],
+    "sections_reorganized": ["Section 1", "Section 2"],
+    "match_score_improvement": 15.5
+  }},
+  "summary": "Résumé des améliorations apportées"
+}}
+
+Important:
+- Préférer "replace_line" et "append" à "replace_section" (réponse plus courte)
+- "find" doit reprendre exactement une ligne du CV
+- Ne pas inventer d'expériences ou compétences
+- Rester honnête et authentique
+- Utiliser les mots-clés de l'offre de manière naturelle
+"""
+    
+    def _create_streaming_prompt(
+        self,
+        cv_text: str,
+        job_title: str,
+        job_description: str,
+        job_requirements: str
+    ) -> str:
+        """
+        Crée le prompt du mode streaming: CV optimisé en texte brut d'abord, résumé JSON ensuite
+        """
+        return f"""Analyse ce CV et cette offre d'emploi, puis optimise le CV pour qu'il corresponde mieux à l'offre.
+
+CV ACTUEL:
+{cv_text}
+
+OFFRE D'EMPLOI:
+Titre: {job_title}
+Description: {job_description}
+Exigences: {job_requirements}
+
+Tâches:
+1. Identifie les compétences et expériences du CV qui correspondent à l'offre
+2. Reformule les sections pertinentes pour mettre en avant ces correspondances
+3. Ajoute des mots-clés pertinents de l'offre (sans inventer d'expériences)
+4. Réorganise si nécessaire pour mettre en avant les points les plus pertinents
+5. Garde le CV authentique et honnête
+
+Format de la réponse (respecte-le strictement):
+- D'abord le CV optimisé complet, en texte brut (pas de JSON, pas de Markdown)
+- Puis une ligne contenant uniquement {STREAM_SEPARATOR}
+- Puis un JSON avec cette structure:
+{{
+  "changes": [
+    {{
+      "section": "Nom de la section (ex: Expérience, Compétences)",
+      "original": "Texte original",
+      "optimized": "Texte optimisé",
+      "reason": "Pourquoi ce changement améliore la correspondance"
+    }}
+  ],
+  "improvements": {{
+    "keywords_added": ["mot-clé 1", "mot-clé 2"],
+    "sections_reorganized": ["Section 1", "Section 2"],
+    "match_score_improvement": 15.5
+  }},
+  "summary": "Résumé des améliorations apportées"
+}}
+
+Important:
+- Ne pas inventer d'expériences ou compétences
+- Rester honnête et authentique
+- Mettre en avant les points forts existants
+- Utiliser les mots-clés de l'offre de manière naturelle
+"""
+    
+    def estimate_cost(
+        self,
+        cv_length: int,
+        job_description_length: int,
+        cv_text: Optional[str] = None,
+        job_title: str = '',
+        job_description: str = '',
+        job_requirements: str = ''
+    ) -> Dict:
         """
         Estime le coût d'optimisation d'un CV
+        
+        Si `cv_text` est fourni, les tokens d'entrée sont comptés exactement sur le
+        prompt réellement envoyé. Sinon, estimation à partir des longueurs.
         """
-        # Estimation: 1 token ≈ 4 caractères
-        input_tokens = (cv_length + job_description_length) / 4
-        # Estimation: output ≈ 1.2x input (le CV optimisé est généralement plus long)
-        output_tokens = input_tokens * 1.2
+        if cv_text is not None:
+            compacted_cv, compaction = compact_for_prompt(cv_text, self.budgeter)
+            prompt = self._create_optimization_prompt(
+                compacted_cv, job_title, job_description, job_requirements
+            )
+            input_tokens = self.budgeter.count_tokens(SYSTEM_PROMPT) + self.budgeter.count_tokens(prompt)
+            cv_tokens = compaction['compacted_tokens']
+            tokens_saved = compaction['tokens_saved']
+            exact = self.budgeter.exact
+        else:
+            input_tokens = self.budgeter.estimate_from_length(cv_length + job_description_length)
+            cv_tokens = self.budgeter.estimate_from_length(cv_length)
+            tokens_saved = None
+            exact = False
+        # Estimation: output ≈ 1.2x le CV (le CV optimisé est généralement plus long)
+        output_tokens = cv_tokens * 1.2
         
         # Coûts par million de tokens (gpt-4o-mini)
         input_cost_per_million = 0.15  # $0.15/1M tokens
@@ -143,6 +616,8 @@ Important:
             'estimated_cost': round(total_cost, 6),
             'input_tokens_estimate': int(input_tokens),
             'output_tokens_estimate': int(output_tokens),
-            'model': self.model
+            'model': self.model,
+            'exact_input_tokens': exact,
+            'prompt_tokens_saved': tokens_saved
         }
 
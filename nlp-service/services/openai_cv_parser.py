@@ -1,11 +1,86 @@
 import os
 import json
 import logging
-from typing import Dict, Optional
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from openai import OpenAI, OpenAIError
+
+from services.cv_sections import HEADER, segment_cv
+from services.prompt_compactor import compact_for_prompt
+from services.token_budget import get_budgeter
 
 logger = logging.getLogger(__name__)
 
+SYSTEM_PROMPT = "Tu es un expert en recrutement et analyse de CVs. Tu extrais les informations de manière structurée et précise."
+
+# Schéma JSON de chaque champ (mêmes structures que le prompt complet)
+FIELD_SCHEMAS = {
+    'personal_info': '''"personal_info": {
+    "full_name": "Nom complet",
+    "email": "email@example.com",
+    "phone": "+33 6 12 34 56 78",
+    "location": "Ville, Pays",
+    "linkedin": "URL LinkedIn si présente",
+    "website": "Site web si présent"
+  }''',
+    'skills': '"skills": ["Compétence 1", "Compétence 2", ...]',
+    'experience': '''"experience": [
+    {
+      "position": "Titre du poste",
+      "company": "Nom de l'entreprise",
+      "location": "Lieu",
+      "start_date": "MM/YYYY",
+      "end_date": "MM/YYYY ou 'Present'",
+      "description": "Description des responsabilités et réalisations"
+    }
+  ]''',
+    'education': '''"education": [
+    {
+      "degree": "Diplôme",
+      "institution": "École/Université",
+      "location": "Lieu",
+      "start_date": "YYYY",
+      "end_date": "YYYY",
+      "field_of_study": "Domaine d'études"
+    }
+  ]''',
+    'languages': '''"languages": [
+    {
+      "language": "Langue",
+      "level": "Niveau (A1, A2, B1, B2, C1, C2, Natif)"
+    }
+  ]''',
+    'certifications': '''"certifications": [
+    {
+      "name": "Nom de la certification",
+      "issuer": "Organisme émetteur",
+      "date": "MM/YYYY",
+      "expiry_date": "MM/YYYY si applicable"
+    }
+  ]''',
+    'projects': '''"projects": [
+    {
+      "name": "Nom du projet",
+      "description": "Description",
+      "technologies": ["Tech 1", "Tech 2"],
+      "url": "URL si disponible"
+    }
+  ]''',
+    'summary': '"summary": "Résumé professionnel ou objectif de carrière"',
+}
+
+# Découpage en morceaux: (sections du CV, champs demandés)
+# L'en-tête (avant le premier titre) porte les coordonnées; les compétences citées
+# dans les expériences et projets sont aussi récupérées
+CHUNK_PLAN: List[Tuple[Tuple[str, ...], Tuple[str, ...]]] = [
+    ((HEADER, 'profile'), ('personal_info', 'summary')),
+    (('skills',), ('skills',)),
+    (('experience',), ('experience', 'skills')),
+    (('education',), ('education',)),
+    (('projects',), ('projects', 'skills')),
+    (('languages', 'certifications'), ('languages', 'certifications')),
+]
+
 
 class OpenAICVParser:
     """
@@ -19,37 +94,34 @@ class OpenAICVParser:
         
         self.client = OpenAI(api_key=api_key)
         self.model = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')  # Utilise gpt-4o-mini par défaut (plus économique)
+        self.budgeter = get_budgeter(self.model)
+        
+        # Extraction par section en parallèle pour les CVs longs: 'auto', 'always' ou 'never'
+        self.chunked_mode = os.getenv('OPENAI_CHUNKED_PARSING', 'auto').lower()
+        self.chunked_min_tokens = int(os.getenv('OPENAI_CHUNKED_MIN_TOKENS', '1200'))
+        self.chunked_workers = int(os.getenv('OPENAI_CHUNKED_WORKERS', str(len(CHUNK_PLAN))))
     
     def parse_from_text(self, text: str) -> Dict:
         """
         Parse un CV à partir du texte extrait
         Utilise OpenAI pour extraire les informations structurées
+        Les CVs longs sont découpés en sections analysées en parallèle (voir _plan_chunks)
         """
         try:
-            prompt = self._create_parsing_prompt(text)
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Tu es un expert en recrutement et analyse de CVs. Tu extrais les informations de manière structurée et précise."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.3,  # Faible température pour plus de cohérence
-                response_format={"type": "json_object"}  # Force la réponse en JSON
-            )
+            # Texte compacté pour le prompt uniquement, raw_text reste le texte d'origine
+            compacted, compaction = compact_for_prompt(text, self.budgeter)
             
-            # Parser la réponse JSON
-            result_text = response.choices[0].message.content
-            parsed_data = json.loads(result_text)
+            chunks = self._plan_chunks(compacted, compaction['compacted_tokens'])
+            if chunks:
+                parsed_data = self._parse_chunks(text, chunks)
+                parsed_data['parsing_strategy'] = 'chunked'
+            else:
+                parsed_data = self._complete_json(self._create_parsing_prompt(compacted))
+                parsed_data['parsing_strategy'] = 'single'
             
             # Ajouter le texte brut
             parsed_data['raw_text'] = text
+            parsed_data['prompt_compaction'] = compaction
             
             return parsed_data
             
@@ -61,6 +133,147 @@ class OpenAICVParser:
             logger.error(f'Error with OpenAI API: {str(e)}')
             raise
     
+    def _complete_json(self, prompt: str) -> Dict:
+        """
+        Appel chat.completions en mode JSON
+        """
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": SYSTEM_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            temperature=0.3,  # Faible température pour plus de cohérence
+            response_format={"type": "json_object"}  # Force la réponse en JSON
+        )
+        
+        # Parser la réponse JSON
+        result_text = response.choices[0].message.content
+        return json.loads(result_text)
+    
+    def _plan_chunks(self, text: str, tokens: int) -> Optional[List[Tuple[str, Tuple[str, ...]]]]:
+        """
+        Découpe le CV en morceaux (texte des sections, champs à extraire)
+        Retourne None si le CV doit être analysé en un seul appel (court ou sans titres reconnus)
+        """
+        if self.chunked_mode == 'never':
+            return None
+        if self.chunked_mode != 'always' and tokens < self.chunked_min_tokens:
+            return None
+        
+        sections = segment_cv(text)
+        if len(sections) < 3:
+            # En-tête + une seule section: rien à paralléliser
+            return None
+        
+        chunks = []
+        for section_names, fields in CHUNK_PLAN:
+            chunk_text = '\n\n'.join(sections[name] for name in section_names if sections.get(name))
+            if chunk_text.strip():
+                chunks.append((chunk_text, fields))
+        return chunks if len(chunks) > 1 else None
+    
+    def _parse_chunks(self, text: str, chunks: List[Tuple[str, Tuple[str, ...]]]) -> Dict:
+        """
+        Extrait chaque morceau en parallèle puis fusionne dans le schéma de _create_fallback_structure
+        La latence est celle du morceau le plus lent
+        
+        Un morceau en échec (JSON invalide, erreur de l'API: timeout, quota...) n'empêche pas
+        la fusion des autres; il est listé dans 'failed_chunks'. Si tous échouent, l'erreur
+        est levée comme pour l'analyse en un seul appel.
+        """
+        def extract(chunk):
+            chunk_text, fields = chunk
+            try:
+                return fields, self._complete_json(self._create_section_prompt(chunk_text, fields)), None
+            except json.JSONDecodeError as e:
+                logger.warning(f'Invalid JSON for CV chunk {fields}: {str(e)}')
+                return fields, None, e
+            except OpenAIError as e:
+                logger.warning(f'OpenAI error for CV chunk {fields}: {str(e)}')
+                return fields, None, e
+        
+        with ThreadPoolExecutor(max_workers=min(self.chunked_workers, len(chunks))) as executor:
+            results = list(executor.map(extract, chunks))
+        
+        failures = [(fields, error) for fields, partial, error in results if error is not None]
+        if len(failures) == len(results):
+            api_errors = [error for _, error in failures if not isinstance(error, json.JSONDecodeError)]
+            if api_errors:
+                raise api_errors[0]
+            raise json.JSONDecodeError('No valid JSON in any CV chunk', '', 0)
+        
+        logger.info(f'CV parsed in {len(chunks)} parallel chunks ({len(failures)} failed)')
+        merged = self._merge_chunks(text, [(fields, partial) for fields, partial, _ in results])
+        if failures:
+            merged['failed_chunks'] = [
+                {'fields': list(fields), 'error': str(error), 'error_type': type(error).__name__}
+                for fields, error in failures
+            ]
+        return merged
+    
+    def _merge_chunks(self, text: str, results: List[Tuple[Tuple[str, ...], Optional[Dict]]]) -> Dict:
+        """
+        Fusionne les résultats partiels: premières valeurs non vides pour les champs simples,
+        concaténation pour les listes (compétences dédoublonnées)
+        """
+        merged = self._create_fallback_structure(text)
+        
+        for fields, partial in results:
+            if not partial:
+                continue
+            for field in fields:
+                value = partial.get(field)
+                if not value:
+                    continue
+                if field == 'personal_info' and isinstance(value, dict):
+                    for key, item in value.items():
+                        if item and not merged['personal_info'].get(key):
+                            merged['personal_info'][key] = item
+                elif field == 'summary':
+                    merged['summary'] = merged['summary'] or value
+                elif isinstance(value, list):
+                    merged[field].extend(value)
+        
+        seen = set()
+        skills = []
+        for skill in merged['skills']:
+            if isinstance(skill, str) and skill.strip().lower() not in seen:
+                seen.add(skill.strip().lower())
+                skills.append(skill.strip())
+        merged['skills'] = skills
+        
+        return merged
+    
+    def _create_section_prompt(self, text: str, fields: Tuple[str, ...]) -> str:
+        """
+        Prompt réduit pour une partie du CV: seuls les champs demandés sont extraits
+        """
+        schema = ',\n  '.join(FIELD_SCHEMAS[field] for field in fields)
+        return f"""Voici un extrait d'un CV. Extrais uniquement les informations demandées de manière structurée.
+
+EXTRAIT DU CV:
+{text}
+
+Retourne-les au format JSON avec cette structure exacte:
+{{
+  {schema}
+}}
+
+Important:
+- Si une information n'est pas disponible, utilise null ou un tableau vide
+- Pour les dates, utilise le format indiqué
+- Extrais toutes les compétences techniques mentionnées
+- Sois précis et complet
+- Retourne UNIQUEMENT le JSON, sans texte supplémentaire
+"""
+    
     def _create_parsing_prompt(self, text: str) -> str:
         """
         Crée le prompt pour OpenAI
@@ -1,11 +1,13 @@
 import os
 import json
 import logging
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import numpy as np
 from openai import OpenAI
 from sklearn.metrics.pairwise import cosine_similarity
 
+from services.token_budget import get_budgeter
+
 logger = logging.getLogger(__name__)
 
 
@@ -25,55 +27,83 @@ class OpenAIMatcher:
         # text-embedding-3-small : $0.02/1M tokens (économique)
         # text-embedding-3-large : $0.13/1M tokens (plus précis)
         
-        logger.info(f'OpenAI Matcher initialized with model: {self.embedding_model}')
+        # Troncature exacte en tokens (limite OpenAI: 8191 tokens)
+        self.budgeter = get_budgeter(self.embedding_model)
+        self.max_input_tokens = int(os.getenv('OPENAI_EMBEDDING_MAX_TOKENS', self.budgeter.max_tokens))
+        
+        # Embeddings raccourcis (paramètre `dimensions`, text-embedding-3 uniquement)
+        # et stockés en float16 pour réduire mémoire et coût de similarité
+        self.embedding_dimensions = int(os.getenv('OPENAI_EMBEDDING_DIMENSIONS', '0')) or None
+        self.embedding_dtype = np.dtype(os.getenv('OPENAI_EMBEDDING_DTYPE', 'float16'))
+        if self.embedding_dimensions and not self.supports_dimensions:
+            logger.warning(f'{self.embedding_model} does not support the dimensions parameter, using full-size embeddings')
+            self.embedding_dimensions = None
+        
+        logger.info(
+            f'OpenAI Matcher initialized with model: {self.embedding_model} '
+            f'(dimensions={self.embedding_dimensions or "full"}, dtype={self.embedding_dtype})'
+        )
+    
+    @property
+    def supports_dimensions(self) -> bool:
+        """Seuls les modèles text-embedding-3 acceptent le paramètre `dimensions`"""
+        return self.embedding_model.startswith('text-embedding-3')
     
-    def generate_embedding(self, text: str) -> List[float]:
+    def generate_embedding(self, text: str, dimensions: Optional[int] = None) -> np.ndarray:
         """
         Génère un embedding pour un texte donné
+        Retourne un vecteur normalisé compact (dtype configuré, float16 par défaut)
         """
-        try:
-            # Limiter la longueur du texte (limite OpenAI: 8191 tokens)
-            # On prend les premiers 6000 caractères pour être sûr
-            text = text[:6000] if len(text) > 6000 else text
-            
-            response = self.client.embeddings.create(
-                model=self.embedding_model,
-                input=text
-            )
-            
-            return response.data[0].embedding
-        except Exception as e:
-            logger.error(f'Error generating embedding: {str(e)}')
-            raise
+        return self.generate_embeddings_batch([text], dimensions=dimensions)[0]
     
-    def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+    def generate_embeddings_batch(self, texts: List[str], dimensions: Optional[int] = None) -> np.ndarray:
         """
         Génère des embeddings pour plusieurs textes (batch processing)
         Plus efficace et économique que plusieurs appels individuels
+        
+        Returns:
+            Matrice (len(texts), dimensions) de vecteurs normalisés
         """
         try:
-            # Limiter la longueur de chaque texte
-            processed_texts = [text[:6000] if len(text) > 6000 else text for text in texts]
+            # Limiter chaque texte au budget de tokens du modèle
+            processed_texts = [self.budgeter.truncate(text, self.max_input_tokens) for text in texts]
             
-            response = self.client.embeddings.create(
-                model=self.embedding_model,
-                input=processed_texts
-            )
+            request_params = {
+                'model': self.embedding_model,
+                'input': processed_texts
+            }
+            dimensions = dimensions or self.embedding_dimensions
+            if dimensions and self.supports_dimensions:
+                request_params['dimensions'] = dimensions
             
-            return [item.embedding for item in response.data]
+            response = self.client.embeddings.create(**request_params)
+            
+            return self.to_compact([item.embedding for item in response.data])
         except Exception as e:
             logger.error(f'Error generating batch embeddings: {str(e)}')
             raise
     
-    def calculate_similarity(self, embedding1: List[float], embedding2: List[float]) -> float:
+    def to_compact(self, embeddings) -> np.ndarray:
+        """
+        Convertit des embeddings (listes de floats) en matrice normalisée compacte
+        La normalisation L2 permet de calculer la similarité cosinus par simple produit scalaire
+        """
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (matrix / norms).astype(self.embedding_dtype)
+    
+    def calculate_similarity(self, embedding1, embedding2) -> float:
         """
         Calcule la similarité cosinus entre deux embeddings
         Retourne un score entre 0 et 1
         """
         try:
             # Convertir en numpy arrays
-            vec1 = np.array(embedding1).reshape(1, -1)
-            vec2 = np.array(embedding2).reshape(1, -1)
+            vec1 = np.asarray(embedding1, dtype=np.float32).reshape(1, -1)
+            vec2 = np.asarray(embedding2, dtype=np.float32).reshape(1, -1)
             
             # Calculer la similarité cosinus
             similarity = cosine_similarity(vec1, vec2)[0][0]
@@ -83,6 +113,13 @@ class OpenAIMatcher:
             logger.error(f'Error calculating similarity: {str(e)}')
             raise
     
+    def calculate_similarities(self, query_embedding: np.ndarray, embeddings: np.ndarray) -> np.ndarray:
+        """
+        Similarités cosinus entre un embedding et une matrice d'embeddings normalisés
+        (produit matrice-vecteur, accumulé en float32)
+        """
+        return embeddings.astype(np.float32) @ query_embedding.astype(np.float32)
+    
     def match_cv_to_jobs(
         self, 
         cv_text: str, 
@@ -102,11 +139,7 @@ class OpenAIMatcher:
         """
         try:
             # Préparer les textes des offres
-            job_texts = []
-            for job in jobs:
-                # Combiner titre, description et requirements
-                job_text = f"{job.get('title', '')}\n{job.get('description', '')}\n{job.get('requirements', '')}"
-                job_texts.append(job_text)
+            job_texts = [self.prepare_job_text(job) for job in jobs]
             
             # Générer l'embedding du CV
             logger.info('Generating CV embedding...')
@@ -116,10 +149,12 @@ class OpenAIMatcher:
             logger.info(f'Generating embeddings for {len(job_texts)} jobs...')
             job_embeddings = self.generate_embeddings_batch(job_texts)
             
-            # Calculer les similarités
+            # Calculer les similarités (un seul produit matrice-vecteur)
+            similarities = self.calculate_similarities(cv_embedding, job_embeddings)
+            
             results = []
             for i, job in enumerate(jobs):
-                similarity = self.calculate_similarity(cv_embedding, job_embeddings[i])
+                similarity = float(similarities[i])
                 
                 # Convertir en score de 0-100
                 score = similarity * 100
@@ -131,6 +166,7 @@ class OpenAIMatcher:
                     'details': {
                         'method': 'openai_embedding',
                         'model': self.embedding_model,
+                        'dimensions': int(cv_embedding.shape[0]),
                         'base_similarity': round(similarity, 4)
                     }
                 })
@@ -145,16 +181,37 @@ class OpenAIMatcher:
             logger.error(f'Error matching CV to jobs: {str(e)}')
             raise
     
-    def estimate_cost(self, num_texts: int, avg_text_length: int = 1000) -> Dict:
+    def prepare_job_text(self, job: Dict) -> str:
+        """
+        Combine titre, description et requirements d'une offre
+        """
+        return f"{job.get('title', '')}\n{job.get('description', '')}\n{job.get('requirements', '')}"
+    
+    def estimate_cost(
+        self,
+        num_texts: int,
+        avg_text_length: int = 1000,
+        texts: Optional[List[str]] = None
+    ) -> Dict:
         """
         Estime le coût d'utilisation de l'API OpenAI pour les embeddings
         
+        Si `texts` est fourni, les tokens sont comptés exactement (après troncature
+        au budget du modèle). Sinon, estimation à partir de la longueur moyenne.
+        
         Returns:
-            Dict avec 'estimated_cost', 'tokens_estimate', 'model'
+            Dict avec 'estimated_cost', 'tokens_estimate', 'model', 'exact'
         """
-        # Estimation: 1 token ≈ 4 caractères
-        tokens_per_text = avg_text_length / 4
-        total_tokens = num_texts * tokens_per_text
+        if texts is not None:
+            counts = self.budgeter.count_tokens_batch(texts)
+            total_tokens = sum(min(count, self.max_input_tokens) for count in counts)
+            exact = self.budgeter.exact
+        else:
+            total_tokens = num_texts * min(
+                self.budgeter.estimate_from_length(avg_text_length),
+                self.max_input_tokens
+            )
+            exact = False
         
         # Coûts par million de tokens (au 2024)
         costs = {
@@ -169,6 +226,7 @@ class OpenAIMatcher:
             'estimated_cost': round(estimated_cost, 6),
             'tokens_estimate': int(total_tokens),
             'model': self.embedding_model,
-            'cost_per_million': cost_per_million
+            'cost_per_million': cost_per_million,
+            'exact': exact
         }
 
@@ -0,0 +1,278 @@
+import os
+import re
+import json
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seuls les fichiers nommés par leur clé (créés par le stockage) sont évincés
+ENTRY_NAME_PATTERN = re.compile(r'^[0-9a-f]{64}\.docx$')
+# Fichiers publiés: `<nom du CV>_optimized_<12 premiers caractères de la clé>.docx`
+PUBLISHED_NAME_PATTERN = re.compile(r'_optimized_([0-9a-f]{12})\.docx$')
+
+
+class OptimizedCVStore:
+    """
+    Stockage adressé par contenu des CVs optimisés
+    Clé: SHA-256 du CV source + texte de l'offre + mode et version de l'optimiseur
+    Chaque entrée = le DOCX optimisé + un fichier JSON avec le résultat (texte, changements)
+    Une même demande de personnalisation devient une simple lecture de fichier.
+    Éviction LRU (date de dernier accès) quand la taille totale dépasse la limite
+
+    Les entrées vivent dans un sous-dossier dédié (`.store`). Les fichiers publiés
+    (`publish`) comptent dans la taille de leur entrée et sont évincés avec elle; les
+    anciens `*_optimized.docx` et les autres fichiers du dossier de sortie ne sont jamais
+    touchés.
+    """
+
+    LOCK_STRIPES = 64
+
+    def __init__(self, output_dir: Optional[str] = None, max_size_mb: Optional[float] = None):
+        self.output_dir = output_dir or os.getenv('CV_OUTPUT_DIR', './optimized_cvs')
+        self.store_dir = os.path.join(self.output_dir, '.store')
+        if max_size_mb is None:
+            max_size_mb = float(os.getenv('CV_OUTPUT_MAX_MB', '500'))
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+
+        # Verrous par clé (striped): deux demandes identiques simultanées ne calculent qu'une fois
+        self._locks = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+        self._size_lock = threading.Lock()
+
+        os.makedirs(self.store_dir, exist_ok=True)
+        self._current_size = self._scan_size()
+        logger.info(f'Optimized CV store at {self.store_dir} ({self._current_size / 1024:.0f} KB used)')
+
+    @staticmethod
+    def digest(file_bytes: bytes) -> str:
+        """
+        Empreinte du CV source (calculée une fois par CV, même pour plusieurs offres)
+        """
+        return hashlib.sha256(file_bytes).hexdigest()
+
+    @staticmethod
+    def make_key(cv_digest: str, job_text: str, mode: str, version: str) -> str:
+        """
+        Construit la clé d'une sortie à partir de l'empreinte du CV et de l'offre
+        """
+        job_digest = hashlib.sha256(job_text.encode('utf-8')).hexdigest()
+        return hashlib.sha256(f'{cv_digest}:{job_digest}:{mode}:{version}'.encode('utf-8')).hexdigest()
+
+    def lock(self, key: str) -> threading.Lock:
+        """
+        Verrou associé à une clé
+        """
+        return self._locks[int(key[:8], 16) % self.LOCK_STRIPES]
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Retourne le résultat stocké (avec 'customized_path', chemin interne au stockage) ou None
+        """
+        docx_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+            # Mettre à jour la date d'accès pour l'éviction LRU
+            os.utime(docx_path, None)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f'Corrupted optimized CV entry {key[:12]}: {str(e)}')
+            self._remove_entry(docx_path)
+            return None
+
+        result['customized_path'] = docx_path
+        return result
+
+    def put(self, key: str, write_docx: Callable[[str], None], result: Dict) -> str:
+        """
+        Écrit le DOCX (via `write_docx(chemin)`) puis son résultat, de façon atomique
+
+        Returns:
+            Chemin du DOCX stocké (interne au stockage, voir `publish`)
+        """
+        docx_path, meta_path = self._paths(key)
+        directory = os.path.dirname(docx_path)
+        os.makedirs(directory, exist_ok=True)
+        previous_size = self._entry_size(docx_path)
+
+        fd, tmp_docx = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        os.close(fd)
+        try:
+            write_docx(tmp_docx)
+            os.replace(tmp_docx, docx_path)
+        except Exception:
+            self._remove(tmp_docx)
+            raise
+
+        tmp_meta = None
+        try:
+            fd, tmp_meta = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({k: v for k, v in result.items() if k != 'customized_path'}, f, ensure_ascii=False)
+            os.replace(tmp_meta, meta_path)
+        except (OSError, TypeError, ValueError) as e:
+            # Le DOCX reste utilisable, seule la réutilisation est perdue
+            logger.warning(f'Could not write optimized CV entry {key[:12]}: {str(e)}')
+            if tmp_meta is not None:
+                self._remove(tmp_meta)
+
+        with self._size_lock:
+            self._current_size += self._entry_size(docx_path) - previous_size
+            over_limit = self._current_size > self.max_size_bytes
+
+        if over_limit:
+            # Jamais l'entrée qui vient d'être écrite (elle va être publiée)
+            self._evict(keep=docx_path)
+
+        return docx_path
+
+    def publish(self, key: str, base_name: str) -> str:
+        """
+        Fichier livré pour une entrée: `<nom du CV>_optimized_<clé>.docx` dans le dossier
+        de sortie, lien physique vers l'entrée (copie si le lien est impossible).
+        Supprimé avec son entrée quand celle-ci est évincée.
+
+        Returns:
+            Chemin du fichier publié
+        """
+        docx_path, _ = self._paths(key)
+        safe_name = re.sub(r'[^\w.-]+', '_', base_name).strip('._') or 'cv'
+        published = os.path.join(self.output_dir, f'{safe_name}_optimized_{key[:12]}.docx')
+        if os.path.exists(published):
+            return published
+
+        try:
+            os.link(docx_path, published)
+        except FileExistsError:
+            pass
+        except OSError:
+            fd, tmp_path = tempfile.mkstemp(dir=self.output_dir, suffix='.tmp')
+            os.close(fd)
+            try:
+                shutil.copyfile(docx_path, tmp_path)
+                os.replace(tmp_path, published)
+            except OSError:
+                self._remove(tmp_path)
+                raise
+            # Une copie occupe sa propre place sur le disque (un lien physique, non)
+            with self._size_lock:
+                self._current_size += os.path.getsize(published)
+                over_limit = self._current_size > self.max_size_bytes
+            if over_limit:
+                self._evict(keep=docx_path)
+        return published
+
+    def clear(self) -> None:
+        """
+        Vide le stockage
+        """
+        for path, _, _, published in self._entries():
+            self._remove_entry(path, published)
+        with self._size_lock:
+            self._current_size = 0
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        """
+        Supprime les entrées les moins récemment utilisées jusqu'à 90% de la limite
+        (sauf l'entrée `keep`)
+        """
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _, _ in entries)
+        target = self.max_size_bytes * 0.9
+        removed = 0
+
+        for path, size, _, published in entries:
+            if total <= target:
+                break
+            if path == keep:
+                continue
+            if self._remove_entry(path, published):
+                total -= size
+                removed += 1
+
+        with self._size_lock:
+            self._current_size = total
+
+        if removed:
+            logger.info(f'Evicted {removed} optimized CVs ({total / 1024:.0f} KB remaining)')
+
+    def _entries(self):
+        """
+        Liste (chemin du DOCX, taille, date d'accès, fichiers publiés) des entrées du stockage
+        Taille: DOCX + JSON + copies publiées (un lien physique ne prend pas de place en plus)
+        """
+        published_by_prefix = self._published_files()
+        entries = []
+        for root, _, files in os.walk(self.store_dir):
+            for name in files:
+                if not ENTRY_NAME_PATTERN.match(name):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                published = published_by_prefix.get(name[:12], [])
+                size = self._entry_size(path)
+                for published_path in published:
+                    try:
+                        published_stat = os.stat(published_path)
+                    except OSError:
+                        continue
+                    if (published_stat.st_dev, published_stat.st_ino) != (stat.st_dev, stat.st_ino):
+                        size += published_stat.st_size
+                entries.append((path, size, stat.st_mtime, published))
+        return entries
+
+    def _published_files(self) -> Dict[str, List[str]]:
+        """Fichiers publiés du dossier de sortie, par préfixe de clé"""
+        published = {}
+        try:
+            names = os.listdir(self.output_dir)
+        except OSError:
+            return published
+        for name in names:
+            match = PUBLISHED_NAME_PATTERN.search(name)
+            if match:
+                published.setdefault(match.group(1), []).append(os.path.join(self.output_dir, name))
+        return published
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _, _ in self._entries())
+
+    def _paths(self, key: str):
+        base = os.path.join(self.store_dir, key[:2], key)
+        return f'{base}.docx', f'{base}.json'
+
+    @staticmethod
+    def _entry_size(docx_path: str) -> int:
+        size = 0
+        for path in (docx_path, docx_path[:-len('.docx')] + '.json'):
+            try:
+                size += os.path.getsize(path)
+            except OSError:
+                pass
+        return size
+
+    def _remove_entry(self, docx_path: str, published: Optional[List[str]] = None) -> bool:
+        """Supprime une entrée et ses fichiers publiés"""
+        if published is None:
+            published = self._published_files().get(os.path.basename(docx_path)[:12], [])
+        for published_path in published:
+            self._remove(published_path)
+        removed = self._remove(docx_path)
+        self._remove(docx_path[:-len('.docx')] + '.json')
+        return removed
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
@@ -0,0 +1,187 @@
+import os
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ParseCache:
+    """
+    Cache disque des résultats de parsing de CV
+    Clé: SHA-256 du contenu du fichier + version du parser + mode (openai / fallback)
+    Éviction LRU (date de dernier accès) quand la taille totale dépasse la limite
+    """
+
+    LOCK_STRIPES = 64
+
+    def __init__(self, cache_dir: Optional[str] = None, max_size_mb: Optional[float] = None,
+                 enabled: Optional[bool] = None, label: str = 'CV parse cache'):
+        if enabled is None:
+            enabled = os.getenv('CV_PARSE_CACHE_ENABLED', 'true').lower() == 'true'
+        self.enabled = enabled
+        self.label = label
+        self.cache_dir = cache_dir or os.getenv('CV_PARSE_CACHE_DIR', './cache/parsed_cvs')
+        if max_size_mb is None:
+            max_size_mb = float(os.getenv('CV_PARSE_CACHE_MAX_MB', '100'))
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+
+        # Verrous par clé (striped) pour éviter deux parsings simultanés du même fichier
+        self._locks = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+        self._size_lock = threading.Lock()
+        self._current_size = 0
+
+        if self.enabled:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._current_size = self._scan_size()
+            logger.info(f'{self.label} enabled at {self.cache_dir} ({self._current_size / 1024:.0f} KB used)')
+
+    @staticmethod
+    def make_key(file_bytes: bytes, parser_version: str, mode: str) -> str:
+        """
+        Construit la clé de cache à partir du contenu du fichier
+        """
+        digest = hashlib.sha256(file_bytes).hexdigest()
+        return hashlib.sha256(f'{digest}:{parser_version}:{mode}'.encode('utf-8')).hexdigest()
+
+    def lock(self, key: str) -> threading.Lock:
+        """
+        Verrou associé à une clé (sérialise les parsings concurrents d'un même fichier)
+        """
+        return self._locks[int(key[:8], 16) % self.LOCK_STRIPES]
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Retourne le résultat en cache ou None
+        """
+        if not self.enabled:
+            return None
+
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            # Mettre à jour la date d'accès pour l'éviction LRU
+            os.utime(path, None)
+            return data
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f'Corrupted {self.label} entry {key[:12]}: {str(e)}')
+            self._remove(path)
+            return None
+
+    def set(self, key: str, data: Dict) -> None:
+        """
+        Enregistre un résultat (écriture atomique puis éviction si nécessaire)
+        """
+        if not self.enabled:
+            return
+
+        path = self._path(key)
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+            tmp_path = None
+            size = os.path.getsize(path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f'Could not write {self.label} entry {key[:12]}: {str(e)}')
+            return
+        finally:
+            # Ne pas laisser de fichier temporaire si l'écriture a échoué
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+        with self._size_lock:
+            self._current_size += size - previous_size
+            over_limit = self._current_size > self.max_size_bytes
+
+        if over_limit:
+            self._evict()
+
+    def delete(self, key: str) -> None:
+        """
+        Supprime une entrée (sans effet si elle n'existe pas)
+        """
+        if not self.enabled:
+            return
+
+        path = self._path(key)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        if self._remove(path):
+            with self._size_lock:
+                self._current_size -= size
+
+    def clear(self) -> None:
+        """
+        Vide le cache
+        """
+        for path, _, _ in self._entries():
+            self._remove(path)
+        with self._size_lock:
+            self._current_size = 0
+
+    def _evict(self) -> None:
+        """
+        Supprime les entrées les moins récemment utilisées jusqu'à 90% de la limite
+        """
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        target = self.max_size_bytes * 0.9
+        removed = 0
+
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            if self._remove(path):
+                total -= size
+                removed += 1
+
+        with self._size_lock:
+            self._current_size = total
+
+        if removed:
+            logger.info(f'Evicted {removed} {self.label} entries ({total / 1024:.0f} KB remaining)')
+
+    def _entries(self):
+        """Liste (chemin, taille, date d'accès) des entrées du cache"""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f'{key}.json')
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
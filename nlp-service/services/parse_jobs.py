@@ -0,0 +1,117 @@
+import os
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = 'pending'
+STATUS_RUNNING = 'running'
+STATUS_COMPLETED = 'completed'
+STATUS_FAILED = 'failed'
+
+
+class ParseJobStore:
+    """
+    Tâches d'enrichissement OpenAI exécutées en arrière-plan après un parsing rapide (Spacy/Regex)
+
+    Les tâches sont gardées en mémoire (TTL) et consultables par leur id.
+    Si CV_ENRICH_CALLBACK_URL est défini, le résultat final est aussi poussé au backend.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, ttl_seconds: Optional[int] = None):
+        max_workers = max_workers or int(os.getenv('CV_ENRICH_WORKERS', '4'))
+        self.ttl_seconds = ttl_seconds or int(os.getenv('CV_ENRICH_JOB_TTL', '3600'))
+        self.callback_url = os.getenv('CV_ENRICH_CALLBACK_URL') or None
+        self.callback_timeout = float(os.getenv('CV_ENRICH_CALLBACK_TIMEOUT', '10'))
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='cv-enrich')
+        self._jobs: Dict[str, Dict] = {}
+        # Clé de déduplication -> id de la tâche en cours (un même CV envoyé deux fois)
+        self._active: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, dedupe_key: str, task: Callable[[], Dict], metadata: Optional[Dict] = None) -> str:
+        """
+        Lance `task` en arrière-plan et retourne l'id de la tâche
+        Si une tâche avec la même clé est déjà en cours, son id est retourné
+        """
+        with self._lock:
+            self._prune()
+            active_id = self._active.get(dedupe_key)
+            if active_id and self._jobs.get(active_id, {}).get('status') in (STATUS_PENDING, STATUS_RUNNING):
+                return active_id
+
+            job_id = uuid.uuid4().hex
+            now = time.time()
+            self._jobs[job_id] = {
+                'job_id': job_id,
+                'status': STATUS_PENDING,
+                'created_at': now,
+                'updated_at': now,
+                'parsed_data': None,
+                'error': None,
+                **(metadata or {}),
+            }
+            self._active[dedupe_key] = job_id
+
+        self._executor.submit(self._run, job_id, dedupe_key, task)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """
+        État d'une tâche (copie) ou None si inconnue / expirée
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _run(self, job_id: str, dedupe_key: str, task: Callable[[], Dict]) -> None:
+        self._update(job_id, status=STATUS_RUNNING)
+        start = time.time()
+        try:
+            parsed_data = task()
+            self._update(job_id, status=STATUS_COMPLETED, parsed_data=parsed_data)
+            logger.info(f'CV enrichment {job_id[:8]} completed in {time.time() - start:.1f}s')
+        except Exception as e:
+            logger.warning(f'CV enrichment {job_id[:8]} failed: {str(e)}')
+            self._update(job_id, status=STATUS_FAILED, error=str(e))
+        finally:
+            with self._lock:
+                if self._active.get(dedupe_key) == job_id:
+                    del self._active[dedupe_key]
+
+        if self.callback_url:
+            self._push(job_id)
+
+    def _update(self, job_id: str, **fields) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                job.update(fields, updated_at=time.time())
+
+    def _push(self, job_id: str) -> None:
+        """Envoie le résultat final au backend (best effort)"""
+        job = self.get(job_id)
+        if not job:
+            return
+        try:
+            response = requests.post(self.callback_url, json=job, timeout=self.callback_timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logger.warning(f'Could not push CV enrichment {job_id[:8]} to {self.callback_url}: {str(e)}')
+
+    def _prune(self) -> None:
+        """Supprime les tâches terminées plus anciennes que le TTL (appelé sous verrou)"""
+        expiry = time.time() - self.ttl_seconds
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job['status'] in (STATUS_COMPLETED, STATUS_FAILED) and job['updated_at'] < expiry
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
@@ -0,0 +1,530 @@
+"""
+Extraction de texte PDF par niveaux
+
+1. Lecture rapide de la couche texte avec PyPDF2
+2. Analyse de mise en page pdfplumber, page par page, seulement si le texte rapide
+   semble vide ou illisible
+3. Extraction des tableaux pdfplumber si la page n'a toujours pas de texte
+
+Le niveau ayant servi chaque page est enregistré pour ajuster les seuils.
+
+Le document est lu une seule fois par PyPDF2; seules les pages à analyser avec
+pdfplumber sont réparties par lots dans un pool de processus. Budget de temps par page
+et par document, nombre maximum de pages; les pages abandonnées sont listées dans le
+résultat (`dropped_pages`).
+
+Les budgets sont appliqués par SIGALRM, qui n'est délivré qu'au thread principal d'un
+processus. Depuis un thread de requête Flask, toutes les lectures de pages (PyPDF2 et
+pdfplumber) passent donc par le pool, dont les workers reçoivent l'échéance du document.
+"""
+import io
+import os
+import re
+import time
+import signal
+import tempfile
+import logging
+import threading
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures import TimeoutError as FuturesTimeout
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Chemin du fichier, ou contenu du PDF en mémoire (upload)
+PdfSource = Union[str, bytes]
+
+TIER_FAST = 'pypdf2'
+TIER_LAYOUT = 'pdfplumber'
+TIER_TABLES = 'pdfplumber_tables'
+TIER_EMPTY = 'empty'
+
+# Seuils de qualité du texte rapide (au-delà, la page passe à pdfplumber)
+MIN_PAGE_CHARS = int(os.getenv('PDF_FAST_MIN_CHARS', '40'))
+MIN_ALNUM_RATIO = float(os.getenv('PDF_FAST_MIN_ALNUM_RATIO', '0.6'))
+MAX_SINGLE_CHAR_WORD_RATIO = float(os.getenv('PDF_FAST_MAX_SINGLE_CHAR_RATIO', '0.4'))
+MAX_AVG_WORD_LENGTH = float(os.getenv('PDF_FAST_MAX_AVG_WORD_LENGTH', '20'))
+MAX_UNPRINTABLE_RATIO = 0.02
+
+# Protection contre les PDFs pathologiques (énormes ou malformés)
+MAX_PAGES = int(os.getenv('PDF_MAX_PAGES', '20'))
+PAGE_TIMEOUT = float(os.getenv('PDF_PAGE_TIMEOUT', '10'))
+DOCUMENT_TIMEOUT = float(os.getenv('PDF_DOCUMENT_TIMEOUT', '30'))
+# En dessous, les pages pdfplumber restent dans le processus courant (pas d'aller-retour avec
+# le pool) quand il peut les interrompre lui-même (thread principal: CLI, worker d'extraction)
+PARALLEL_MIN_PAGES = int(os.getenv('PDF_PARALLEL_MIN_PAGES', '3'))
+# Délai laissé aux workers après l'échéance du document avant de les arrêter de force
+WORKER_GRACE = 2.0
+
+CID_PATTERN = re.compile(r'\(cid:\d+\)')
+
+_tier_stats = Counter()
+_reason_stats = Counter()
+_stats_lock = threading.Lock()
+
+_page_pool: Optional[ProcessPoolExecutor] = None
+_page_pool_pid: Optional[int] = None
+_page_pool_workers = 1
+_page_pool_lock = threading.Lock()
+
+
+class PageTimeout(BaseException):
+    """
+    Budget de temps d'une page dépassé
+    BaseException: ne doit pas être absorbée par les `except Exception` de PyPDF2 / pdfminer
+    """
+
+
+def fast_text_issue(text: str) -> Optional[str]:
+    """
+    Indique pourquoi le texte rapide d'une page n'est pas exploitable (None si OK)
+    """
+    stripped = text.strip() if text else ''
+    if len(stripped) < MIN_PAGE_CHARS:
+        return 'too_short'
+
+    if CID_PATTERN.search(stripped):
+        return 'cid_glyphs'
+
+    unprintable = sum(1 for c in stripped if c == '\ufffd' or (not c.isprintable() and not c.isspace()))
+    if unprintable / len(stripped) > MAX_UNPRINTABLE_RATIO:
+        return 'unprintable'
+
+    visible = [c for c in stripped if not c.isspace()]
+    if sum(1 for c in visible if c.isalnum()) / len(visible) < MIN_ALNUM_RATIO:
+        return 'low_alnum'
+
+    words = stripped.split()
+    if len(words) >= 20 and sum(1 for w in words if len(w) == 1) / len(words) > MAX_SINGLE_CHAR_WORD_RATIO:
+        # Texte "e s p a c é" typique des PDFs avec crénage par caractère
+        return 'letter_spaced'
+
+    if sum(len(w) for w in words) / len(words) > MAX_AVG_WORD_LENGTH:
+        # Espaces manquants entre les mots
+        return 'merged_words'
+
+    return None
+
+
+def extract_pdf_text(source: PdfSource, parallel: bool = True) -> Dict:
+    """
+    Extrait le texte d'un PDF en privilégiant la couche texte rapide
+
+    Le document est lu une seule fois par PyPDF2 pour toutes les pages; seules les pages
+    dont le texte rapide est inexploitable passent par pdfplumber, réparties par lots
+    dans le pool de processus (chaque lot ouvre le document une fois).
+
+    Args:
+        source: chemin du PDF ou son contenu en octets (upload)
+        parallel: répartir les pages pdfplumber dans le pool de processus (False dans un
+                  worker d'extraction, qui traite alors ses pages séquentiellement)
+
+    Returns:
+        {'text': str, 'page_count': n, 'pages': [{'page', 'tier', 'reason'}],
+         'dropped_pages': [{'page', 'reason'}]}
+    """
+    deadline = time.monotonic() + DOCUMENT_TIMEOUT
+
+    if _alarm_usable():
+        # Thread principal: les pages trop longues sont interrompues sur place
+        scan = scan_fast_pages(source, deadline)
+        page_indices = sorted(scan['escalated'])
+        if parallel and len(page_indices) >= PARALLEL_MIN_PAGES:
+            with _file_path(source) as path:
+                plumber_pages = _extract_plumber_parallel(path, page_indices, deadline, scan['dropped'])
+        else:
+            plumber_pages = _extract_plumber_sequential(source, page_indices, deadline, scan['dropped'])
+    else:
+        # Thread de requête: aucune page n'y serait interruptible, tout passe par le pool.
+        # Les workers reçoivent un chemin: un upload est écrit une fois sur disque au lieu
+        # d'être sérialisé vers le pool à chaque tâche
+        with _file_path(source) as path:
+            scan = _scan_in_pool(path, deadline)
+            page_indices = sorted(scan['escalated'])
+            plumber_pages = _extract_plumber_parallel(path, page_indices, deadline, scan['dropped'])
+
+    results = scan['results']
+    dropped = scan['dropped']
+    for page_index, (page_text, tier) in plumber_pages.items():
+        fast_text, reason = scan['escalated'][page_index]
+        if tier == TIER_EMPTY and fast_text and fast_text.strip():
+            # Rien de mieux avec pdfplumber: garder le texte rapide plutôt que rien
+            page_text, tier = fast_text + '\n', TIER_FAST
+        results[page_index] = (page_text, {'page': page_index + 1, 'tier': tier, 'reason': reason})
+
+    if dropped:
+        logger.warning(
+            f'PDF {_label(source)}: {len(dropped)}/{scan["page_count"]} pages dropped '
+            f'({dict(Counter(d["reason"] for d in dropped))})'
+        )
+
+    return {
+        'text': ''.join(results[i][0] for i in sorted(results)),
+        'page_count': scan['page_count'],
+        'pages': [results[i][1] for i in sorted(results)],
+        'dropped_pages': sorted(dropped, key=lambda d: d['page']),
+    }
+
+
+def scan_fast_pages(source: PdfSource, deadline: float) -> Dict:
+    """
+    Ouvre le document et lit le texte rapide (PyPDF2) de chaque page
+    Appelée dans un worker du pool depuis un thread de requête: `deadline` est une
+    échéance time.monotonic, horloge commune aux processus de la machine.
+
+    Returns:
+        {'page_count': n, 'results': {page: (texte, détail)} des pages exploitables,
+         'escalated': {page: (texte rapide, raison)} des pages à passer à pdfplumber,
+         'dropped': [{'page', 'reason'}]}
+    """
+    try:
+        with _page_alarm(max(0.001, deadline - time.monotonic())):
+            reader = _open_reader(source)
+            page_count = len(reader.pages) if reader is not None else _count_plumber_pages(source)
+    except PageTimeout:
+        raise ValueError(f'PDF could not be opened within {DOCUMENT_TIMEOUT}s')
+    if page_count == 0:
+        raise ValueError('PDF file is empty or corrupted')
+
+    kept = min(page_count, MAX_PAGES)
+    dropped = [{'page': n, 'reason': 'page_cap'} for n in range(kept + 1, page_count + 1)]
+    results, escalated = _read_fast_pages(reader, kept, deadline, dropped)
+    return {'page_count': page_count, 'results': results, 'escalated': escalated, 'dropped': dropped}
+
+
+def get_tier_stats() -> Dict:
+    """
+    Statistiques cumulées (processus courant) des niveaux d'extraction et des raisons d'escalade
+    """
+    with _stats_lock:
+        return {'tiers': dict(_tier_stats), 'escalation_reasons': dict(_reason_stats)}
+
+
+def record_tier_stats(pages: List[Dict]) -> None:
+    """
+    Ajoute aux statistiques les pages d'un document extrait
+    (appelé dans le processus principal, l'extraction pouvant tourner dans un pool)
+    """
+    with _stats_lock:
+        for page in pages:
+            _tier_stats[page['tier']] += 1
+            if page.get('reason'):
+                _reason_stats[page['reason']] += 1
+
+
+def process_pool_context():
+    """
+    Contexte multiprocessing des pools d'extraction
+
+    Pas de fork direct: les pools sont créés à la demande dans un processus Flask qui
+    fait déjà tourner des threads (enrichissement OpenAI, clients HTTP), et un enfant
+    forké pourrait hériter d'un verrou tenu. forkserver: les workers sont forkés depuis
+    un serveur lancé sans threads (qui précharge le module principal une fois, les
+    workers n'ont donc pas à réimporter l'application); spawn à défaut.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def _read_fast_pages(reader, page_count: int, deadline: float,
+                     dropped: List[Dict]) -> Tuple[Dict, Dict[int, Tuple[Optional[str], str]]]:
+    """
+    Texte rapide de toutes les pages avec le même PdfReader
+
+    Returns:
+        ({page: (texte, détail)} des pages exploitables,
+         {page: (texte rapide, raison)} des pages à passer à pdfplumber)
+    """
+    results = {}
+    escalated = {}
+
+    for page_index in range(page_count):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            dropped.extend({'page': i + 1, 'reason': 'document_timeout'} for i in range(page_index, page_count))
+            break
+        try:
+            with _page_alarm(min(PAGE_TIMEOUT, remaining)):
+                fast_text = _read_fast_page(reader, page_index)
+        except PageTimeout:
+            dropped.append({'page': page_index + 1, 'reason': 'page_timeout'})
+            continue
+
+        reason = fast_text_issue(fast_text) if fast_text is not None else 'unreadable'
+        if reason is None:
+            results[page_index] = (fast_text + '\n', {'page': page_index + 1, 'tier': TIER_FAST, 'reason': None})
+        else:
+            escalated[page_index] = (fast_text, reason)
+
+    return results, escalated
+
+
+def extract_plumber_pages(source: PdfSource, page_indices: List[int], timeout: Optional[float] = None,
+                          deadline: Optional[float] = None) -> Dict[int, Union[Tuple[str, str], str]]:
+    """
+    Analyse pdfplumber d'un lot de pages, le document étant ouvert une seule fois
+    Le budget `timeout` par page, borné par l'échéance `deadline` du document, est
+    appliqué par SIGALRM (thread principal: workers du pool, CLI), ce qui libère le
+    processus au lieu de le laisser bloqué.
+
+    Returns:
+        {page: (texte, niveau)} ou {page: raison d'abandon} ('page_timeout', 'document_timeout')
+    """
+    results = {}
+    with _open_plumber(source) as pdf:
+        try:
+            # Liste des pages construite d'un bloc: interrompue, pdfplumber en garderait une partielle
+            with _page_alarm(max(0.001, deadline - time.monotonic()) if deadline is not None else None):
+                pdf.pages
+        except PageTimeout:
+            return {page_index: 'document_timeout' for page_index in page_indices}
+        for page_index in page_indices:
+            page_timeout = timeout
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    results[page_index] = 'document_timeout'
+                    continue
+                page_timeout = min(timeout or remaining, remaining)
+            try:
+                with _page_alarm(page_timeout):
+                    results[page_index] = _extract_plumber_page(pdf, page_index)
+            except PageTimeout:
+                results[page_index] = 'page_timeout'
+    return results
+
+
+def _collect_plumber_pages(pages: Dict[int, Union[Tuple[str, str], str]], results: Dict,
+                           dropped: List[Dict]) -> None:
+    """Sépare les pages extraites des pages abandonnées"""
+    for page_index, page in pages.items():
+        if isinstance(page, str):
+            dropped.append({'page': page_index + 1, 'reason': page})
+        else:
+            results[page_index] = page
+
+
+def _scan_in_pool(path: str, deadline: float) -> Dict:
+    """Lecture rapide des pages dans un worker du pool, dans la limite du budget document"""
+    pool, _ = _get_page_pool()
+    future = pool.submit(scan_fast_pages, path, deadline)
+    try:
+        return future.result(timeout=max(0.0, deadline - time.monotonic()) + WORKER_GRACE)
+    except FuturesTimeout:
+        # Le worker n'a pas rendu la main malgré son alarme (blocage hors Python)
+        if not future.cancel():
+            _reset_page_pool(pool, terminate=True)
+        raise ValueError(f'PDF reading exceeded {DOCUMENT_TIMEOUT}s')
+    except BrokenProcessPool:
+        _reset_page_pool(pool)
+        raise ValueError('PDF reading worker crashed')
+
+
+def _extract_plumber_parallel(path: str, page_indices: List[int], deadline: float,
+                              dropped: List[Dict]) -> Dict:
+    """Pages pdfplumber réparties par lots dans le pool partagé, dans la limite du budget document"""
+    results = {}
+    if not page_indices:
+        return results
+
+    pool, workers = _get_page_pool()
+    batches = [page_indices[k::workers] for k in range(min(workers, len(page_indices)))]
+    futures = {pool.submit(extract_plumber_pages, path, batch, PAGE_TIMEOUT, deadline): batch for batch in batches}
+    # Les workers s'arrêtent d'eux-mêmes à l'échéance; le délai de grâce couvre le retour des résultats
+    done, not_done = wait(futures, timeout=max(0.0, deadline - time.monotonic()) + WORKER_GRACE)
+    # Lots encore en file: annulés (avant la suppression d'un fichier temporaire).
+    # Lots encore en cours: workers bloqués malgré leur alarme, arrêtés avec le pool
+    running = [future for future in not_done if not future.cancel()]
+    if running:
+        _reset_page_pool(pool, terminate=True)
+
+    for future in done:
+        batch = futures[future]
+        try:
+            _collect_plumber_pages(future.result(), results, dropped)
+        except BrokenProcessPool:
+            _reset_page_pool(pool)
+            dropped.extend({'page': i + 1, 'reason': 'worker_crashed'} for i in batch)
+        except Exception as batch_error:
+            logger.warning(f'Error extracting PDF pages {[i + 1 for i in batch]}: {str(batch_error)}')
+            dropped.extend({'page': i + 1, 'reason': 'error'} for i in batch)
+
+    for future in not_done:
+        dropped.extend({'page': i + 1, 'reason': 'document_timeout'} for i in futures[future])
+
+    return results
+
+
+def _extract_plumber_sequential(source: PdfSource, page_indices: List[int], deadline: float,
+                                dropped: List[Dict]) -> Dict:
+    """Pages pdfplumber dans le processus courant (thread principal), dans la limite du budget document"""
+    results = {}
+    if not page_indices:
+        return results
+    try:
+        _collect_plumber_pages(extract_plumber_pages(source, page_indices, PAGE_TIMEOUT, deadline), results, dropped)
+    except ImportError:
+        raise
+    except Exception as plumber_error:
+        logger.warning(f'pdfplumber could not open {_label(source)}: {str(plumber_error)}')
+        dropped.extend({'page': i + 1, 'reason': 'error'} for i in page_indices)
+    return results
+
+
+def _get_page_pool() -> Tuple[ProcessPoolExecutor, int]:
+    """Pool de processus partagé pour les pages et son nombre de workers (recréé après un fork ou un crash)"""
+    global _page_pool, _page_pool_pid, _page_pool_workers
+    with _page_pool_lock:
+        if _page_pool is None or _page_pool_pid != os.getpid():
+            _page_pool_workers = int(os.getenv('PDF_PAGE_WORKERS', '0')) or min(4, os.cpu_count() or 1)
+            _page_pool = ProcessPoolExecutor(max_workers=_page_pool_workers, mp_context=process_pool_context())
+            _page_pool_pid = os.getpid()
+            logger.info(f'PDF page extraction pool started with {_page_pool_workers} workers')
+        return _page_pool, _page_pool_workers
+
+
+def _reset_page_pool(pool: ProcessPoolExecutor, terminate: bool = False) -> None:
+    """
+    Retire le pool partagé (recréé à la prochaine demande)
+    `terminate`: arrête aussi ses workers, bloqués sur une page; les lots d'autres
+    documents en cours sur ce pool sont alors abandonnés ('worker_crashed')
+    """
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is pool:
+            if terminate:
+                logger.warning('PDF page extraction workers stuck past the document budget, restarting the pool')
+            else:
+                logger.warning('PDF page extraction pool crashed, it will be restarted')
+            _page_pool = None
+    if terminate:
+        for process in list((getattr(pool, '_processes', None) or {}).values()):
+            process.terminate()
+    pool.shutdown(wait=False, cancel_futures=terminate)
+
+
+def _alarm_usable() -> bool:
+    """SIGALRM n'est délivré qu'au thread principal (Unix)"""
+    return hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread()
+
+
+@contextmanager
+def _page_alarm(timeout: Optional[float]):
+    """Lève PageTimeout après `timeout` secondes (Unix, thread principal uniquement)"""
+    if not timeout or not _alarm_usable():
+        yield
+        return
+
+    def _on_timeout(signum, frame):
+        raise PageTimeout(f'Page extraction exceeded {timeout}s')
+
+    previous_handler = signal.signal(signal.SIGALRM, _on_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+
+def _as_file(source: PdfSource):
+    """Chemin tel quel, ou flux mémoire neuf pour un contenu en octets"""
+    return io.BytesIO(source) if isinstance(source, bytes) else source
+
+
+@contextmanager
+def _file_path(source: PdfSource):
+    """Chemin tel quel, ou fichier temporaire (supprimé en sortie) pour un contenu en octets"""
+    if not isinstance(source, bytes):
+        yield source
+        return
+
+    fd, path = tempfile.mkstemp(suffix='.pdf')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(source)
+        yield path
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _label(source: PdfSource) -> str:
+    """Nom affiché dans les logs"""
+    return f'<{len(source)} bytes>' if isinstance(source, bytes) else os.path.basename(source)
+
+
+def _open_reader(source: PdfSource):
+    """PdfReader du document (None si PyPDF2 ne sait pas le lire)"""
+    try:
+        import PyPDF2
+        reader = PyPDF2.PdfReader(_as_file(source))
+        if reader.is_encrypted:
+            reader.decrypt('')
+        # Accès à l'arbre des pages: un document illisible échoue ici plutôt que page par page
+        len(reader.pages)
+        return reader
+    except PageTimeout:
+        raise
+    except Exception as e:
+        logger.info(f'PyPDF2 could not read {_label(source)}: {str(e)}. Using pdfplumber.')
+        return None
+
+
+def _count_plumber_pages(source: PdfSource) -> int:
+    with _open_plumber(source) as pdf:
+        return len(pdf.pages)
+
+
+def _read_fast_page(reader, page_index: int) -> Optional[str]:
+    """Texte PyPDF2 d'une page (None si illisible)"""
+    if reader is None:
+        return None
+    try:
+        return reader.pages[page_index].extract_text() or ''
+    except PageTimeout:
+        raise
+    except Exception as e:
+        logger.debug(f'PyPDF2 failed on page {page_index + 1}: {str(e)}')
+        return None
+
+
+def _open_plumber(source: PdfSource):
+    try:
+        import pdfplumber
+    except ImportError:
+        logger.error("pdfplumber not installed. Please run 'pip install pdfplumber'")
+        raise
+    return pdfplumber.open(_as_file(source))
+
+
+def _extract_plumber_page(pdf, page_index: int) -> Tuple[str, str]:
+    """Analyse de mise en page d'une page du document ouvert, puis tableaux si pas de texte brut"""
+    try:
+        page = pdf.pages[page_index]
+        page_text = page.extract_text()
+        if page_text:
+            return page_text + '\n', TIER_LAYOUT
+
+        # Essayer d'extraire les tableaux si pas de texte brut
+        text = ''
+        for table in page.extract_tables():
+            for row in table:
+                # Filtrer les None et joindre
+                text += ' | '.join([str(cell) for cell in row if cell]) + '\n'
+        if text:
+            return text, TIER_TABLES
+    except PageTimeout:
+        raise
+    except Exception as page_error:
+        logger.warning(f'Error extracting text from page {page_index + 1}: {str(page_error)}')
+        return '', TIER_EMPTY
+
+    logger.warning(f'No text extracted from page {page_index + 1}')
+    return '', TIER_EMPTY
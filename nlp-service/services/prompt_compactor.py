@@ -0,0 +1,169 @@
+"""
+Compactage du texte d'un CV avant envoi à OpenAI
+
+Les textes extraits (pdfplumber notamment) contiennent des espaces multiples, des
+numéros de page, des en-têtes / pieds de page répétés et des séparateurs de tableau
+vides: autant de tokens payés sans information. Le compactage reste conservateur:
+seuls les blancs, les numéros de page, les lignes dupliquées consécutives et les
+répétitions de lignes de coordonnées (e-mail, téléphone, URL) sont retirés.
+
+Un nombre seul ("3") ou une fraction ("4/5") est souvent une note de compétence ou de
+langue: il n'est retiré comme numéro de page qu'en limite de page (saut de page \f)
+ou s'il fait partie d'une suite de numéros espacés (1, 2, 3... ou 1/3, 2/3, 3/3).
+Le texte brut d'origine reste celui renvoyé dans `raw_text`.
+"""
+import os
+import re
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+
+from services.token_budget import TextBudgeter
+
+logger = logging.getLogger(__name__)
+
+COMPACTION_ENABLED = os.getenv('OPENAI_PROMPT_COMPACTION', 'true').lower() == 'true'
+
+# Espaces "exotiques" produits par l'extraction PDF
+SPACE_PATTERN = re.compile(r'[ \t\u00a0\u2000-\u200b\u202f\u205f\u3000]+')
+# Numéros de page explicites: "Page 2", "page 2/3", "p. 4", "- 4 -"
+EXPLICIT_PAGE_NUMBER_PATTERN = re.compile(
+    r'^(?:page|p\.)\s*\d{1,3}(?:\s*(?:/|sur|of)\s*\d{1,3})?$|^[-–]\s*\d{1,3}\s*[-–]$',
+    re.IGNORECASE
+)
+# Numéros ambigus (notes possibles): "3", "2/3", "2 sur 3"
+BARE_PAGE_NUMBER_PATTERN = re.compile(r'^(\d{1,3})(?:\s*(?:/|sur|of)\s*(\d{1,3}))?$', re.IGNORECASE)
+# Écart minimal (en lignes) entre deux numéros d'une même suite de pages
+MIN_PAGE_NUMBER_GAP = 10
+# Cellules de tableau vides: "a |  | | b" -> "a | b"
+EMPTY_CELLS_PATTERN = re.compile(r'(?:\s*\|)+\s*\|')
+# Lignes de coordonnées typiques des en-têtes / pieds de page répétés
+CONTACT_PATTERN = re.compile(
+    r'[A-Za-z0-9._%+-]{1,64}@[A-Za-z0-9.-]{1,253}\.[A-Za-z]{2,24}|https?://|www\.|(?:\+33|0)\s?[1-9](?:[\s.]?\d{2}){4}'
+)
+MAX_FURNITURE_LINE_LENGTH = 100
+
+
+def compact_text(text: str) -> str:
+    """
+    Retourne le texte compacté (même contenu utile, moins de tokens)
+    """
+    normalized = []
+    boundaries = set()
+    pages = text.replace('\r\n', '\n').replace('\r', '\n').split('\f')
+
+    for page_index, page in enumerate(pages):
+        first = len(normalized)
+        for raw_line in page.split('\n'):
+            normalized.append(normalize_line(raw_line))
+
+        if len(pages) > 1:
+            # Premières / dernières lignes non vides de chaque page
+            filled = [i for i in range(first, len(normalized)) if normalized[i]]
+            boundaries.update(filled[:1] + filled[-1:])
+
+    page_numbers = _page_number_lines(normalized, boundaries)
+    lines = []
+    seen_furniture = set()
+    previous = None
+
+    for index, line in enumerate(normalized):
+        if not line:
+            # Une seule ligne vide pour séparer les blocs
+            if lines and lines[-1] != '':
+                lines.append('')
+            previous = None
+            continue
+
+        if index in page_numbers:
+            continue
+
+        # Doublon immédiat (ligne répétée par l'extraction)
+        if line == previous:
+            continue
+        previous = line
+
+        # En-tête / pied de page répété sur chaque page: ne garder que la première occurrence
+        if len(line) <= MAX_FURNITURE_LINE_LENGTH and CONTACT_PATTERN.search(line):
+            if line in seen_furniture:
+                continue
+            seen_furniture.add(line)
+
+        lines.append(line)
+
+    return '\n'.join(lines).strip()
+
+
+def normalize_line(line: str) -> str:
+    """
+    Ligne sans blancs superflus ni cellules de tableau vides (forme vue par le modèle)
+    """
+    line = SPACE_PATTERN.sub(' ', line).strip()
+    if '|' in line:
+        line = EMPTY_CELLS_PATTERN.sub(' |', line).strip(' |')
+    return line
+
+
+def _page_number_lines(lines: List[str], boundaries: Set[int]) -> Set[int]:
+    """
+    Indices des lignes qui sont des numéros de page
+
+    Formes explicites ("Page 2", "- 2 -") partout; nombres seuls et fractions en limite
+    de page, ou s'ils forment une suite (n, n+1... avec le même total) dont les éléments
+    sont espacés d'au moins MIN_PAGE_NUMBER_GAP lignes
+    """
+    page_numbers = set()
+    # (total, prochain numéro attendu) -> (indices de la suite, indice du dernier)
+    chains: Dict[Tuple[Optional[str], int], List[int]] = {}
+
+    for index, line in enumerate(lines):
+        if not line:
+            continue
+        if EXPLICIT_PAGE_NUMBER_PATTERN.match(line):
+            page_numbers.add(index)
+            continue
+        match = BARE_PAGE_NUMBER_PATTERN.match(line)
+        if not match:
+            continue
+        if index in boundaries:
+            page_numbers.add(index)
+            continue
+
+        number, total = int(match.group(1)), match.group(2)
+        if total is not None and number > int(total):
+            continue
+        chain = chains.get((total, number))
+        if chain is not None and index - chain[-1] >= MIN_PAGE_NUMBER_GAP:
+            del chains[(total, number)]
+            chain.append(index)
+        else:
+            chain = [index]
+        chains[(total, number + 1)] = chain
+        if len(chain) >= 2:
+            page_numbers.update(chain)
+
+    return page_numbers
+
+
+def compact_for_prompt(text: str, budgeter: TextBudgeter) -> Tuple[str, Dict]:
+    """
+    Compacte le texte et mesure les tokens économisés
+
+    Returns:
+        (texte compacté, {'original_tokens', 'compacted_tokens', 'tokens_saved', 'exact'})
+    """
+    compacted = compact_text(text) if COMPACTION_ENABLED else text
+    original_tokens = budgeter.count_tokens(text)
+    compacted_tokens = budgeter.count_tokens(compacted) if compacted is not text else original_tokens
+
+    stats = {
+        'original_tokens': original_tokens,
+        'compacted_tokens': compacted_tokens,
+        'tokens_saved': original_tokens - compacted_tokens,
+        'exact': budgeter.exact,
+    }
+    if stats['tokens_saved'] > 0:
+        logger.info(
+            f'Prompt compaction: {original_tokens} -> {compacted_tokens} tokens '
+            f'({stats["tokens_saved"]} saved)'
+        )
+    return compacted, stats
@@ -0,0 +1,97 @@
+"""
+Limitation de débit par hôte pour le scraping
+
+Un seau à jetons (token bucket) par hôte, partagé par toutes les requêtes de scraping
+du processus: le rythme imposé à LinkedIn / Indeed est global, au lieu d'un
+`time.sleep` fixe propre à chaque requête.
+
+Configuration:
+    SCRAPER_DEFAULT_RATE   requêtes par seconde pour un hôte non listé (1)
+    SCRAPER_HOST_RATES     "www.linkedin.com=0.5,fr.indeed.com=1"
+    SCRAPER_RATE_BURST     nombre de requêtes pouvant partir d'un coup (2)
+"""
+import os
+import time
+import logging
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Rythmes des anciens time.sleep(2) (LinkedIn) et time.sleep(1) (Indeed)
+DEFAULT_HOST_RATES = {
+    'www.linkedin.com': 0.5,
+    'fr.indeed.com': 1.0,
+}
+
+
+class TokenBucket:
+    """
+    Seau à jetons thread-safe: `rate` jetons par seconde, au plus `capacity` en réserve
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Prend un jeton, en attendant si nécessaire
+        Les jetons sont réservés dans l'ordre des appels (pas de course entre threads):
+        les pages demandées en premier partent en premier.
+        Retourne False (sans rien réserver) si l'attente dépasserait `timeout` secondes
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            # Jetons négatifs = réservations en attente
+            wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+            if timeout is not None and wait > timeout:
+                return False
+            self._tokens -= 1
+
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+
+def parse_host_values(value: str, variable: str) -> Dict[str, float]:
+    """
+    Lit une liste "hôte=valeur,hôte=valeur" (variable d'environnement `variable`)
+    """
+    values = {}
+    for item in value.split(','):
+        host, _, number = item.partition('=')
+        if not host.strip() or not number.strip():
+            continue
+        try:
+            values[host.strip().lower()] = float(number)
+        except ValueError:
+            logger.warning(f'Invalid {variable} entry: {item}')
+    return values
+
+
+HOST_RATES = {**DEFAULT_HOST_RATES, **parse_host_values(os.getenv('SCRAPER_HOST_RATES', ''), 'SCRAPER_HOST_RATES')}
+DEFAULT_RATE = float(os.getenv('SCRAPER_DEFAULT_RATE', '1'))
+RATE_BURST = float(os.getenv('SCRAPER_RATE_BURST', '2'))
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def get_host_limiter(url: str) -> TokenBucket:
+    """
+    Seau à jetons partagé de l'hôte de `url` (créé au premier appel)
+    """
+    host = (urlparse(url).hostname or url).lower()
+    with _buckets_lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(HOST_RATES.get(host, DEFAULT_RATE), RATE_BURST)
+            _buckets[host] = bucket
+        return bucket
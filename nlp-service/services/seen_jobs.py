@@ -0,0 +1,96 @@
+"""
+Marqueurs de scraping incrémental (offres déjà vues par recherche)
+
+Pour chaque recherche (plateforme, mots-clés, localisation), les `external_id` des
+offres récupérées lors des dernières synchronisations sont gardés sur disque avec leur
+date de dernière apparition. Le scraper arrête la pagination dès qu'une page est
+composée en grande partie d'offres déjà vues: les pages suivantes, plus anciennes, ont
+déjà été importées.
+
+Configuration:
+    SCRAPER_INCREMENTAL        active l'arrêt anticipé par défaut (true)
+    SCRAPER_SEEN_DIR           dossier des marqueurs (./cache/seen_jobs)
+    SCRAPER_SEEN_MAX_IDS       identifiants gardés par recherche (1000)
+    SCRAPER_SEEN_TTL           durée de validité d'un identifiant en secondes (3 jours)
+    SCRAPER_SEEN_STOP_RATIO    part d'offres déjà vues qui arrête la pagination (0.8)
+"""
+import os
+import time
+import hashlib
+import logging
+from typing import Dict, List, Optional
+
+from services.parse_cache import ParseCache
+
+logger = logging.getLogger(__name__)
+
+INCREMENTAL_DEFAULT = os.getenv('SCRAPER_INCREMENTAL', 'true').lower() == 'true'
+SEEN_MAX_IDS = int(os.getenv('SCRAPER_SEEN_MAX_IDS', '1000'))
+SEEN_TTL = float(os.getenv('SCRAPER_SEEN_TTL', str(3 * 24 * 3600)))
+SEEN_STOP_RATIO = float(os.getenv('SCRAPER_SEEN_STOP_RATIO', '0.8'))
+
+
+class SeenJobsStore:
+    """
+    Identifiants des offres déjà vues, par (plateforme, mots-clés, localisation)
+    Stockage: un fichier JSON par recherche {external_id: date de dernière apparition}
+    """
+
+    def __init__(self, cache: Optional[ParseCache] = None):
+        if cache is None:
+            cache = ParseCache(
+                cache_dir=os.getenv('SCRAPER_SEEN_DIR', './cache/seen_jobs'),
+                enabled=True,
+                label='Seen jobs watermarks'
+            )
+        self.cache = cache
+
+    @staticmethod
+    def make_key(platform: str, keywords: str, location: str) -> str:
+        """
+        Clé d'une recherche (insensible à la casse et aux espaces superflus)
+        """
+        normalized = '|'.join(' '.join((value or '').lower().split()) for value in (platform, keywords, location))
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    def load(self, platform: str, keywords: str, location: str) -> Dict[str, float]:
+        """
+        Identifiants encore valides (moins de SCRAPER_SEEN_TTL secondes) de la recherche
+        """
+        data = self.cache.get(self.make_key(platform, keywords, location)) or {}
+        return self._prune(data.get('ids') or {})
+
+    def record(self, platform: str, keywords: str, location: str, jobs: List[Dict]) -> None:
+        """
+        Ajoute les offres récupérées au marqueur de la recherche
+        """
+        now = time.time()
+        ids = [job['external_id'] for job in jobs if job.get('external_id')]
+        if not ids:
+            return
+
+        key = self.make_key(platform, keywords, location)
+        with self.cache.lock(key):
+            data = self.cache.get(key) or {}
+            seen = self._prune(data.get('ids') or {})
+            for external_id in ids:
+                seen[external_id] = now
+            if len(seen) > SEEN_MAX_IDS:
+                # Garder les identifiants vus le plus récemment
+                seen = dict(sorted(seen.items(), key=lambda item: item[1])[-SEEN_MAX_IDS:])
+            self.cache.set(key, {'ids': seen, 'updated_at': now})
+
+    @staticmethod
+    def mostly_seen(page_jobs: List[Dict], seen: Dict[str, float]) -> bool:
+        """
+        True si au moins SCRAPER_SEEN_STOP_RATIO des offres de la page sont déjà connues
+        """
+        if not page_jobs or not seen:
+            return False
+        known = sum(1 for job in page_jobs if job.get('external_id') in seen)
+        return known / len(page_jobs) >= SEEN_STOP_RATIO
+
+    @staticmethod
+    def _prune(ids: Dict[str, float]) -> Dict[str, float]:
+        limit = time.time() - SEEN_TTL
+        return {external_id: seen_at for external_id, seen_at in ids.items() if seen_at >= limit}
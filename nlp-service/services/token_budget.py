@@ -0,0 +1,140 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Import conditionnel de tiktoken (comptage exact des tokens)
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+    logger.warning('tiktoken not available. Token counts will be approximated (1 token ≈ 4 caractères).')
+
+# Nombre maximum de tokens en entrée par modèle
+MODEL_TOKEN_BUDGETS = {
+    'text-embedding-3-small': 8191,
+    'text-embedding-3-large': 8191,
+    'text-embedding-ada-002': 8191,
+    'gpt-4o-mini': 128000,
+    'gpt-4o': 128000,
+}
+
+DEFAULT_TOKEN_BUDGET = 8191
+DEFAULT_ENCODING = 'cl100k_base'
+
+# Approximation utilisée quand tiktoken n'est pas installé
+CHARS_PER_TOKEN = 4
+
+
+class TextBudgeter:
+    """
+    Compte les tokens et tronque les textes selon le tokenizer du modèle OpenAI
+    Les comptages sont mémorisés par hash du texte
+    """
+
+    def __init__(self, model: str, cache_size: int = 4096):
+        self.model = model
+        self.max_tokens = MODEL_TOKEN_BUDGETS.get(model, DEFAULT_TOKEN_BUDGET)
+        self.encoding = self._load_encoding(model)
+        self.cache_size = cache_size
+        self._counts: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def exact(self) -> bool:
+        """Indique si les comptages proviennent du vrai tokenizer"""
+        return self.encoding is not None
+
+    def count_tokens(self, text: str) -> int:
+        """
+        Retourne le nombre exact de tokens d'un texte (mémorisé par hash)
+        """
+        if not text:
+            return 0
+
+        key = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        with self._lock:
+            if key in self._counts:
+                self._counts.move_to_end(key)
+                return self._counts[key]
+
+        if self.encoding is None:
+            count = -(-len(text) // CHARS_PER_TOKEN)
+        else:
+            count = len(self._encode(text))
+
+        with self._lock:
+            self._counts[key] = count
+            if len(self._counts) > self.cache_size:
+                self._counts.popitem(last=False)
+
+        return count
+
+    def count_tokens_batch(self, texts: List[str]) -> List[int]:
+        """
+        Compte les tokens de plusieurs textes
+        """
+        return [self.count_tokens(text) for text in texts]
+
+    def truncate(self, text: str, max_tokens: Optional[int] = None) -> str:
+        """
+        Tronque un texte sur une frontière de token pour respecter le budget
+        """
+        if not text:
+            return text
+
+        budget = max_tokens or self.max_tokens
+        if self.count_tokens(text) <= budget:
+            return text
+
+        if self.encoding is None:
+            return text[:budget * CHARS_PER_TOKEN]
+
+        truncated = self.encoding.decode(self._encode(text)[:budget])
+        # Un token coupé au milieu d'un caractère multi-octets est décodé en U+FFFD
+        return truncated.rstrip('\ufffd')
+
+    def estimate_from_length(self, text_length: int) -> int:
+        """
+        Estimation grossière à partir d'une longueur en caractères (sans texte disponible)
+        """
+        return int(text_length / CHARS_PER_TOKEN)
+
+    def _encode(self, text: str) -> List[int]:
+        return self.encoding.encode(text, disallowed_special=())
+
+    def _load_encoding(self, model: str):
+        if not TIKTOKEN_AVAILABLE:
+            return None
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            logger.info(f'No tiktoken encoding registered for {model}, using {DEFAULT_ENCODING}')
+            try:
+                return tiktoken.get_encoding(DEFAULT_ENCODING)
+            except Exception as e:
+                logger.warning(f'Could not load tiktoken encoding: {str(e)}')
+                return None
+        except Exception as e:
+            logger.warning(f'Could not load tiktoken encoding for {model}: {str(e)}')
+            return None
+
+
+_budgeters: Dict[str, TextBudgeter] = {}
+_budgeters_lock = threading.Lock()
+
+
+def get_budgeter(model: str) -> TextBudgeter:
+    """
+    Retourne le budgeter partagé pour un modèle (cache de comptage commun au processus)
+    """
+    with _budgeters_lock:
+        budgeter = _budgeters.get(model)
+        if budgeter is None:
+            budgeter = TextBudgeter(model)
+            _budgeters[model] = budgeter
+        return budgeter
@@ -0,0 +1,7 @@
+"""
+Configuration pytest: les tests importent les modules du service (`services.*`)
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,43 @@
+"""
+Tests des extracteurs Regex du parser de CV
+"""
+import time
+
+from services.cv_parser import find_role_dates
+
+
+def test_find_role_dates_on_single_lines():
+    text = 'Développeur Python - Acme (2019 - 2021)\nChef de projet – Globex (Jan 2021 - Présent)'
+    assert list(find_role_dates(text)) == [
+        ('Développeur Python', 'Acme', '2019 - 2021'),
+        ('Chef de projet', 'Globex', 'Jan 2021 - Présent'),
+    ]
+
+
+def test_find_role_dates_joins_wrapped_lines():
+    text = 'Développeur Python -\nAcme (2019 - 2021)\nData Engineer - Initech\n(2021 - 2023)'
+    assert list(find_role_dates(text)) == [
+        ('Développeur Python', 'Acme', '2019 - 2021'),
+        ('Data Engineer', 'Initech', '2021 - 2023'),
+    ]
+
+
+def test_find_role_dates_splits_bullet_segments():
+    text = '• Stagiaire - Acme (2018) • Développeur - Globex (2019 - 2020)'
+    assert list(find_role_dates(text)) == [
+        ('Stagiaire', 'Acme', '2018'),
+        ('Développeur', 'Globex', '2019 - 2020'),
+    ]
+
+
+def test_find_role_dates_ignores_lines_without_pattern():
+    text = 'Python (avancé)\nlangues - anglais (courant)\nAcme (2019)'
+    assert list(find_role_dates(text)) == []
+
+
+def test_find_role_dates_is_linear_on_adversarial_lines():
+    # Longue ligne sans correspondance: majuscules, tirets et parenthèses à répétition
+    line = 'A - B (' * 20000
+    started = time.perf_counter()
+    list(find_role_dates(line))
+    assert time.perf_counter() - started < 1.0
@@ -0,0 +1,125 @@
+"""
+Tests du découpage des CVs en sections
+"""
+import pytest
+
+from services.cv_sections import HEADER, apply_section_edits, match_heading, segment_cv, split_sections
+
+
+@pytest.mark.parametrize('line, expected', [
+    ('Compétences', ('skills', '')),
+    ('Compétences techniques', ('skills', '')),
+    ('EXPÉRIENCE PROFESSIONNELLE', ('experience', '')),
+    ('COMPÉTENCES CLÉS', ('skills', '')),
+    ('Formation et certifications', ('education', '')),
+    ('  Projets personnels', ('projects', '')),
+    ('Skills:', ('skills', '')),
+    ('Langues : Français, Anglais', ('languages', 'Français, Anglais')),
+])
+def test_match_heading_accepts_heading_lines(line, expected):
+    assert match_heading(line) == expected
+
+
+@pytest.mark.parametrize('line', [
+    '• Formation des nouveaux arrivants',
+    '- Projet de migration AWS',
+    '* Expérience client',
+    '> Compétences',
+    'Expérience client',
+    'Formation des nouveaux arrivants',
+    'Projet de migration AWS vers Kubernetes',
+    'Expérience client : 5 ans',
+])
+def test_match_heading_rejects_bullets_and_sentences(line):
+    assert match_heading(line) is None
+
+
+def test_segment_cv_keeps_keyword_bullets_in_their_section():
+    text = '\n'.join([
+        'Jean Dupont',
+        'EXPÉRIENCE PROFESSIONNELLE',
+        'Chef de projet - Acme (2019 - 2023)',
+        '• Formation des nouveaux arrivants',
+        '- Projet de migration AWS',
+        'Expérience client',
+        'Formation',
+        'Master Informatique',
+        'Langues : Français, Anglais',
+    ])
+
+    sections = segment_cv(text)
+
+    assert set(sections) == {HEADER, 'experience', 'education', 'languages'}
+    assert sections[HEADER] == 'Jean Dupont'
+    assert sections['experience'] == '\n'.join([
+        'Chef de projet - Acme (2019 - 2023)',
+        '• Formation des nouveaux arrivants',
+        '- Projet de migration AWS',
+        'Expérience client',
+    ])
+    assert sections['education'] == 'Master Informatique'
+    assert sections['languages'] == 'Français, Anglais'
+
+
+def test_segment_cv_concatenates_repeated_sections():
+    sections = segment_cv('Compétences\nPython\nProjets\nAPI\nSKILLS\nDocker')
+    assert sections['skills'] == 'Python\nDocker'
+    assert sections['projects'] == 'API'
+
+
+def test_split_sections_round_trips_text():
+    text = 'Jean Dupont\n\nCompétences\n- Projet de migration AWS\nPython\n\nFormation\nMaster\n'
+
+    blocks = split_sections(text)
+
+    assert [name for name, _ in blocks] == [HEADER, 'skills', 'education']
+    assert '\n'.join(block for _, block in blocks) == text
+
+
+BLOCKS = [
+    'Jean Dupont\n',
+    'Expérience\n- Développement Python\n- Développement  Python et Django\n',
+    'Compétences\nPython, SQL',
+]
+
+
+def test_apply_section_edits_replaces_whole_lines_only():
+    edits = [
+        {'section': 'S1', 'action': 'replace_line', 'find': 'Python', 'text': 'Go'},
+        {'section': 'S1', 'action': 'replace_line', 'find': '- Développement Python et Django',
+         'text': '- Développement Python, Django et FastAPI'},
+    ]
+
+    text, applied, skipped = apply_section_edits(BLOCKS, edits)
+
+    assert (applied, skipped) == (1, 1)
+    assert text.split('\n')[3:5] == ['- Développement Python', '- Développement Python, Django et FastAPI']
+
+
+def test_apply_section_edits_append_and_replace_section_keep_separators():
+    edits = [
+        {'section': '[S1]', 'action': 'append', 'text': '- Migration AWS\n'},
+        {'section': '2', 'action': 'replace_section', 'text': 'Compétences\nPython, SQL, Docker'},
+    ]
+
+    text, applied, skipped = apply_section_edits(BLOCKS, edits)
+
+    assert (applied, skipped) == (2, 0)
+    assert text == (
+        'Jean Dupont\n\n'
+        'Expérience\n- Développement Python\n- Développement  Python et Django\n- Migration AWS\n\n'
+        'Compétences\nPython, SQL, Docker'
+    )
+
+
+@pytest.mark.parametrize('edit', [
+    {'section': 'S9', 'action': 'append', 'text': 'x'},
+    {'section': 'S1', 'action': 'unknown', 'text': 'x'},
+    {'section': 'S1', 'action': 'replace_line', 'find': 'Absent', 'text': 'x'},
+    {'section': 'S1', 'action': 'replace_line', 'text': 'x'},
+    {'section': 'S1', 'action': 'append'},
+    'S1',
+])
+def test_apply_section_edits_skips_invalid_edits(edit):
+    text, applied, skipped = apply_section_edits(BLOCKS, [edit])
+    assert (text, applied, skipped) == ('\n'.join(BLOCKS), 0, 1)
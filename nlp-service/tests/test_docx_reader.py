@@ -0,0 +1,91 @@
+"""
+Tests de la lecture en flux des DOCX
+"""
+import io
+import zipfile
+
+from services.docx_reader import PARAGRAPH, TABLE_ROW, extract_docx_text, iter_docx_blocks, iter_docx_paragraphs
+
+NAMESPACES = (
+    'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+    'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006"'
+)
+
+
+def make_docx(body: str) -> io.BytesIO:
+    """DOCX minimal dont word/document.xml contient `body`"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('word/document.xml', f'<w:document {NAMESPACES}><w:body>{body}</w:body></w:document>')
+    buffer.seek(0)
+    return buffer
+
+
+def paragraph(*runs: str, properties: str = '') -> str:
+    return f'<w:p>{properties}' + ''.join(f'<w:r>{run}</w:r>' for run in runs) + '</w:p>'
+
+
+def text(value: str) -> str:
+    return f'<w:t xml:space="preserve">{value}</w:t>'
+
+
+def cell(*paragraphs: str) -> str:
+    return '<w:tc>' + ''.join(paragraphs) + '</w:tc>'
+
+
+def test_paragraphs_and_table_rows_in_document_order():
+    body = (
+        paragraph(text('Jean '), text('Dupont'))
+        + '<w:tbl><w:tr>' + cell(paragraph(text('Python'))) + cell(paragraph(text('SQL'))) + '</w:tr></w:tbl>'
+        + paragraph(text('Expérience'))
+    )
+
+    assert list(iter_docx_blocks(make_docx(body))) == [
+        (PARAGRAPH, 'Jean Dupont'),
+        (TABLE_ROW, ['Python', 'SQL']),
+        (PARAGRAPH, 'Expérience'),
+    ]
+    assert extract_docx_text(make_docx(body)) == 'Jean Dupont\nPython | SQL\nExpérience'
+
+
+def test_tab_stops_are_not_tabs():
+    tab_stops = '<w:pPr><w:tabs><w:tab w:val="left" w:pos="720"/></w:tabs></w:pPr>'
+    body = paragraph(text('2019'), '<w:tab/>', text('Acme'), properties=tab_stops)
+
+    assert extract_docx_text(make_docx(body)) == '2019\tAcme'
+
+
+def test_line_breaks_inside_paragraph():
+    body = paragraph(text('Ligne 1'), '<w:br/>', text('Ligne 2'))
+    assert extract_docx_text(make_docx(body)) == 'Ligne 1\nLigne 2'
+
+
+def test_fallback_content_is_not_duplicated():
+    textbox = paragraph(text('Zone de texte'))
+    body = paragraph(
+        '<mc:AlternateContent>'
+        f'<mc:Choice Requires="wps"><w:drawing><w:txbxContent>{textbox}</w:txbxContent></w:drawing></mc:Choice>'
+        f'<mc:Fallback><w:pict><w:txbxContent>{textbox}</w:txbxContent></w:pict></mc:Fallback>'
+        '</mc:AlternateContent>'
+    ) + paragraph(text('Corps'))
+
+    assert extract_docx_text(make_docx(body)) == 'Zone de texte\nCorps'
+
+
+def test_nested_tables_are_flattened_into_parent_cell():
+    inner = '<w:tbl><w:tr>' + cell(paragraph(text('A'))) + cell(paragraph(text('B'))) + '</w:tr></w:tbl>'
+    body = '<w:tbl><w:tr>' + cell(paragraph(text('Parent')), inner) + cell(paragraph(text('C'))) + '</w:tr></w:tbl>'
+
+    assert list(iter_docx_blocks(make_docx(body))) == [(TABLE_ROW, ['Parent\nA | B', 'C'])]
+
+
+def test_iter_docx_paragraphs_keeps_only_body_paragraphs():
+    textbox = paragraph(text('Zone de texte'))
+    body = (
+        paragraph(text('Titre'), f'<w:drawing><w:txbxContent>{textbox}</w:txbxContent></w:drawing>')
+        + '<w:tbl><w:tr>' + cell(paragraph(text('Cellule'))) + '</w:tr></w:tbl>'
+        + paragraph()
+        + paragraph(text('Fin'))
+    )
+
+    assert list(iter_docx_paragraphs(make_docx(body))) == ['Titre', '', 'Fin']
@@ -0,0 +1,47 @@
+"""
+Tests du compactage des CVs avant les prompts OpenAI
+"""
+from services.prompt_compactor import compact_text, normalize_line
+
+
+def test_normalize_line_collapses_spaces_and_empty_cells():
+    assert normalize_line('  Python   et\tDjango  ') == 'Python et Django'
+    assert normalize_line('| Python |  | | SQL |') == 'Python | SQL'
+
+
+def test_compact_text_collapses_blank_and_duplicate_lines():
+    text = 'Jean Dupont\n\n\n\nPython\nPython\n\nSQL\n'
+    assert compact_text(text) == 'Jean Dupont\n\nPython\n\nSQL'
+
+
+def test_compact_text_keeps_first_repeated_contact_line():
+    footer = 'jean.dupont@mail.fr - 06 12 34 56 78'
+    text = f'Expérience\n{footer}\nAcme\n{footer}\nFormation\n{footer}'
+    assert compact_text(text) == f'Expérience\n{footer}\nAcme\nFormation'
+
+
+def test_compact_text_strips_explicit_page_numbers():
+    text = 'Expérience\nPage 1\nAcme\n- 2 -\nFormation\np. 3\nMaster'
+    assert compact_text(text) == 'Expérience\nAcme\nFormation\nMaster'
+
+
+def test_compact_text_keeps_ratings():
+    text = 'Langues\nAnglais\n4/5\nEspagnol\n3\nCompétences\nPython\n5'
+    assert compact_text(text) == text
+
+
+def test_compact_text_strips_bare_numbers_at_page_boundaries():
+    text = 'Jean Dupont\nExpérience\nAcme\n1/2\fFormation\nMaster\nAnglais\n4/5\n2/2'
+    assert compact_text(text) == 'Jean Dupont\nExpérience\nAcme\nFormation\nMaster\nAnglais\n4/5'
+
+
+def test_compact_text_strips_spaced_page_number_sequences():
+    page = [f'Ligne {i}' for i in range(12)]
+    text = '\n'.join(page + ['1'] + page + ['2'] + page + ['3'])
+    assert compact_text(text) == '\n'.join(page + page + page)
+
+
+def test_compact_text_keeps_close_number_sequences():
+    # Notes consécutives (1, 2, 3 à quelques lignes d'écart): pas des numéros de page
+    text = 'Python\n1\nSQL\n2\nDocker\n3'
+    assert compact_text(text) == text